@@ -0,0 +1,245 @@
+"""Per-module admission control: bounded concurrency and wait queues.
+
+Every module has one gate for reads and one for writes, and ``/health`` has
+its own, each sized by ``AdmissionSettings``. A request takes a slot for its
+whole lifetime (streamed bodies included); when the slots are busy it waits
+in a bounded FIFO queue, and when that queue is full or the wait times out it
+is answered right away with 503 and ``Retry-After``, so clients back off
+instead of piling up behind a hot module's writer while the others starve.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from . import metrics, profiling
+from .config import AdmissionSettings, get_settings
+
+READ_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+MODULES_PREFIX = "/modules/"
+HEALTH_SCOPE = ""
+_KIND_NAMES = {"read": "lectura", "write": "escritura", "health": "comprobación de estado"}
+
+ADMISSION_IN_FLIGHT = metrics.REGISTRY.register(
+    metrics.Gauge(
+        "aurvo_admission_in_flight",
+        "Peticiones admitidas en curso por módulo y tipo.",
+        ("module", "kind"),
+    )
+)
+ADMISSION_QUEUE_DEPTH = metrics.REGISTRY.register(
+    metrics.Gauge(
+        "aurvo_admission_queue_depth",
+        "Peticiones esperando un hueco por módulo y tipo.",
+        ("module", "kind"),
+    )
+)
+ADMISSION_QUEUE_WAIT = metrics.REGISTRY.register(
+    metrics.Histogram(
+        "aurvo_admission_queue_wait_seconds",
+        "Espera en cola de las peticiones finalmente admitidas.",
+        ("module", "kind"),
+    )
+)
+ADMISSION_REJECTIONS = metrics.REGISTRY.register(
+    metrics.Counter(
+        "aurvo_admission_rejections_total",
+        "Peticiones rechazadas con 503 por módulo, tipo y motivo (queue_full, timeout).",
+        ("module", "kind", "reason"),
+    )
+)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a gate cannot admit a request; ``reason`` labels the metric."""
+
+    def __init__(self, reason: str) -> None:
+        super().__init__(reason)
+        self.reason = reason
+
+
+class Gate:
+    """At most ``limit`` concurrent holders and ``queue`` waiters, served FIFO.
+
+    Gates are only used from the event loop, so plain counters suffice. A
+    released slot is handed straight to the oldest waiter.
+    """
+
+    def __init__(self, module: str, kind: str, *, limit: int, queue: int) -> None:
+        self.module = module
+        self.kind = kind
+        self.limit = limit
+        self.queue = queue
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self, timeout: Optional[float]) -> float:
+        """Take a slot, waiting up to ``timeout`` seconds; return the time waited."""
+
+        if self.active < self.limit and not self._waiters:
+            self._admitted(+1)
+            return 0.0
+        if len(self._waiters) >= self.queue:
+            raise AdmissionRejected("queue_full")
+
+        started = time.perf_counter()
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        self._report_depth()
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self._forget(future)
+            raise AdmissionRejected("timeout") from None
+        except BaseException:
+            if future.done() and not future.cancelled():
+                self.release()  # the slot was handed over just as we were cancelled
+            else:
+                self._forget(future)
+            raise
+        return time.perf_counter() - started
+
+    def release(self) -> None:
+        while self._waiters:
+            future = self._waiters.popleft()
+            if not future.done():
+                future.set_result(None)
+                self._report_depth()
+                return
+        self._admitted(-1)
+        self._report_depth()
+
+    def _admitted(self, delta: int) -> None:
+        self.active += delta
+        ADMISSION_IN_FLIGHT.set(self.active, module=self.module, kind=self.kind)
+
+    def _forget(self, future: asyncio.Future) -> None:
+        try:
+            self._waiters.remove(future)
+        except ValueError:
+            pass
+        self._report_depth()
+
+    def _report_depth(self) -> None:
+        ADMISSION_QUEUE_DEPTH.set(len(self._waiters), module=self.module, kind=self.kind)
+
+
+class AdmissionController:
+    """Gates of every module, created on first use from one ``AdmissionSettings``."""
+
+    def __init__(self, options: AdmissionSettings) -> None:
+        self.options = options
+        self._gates: Dict[Tuple[str, str], Gate] = {}
+
+    @property
+    def timeout(self) -> Optional[float]:
+        return self.options.queue_timeout_ms / 1000 or None
+
+    def gate(self, module: str, kind: str) -> Optional[Gate]:
+        """Return the gate of ``module``/``kind``, or ``None`` if it is unlimited."""
+
+        gate = self._gates.get((module, kind))
+        if gate is None:
+            limit = getattr(self.options, f"{kind}_concurrency")
+            if not limit:
+                return None
+            gate = self._gates[(module, kind)] = Gate(
+                module, kind, limit=limit, queue=getattr(self.options, f"{kind}_queue")
+            )
+        return gate
+
+
+_controller: Optional[AdmissionController] = None
+
+
+def get_admission_controller() -> AdmissionController:
+    """Return the process-wide controller, rebuilt when the budgets change."""
+
+    global _controller
+    options = get_settings().admission
+    if _controller is None or _controller.options != options:
+        _controller = AdmissionController(options)
+    return _controller
+
+
+def classify(scope: Scope) -> Optional[Tuple[str, str]]:
+    """Map a request to ``(module, kind)``, or ``None`` if it is not gated.
+
+    Module routes are gated per configured slug (unknown slugs fall through
+    to the 404 of the router). Long-polls and event streams of the change
+    feed spend their time waiting, not querying, so they are not gated.
+    """
+
+    path: str = scope["path"]
+    if path == "/health" or path.startswith("/health/"):
+        return HEALTH_SCOPE, "health"
+    if not path.startswith(MODULES_PREFIX):
+        return None
+    slug, _, rest = path[len(MODULES_PREFIX) :].partition("/")
+    if not slug or slug not in get_settings().modules:
+        return None
+    if rest == "changes" and (
+        b"wait=" in scope.get("query_string", b"")
+        or any(
+            name == b"accept" and b"text/event-stream" in value
+            for name, value in scope.get("headers", ())
+        )
+    ):
+        return None
+    return slug, "read" if scope["method"] in READ_METHODS else "write"
+
+
+class AdmissionMiddleware:
+    """ASGI middleware applying ``AdmissionController`` before routing."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        target = classify(scope) if scope["type"] == "http" else None
+        if target is None:
+            await self.app(scope, receive, send)
+            return
+
+        controller = get_admission_controller()
+        gate = controller.gate(*target)
+        if gate is None:
+            await self.app(scope, receive, send)
+            return
+        try:
+            waited = await gate.acquire(controller.timeout)
+        except AdmissionRejected as exc:
+            ADMISSION_REJECTIONS.inc(module=gate.module, kind=gate.kind, reason=exc.reason)
+            await self._reject(gate, controller.options, scope, receive, send)
+            return
+        if waited:
+            ADMISSION_QUEUE_WAIT.observe(waited, module=gate.module, kind=gate.kind)
+            profiling.record_phase("queue", waited)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gate.release()
+
+    @staticmethod
+    async def _reject(
+        gate: Gate, options: AdmissionSettings, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        target = f" en el módulo '{gate.module}'" if gate.module else ""
+        response = JSONResponse(
+            {
+                "detail": f"Demasiadas peticiones de {_KIND_NAMES[gate.kind]}{target}; "
+                "reintenta más tarde."
+            },
+            status_code=503,
+            headers={"Retry-After": str(options.retry_after_seconds)},
+        )
+        await response(scope, receive, send)
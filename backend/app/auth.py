@@ -0,0 +1,33 @@
+"""Authentication of the operator endpoints (``/admin`` and ``/debug``)."""
+from __future__ import annotations
+
+import hmac
+from typing import Optional
+
+from fastapi import Header, HTTPException, status
+
+from .config import get_settings
+
+
+def require_admin(authorization: Optional[str] = Header(None)) -> None:
+    """Accept only ``Authorization: Bearer <AURVO_ADMIN_TOKEN>``.
+
+    Without a configured token the operator endpoints are disabled.
+    """
+
+    token = get_settings().debug.admin_token
+    if token is None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Los endpoints de administración y diagnóstico requieren configurar "
+            "AURVO_ADMIN_TOKEN.",
+        )
+    scheme, _, credentials = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(
+        credentials.strip().encode("utf-8"), token.encode("utf-8")
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token de administración no válido.",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
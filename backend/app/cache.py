@@ -0,0 +1,99 @@
+"""Size-bounded in-process caches."""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+# Invalidation generations are tracked per stripe of the key space, so a
+# discard only spoils concurrent loads of keys hashing to the same stripe.
+GENERATION_STRIPES = 256
+
+
+class LRUCache(Generic[V]):
+    """Thread-safe LRU cache bounded by the total size of its values.
+
+    ``sizeof`` measures each value (``len`` by default, which suits ``bytes``).
+    Values larger than the whole budget are never stored. With ``ttl_seconds``
+    entries also expire that long after being stored.
+
+    Read-through callers take ``generation(key)`` before loading a value and
+    pass it to ``put``; if ``discard`` ran for that key in the meantime the
+    loaded value may predate the write and is not stored.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        *,
+        sizeof: Callable[[V], int] = len,
+        ttl_seconds: Optional[float] = None,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.ttl_seconds = ttl_seconds or None
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries: "OrderedDict[Hashable, Tuple[V, int, Optional[float]]]" = OrderedDict()
+        self._generations = [0] * GENERATION_STRIPES
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[V]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] is not None and entry[2] <= time.monotonic():
+                del self._entries[key]
+                self.size -= entry[1]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def generation(self, key: Hashable) -> int:
+        """Return the invalidation generation to hand to ``put`` after a load."""
+
+        return self._generations[hash(key) % GENERATION_STRIPES]
+
+    def put(self, key: Hashable, value: V, *, generation: Optional[int] = None) -> None:
+        size = self.sizeof(value)
+        if size > self.max_bytes:
+            return
+        expires = None if self.ttl_seconds is None else time.monotonic() + self.ttl_seconds
+        with self._lock:
+            if generation is not None and generation != self.generation(key):
+                return
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous[1]
+            self._entries[key] = (value, size, expires)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, evicted, _) = self._entries.popitem(last=False)
+                self.size -= evicted
+                self.evictions += 1
+
+    def discard(self, key: Hashable) -> None:
+        with self._lock:
+            self._generations[hash(key) % GENERATION_STRIPES] += 1
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self.size -= entry[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generations = [generation + 1 for generation in self._generations]
+            self._entries.clear()
+            self.size = 0
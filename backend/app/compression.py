@@ -0,0 +1,311 @@
+"""Negotiated gzip/deflate compression of API responses (stdlib ``zlib``).
+
+Bodies of at least ``CompressionSettings.min_bytes`` are compressed at
+``CompressionSettings.level`` when ``Accept-Encoding`` allows gzip or deflate.
+Conditional JSON responses (module detail, listings, queries) are compressed
+by ``http_cache.conditional_json``, which keeps the encoded body in the
+response cache next to the identity one, so an unchanged module version is
+compressed once per coding. ``CompressionMiddleware`` covers the remaining
+responses (exports, inline values...) and compresses streams chunk by chunk.
+"""
+from __future__ import annotations
+
+import time
+import zlib
+from typing import FrozenSet, List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from . import metrics
+from .config import CompressionSettings, get_settings
+
+CODINGS = ("gzip", "deflate")
+# ``zlib`` window bits: 16 + MAX_WBITS writes a gzip wrapper, MAX_WBITS a zlib
+# one, which is what HTTP calls "deflate" (RFC 9110 §8.4.1.2).
+_WBITS = {"gzip": 16 + zlib.MAX_WBITS, "deflate": zlib.MAX_WBITS}
+_ETAG_SUFFIXES = {"gzip": "-gz", "deflate": "-zz"}
+_ALIASES = {"x-gzip": "gzip"}
+_COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/xml",
+    "application/javascript",
+    "text/",
+)
+_SKIPPED_TYPES = ("text/event-stream",)
+
+COMPRESSION_BYTES = metrics.REGISTRY.register(
+    metrics.Counter(
+        "aurvo_compression_bytes_total",
+        "Bytes antes (original) y después (compressed) de comprimir respuestas.",
+        ("coding", "stage"),
+    )
+)
+COMPRESSION_SECONDS = metrics.REGISTRY.register(
+    metrics.Counter(
+        "aurvo_compression_cpu_seconds_total",
+        "Tiempo de CPU dedicado a comprimir respuestas.",
+        ("coding",),
+    )
+)
+
+
+def _quality(params: str) -> float:
+    for param in params.split(";"):
+        name, _, value = param.strip().partition("=")
+        if name.strip().lower() == "q":
+            try:
+                return float(value)
+            except ValueError:
+                return 0.0
+    return 1.0
+
+
+def negotiate(
+    accept_encoding: Optional[str], options: Optional[CompressionSettings] = None
+) -> Optional[str]:
+    """Pick ``"gzip"`` or ``"deflate"`` from ``Accept-Encoding``, or ``None``.
+
+    The coding with the highest q-value wins, gzip on ties; ``*`` stands for
+    both. ``None`` also when compression is disabled (level 0).
+    """
+
+    options = options or get_settings().compression
+    if not accept_encoding or not options.level:
+        return None
+    qualities = {}
+    wildcard = None
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        coding = _ALIASES.get(coding, coding)
+        if coding == "*":
+            wildcard = _quality(params)
+        elif coding in _WBITS:
+            qualities[coding] = max(qualities.get(coding, 0.0), _quality(params))
+    if wildcard is not None:
+        for coding in CODINGS:
+            qualities.setdefault(coding, wildcard)
+    best = max(CODINGS, key=lambda coding: qualities.get(coding, 0.0))
+    return best if qualities.get(best, 0.0) > 0 else None
+
+
+def encoded_etag(etag: str, coding: str) -> str:
+    """Return the ETag of the ``coding`` representation of ``etag``.
+
+    Encoded bodies are different byte sequences, so they get their own
+    strong validator (``"abc"`` becomes ``"abc-gz"``).
+    """
+
+    if not etag.endswith('"'):
+        return etag
+    return f'{etag[:-1]}{_ETAG_SUFFIXES[coding]}"'
+
+
+def split_coding(etag: str) -> Tuple[str, Optional[str]]:
+    """Return ``(identity_etag, coding)`` for an ETag made by ``encoded_etag``."""
+
+    for coding, suffix in _ETAG_SUFFIXES.items():
+        if etag.endswith(f'{suffix}"'):
+            return f'{etag[: -len(suffix) - 1]}"', coding
+    return etag, None
+
+
+def compressor(coding: str, level: int) -> "zlib._Compress":
+    return zlib.compressobj(level, zlib.DEFLATED, _WBITS[coding])
+
+
+def compress(body: bytes, coding: str, level: int) -> bytes:
+    """Compress a whole body, accounting the bytes and CPU time in the metrics."""
+
+    started = time.thread_time()
+    engine = compressor(coding, level)
+    encoded = engine.compress(body) + engine.flush()
+    _account(coding, len(body), len(encoded), time.thread_time() - started)
+    return encoded
+
+
+def _account(coding: str, original: int, compressed: int, seconds: float) -> None:
+    COMPRESSION_BYTES.inc(original, coding=coding, stage="original")
+    COMPRESSION_BYTES.inc(compressed, coding=coding, stage="compressed")
+    COMPRESSION_SECONDS.inc(seconds, coding=coding)
+
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    """Whether a media type is text-like and worth compressing."""
+
+    if not content_type:
+        return False
+    media_type = content_type.partition(";")[0].strip().lower()
+    if media_type.startswith(_SKIPPED_TYPES):
+        return False
+    return media_type.startswith(_COMPRESSIBLE_TYPES) or media_type.endswith("+json")
+
+
+def add_vary(headers: MutableHeaders) -> None:
+    """Add ``Accept-Encoding`` to ``Vary`` unless it is already listed."""
+
+    vary = headers.get("vary")
+    if vary is None:
+        headers["Vary"] = "Accept-Encoding"
+    elif "accept-encoding" not in vary.lower() and vary.strip() != "*":
+        headers["Vary"] = f"{vary}, Accept-Encoding"
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing eligible responses for the negotiated coding.
+
+    Responses that are already encoded, partial (``Content-Range``), range
+    capable (``Accept-Ranges``: their offsets address identity bytes), event
+    streams, non-text media types and bodies below ``min_bytes`` are sent
+    untouched. Streamed bodies are compressed as they go and flushed after
+    every chunk, so clients still see each chunk promptly.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        options = get_settings().compression
+        coding = negotiate(Headers(scope=scope).get("accept-encoding"), options)
+        if coding is None:
+            await self.app(scope, receive, send)
+            return
+        validators = _accept_identity_validators(scope)
+        responder = _CompressingResponder(send, coding, options, validators)
+        await self.app(scope, receive, responder.send)
+
+
+def _accept_identity_validators(scope: Scope) -> FrozenSet[str]:
+    """Let the app match ``If-None-Match`` validators of encoded representations.
+
+    A client revalidating a compressed body sends its ``"...-gz"`` ETag, which
+    the route does not know; the identity ETag is appended so the route can
+    still answer 304. Returns the encoded ETags sent.
+
+    The scope is updated in place rather than copied: the router writes the
+    matched ``route`` into it, and ``MetricsMiddleware`` reads it from the
+    same dict to label the request.
+    """
+
+    if_none_match = Headers(scope=scope).get("if-none-match")
+    if not if_none_match:
+        return frozenset()
+    encoded = set()
+    identities = []
+    for candidate in if_none_match.split(","):
+        etag, coding = split_coding(candidate.strip().removeprefix("W/"))
+        if coding is not None:
+            encoded.add(candidate.strip().removeprefix("W/"))
+            identities.append(etag)
+    if not identities:
+        return frozenset()
+    headers = [(name, value) for name, value in scope["headers"] if name != b"if-none-match"]
+    headers.append(
+        (b"if-none-match", ", ".join([if_none_match, *identities]).encode("latin-1"))
+    )
+    scope["headers"] = headers
+    return frozenset(encoded)
+
+
+class _CompressingResponder:
+    def __init__(
+        self,
+        send: Send,
+        coding: str,
+        options: CompressionSettings,
+        validators: FrozenSet[str] = frozenset(),
+    ) -> None:
+        self._send = send
+        self.coding = coding
+        self.options = options
+        self._validators = validators
+        self._start: Optional[Message] = None
+        self._compress: Optional[bool] = None
+        self._engine: Optional["zlib._Compress"] = None
+        self._totals: List[float] = [0, 0, 0.0]
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self._start = message
+            if message["status"] == 304 and self._validators:
+                message = self._not_modified(message)
+            if not self._eligible(message):
+                self._compress = False
+                await self._send(message)
+            return
+        if message["type"] != "http.response.body" or self._compress is False:
+            await self._send(message)
+            return
+
+        body: bytes = message.get("body", b"")
+        more_body: bool = message.get("more_body", False)
+        if self._compress is None:
+            if not more_body and len(body) < self.options.min_bytes:
+                self._compress = False
+                await self._send(self._start)
+                await self._send(message)
+                return
+            self._compress = True
+            self._engine = compressor(self.coding, self.options.level)
+            encoded = self._encode(body, more_body)
+            await self._send(self._encoded_start(None if more_body else len(encoded)))
+        else:
+            encoded = self._encode(body, more_body)
+        await self._send({"type": "http.response.body", "body": encoded, "more_body": more_body})
+        if not more_body:
+            original, compressed, seconds = self._totals
+            _account(self.coding, int(original), int(compressed), seconds)
+
+    def _eligible(self, message: Message) -> bool:
+        status = message["status"]
+        if status < 200 or status in (204, 206, 304):
+            return False
+        headers = Headers(raw=message["headers"])
+        if "content-encoding" in headers or "content-range" in headers:
+            return False
+        if headers.get("accept-ranges", "none").lower() != "none":
+            return False
+        length = headers.get("content-length")
+        if length is not None and length.isdigit() and int(length) < self.options.min_bytes:
+            return False
+        return is_compressible(headers.get("content-type"))
+
+    def _not_modified(self, message: Message) -> Message:
+        # The match may have been on the encoded validator the client holds.
+        headers = MutableHeaders(raw=list(message["headers"]))
+        etag = headers.get("etag")
+        if etag is None:
+            return message
+        for coding in CODINGS:
+            if encoded_etag(etag, coding) in self._validators:
+                headers["ETag"] = encoded_etag(etag, coding)
+                add_vary(headers)
+                return {**message, "headers": headers.raw}
+        return message
+
+    def _encode(self, body: bytes, more_body: bool) -> bytes:
+        started = time.thread_time()
+        encoded = self._engine.compress(body)
+        encoded += self._engine.flush(zlib.Z_SYNC_FLUSH if more_body else zlib.Z_FINISH)
+        self._totals[0] += len(body)
+        self._totals[1] += len(encoded)
+        self._totals[2] += time.thread_time() - started
+        return encoded
+
+    def _encoded_start(self, length: Optional[int]) -> Message:
+        headers = MutableHeaders(raw=list(self._start["headers"]))
+        del headers["content-length"]
+        if length is not None:
+            headers["Content-Length"] = str(length)
+        headers["Content-Encoding"] = self.coding
+        add_vary(headers)
+        etag = headers.get("etag")
+        if etag is not None:
+            headers["ETag"] = encoded_etag(etag, self.coding)
+        return {**self._start, "headers": headers.raw}
+
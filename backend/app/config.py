@@ -2,18 +2,24 @@
 from __future__ import annotations
 
 import json
+import logging
 import os
+import re
+import threading
 from collections.abc import Iterable, Mapping
-from dataclasses import dataclass
-from functools import lru_cache
+from bisect import bisect_right
+from dataclasses import dataclass, field, replace
+from functools import cached_property, lru_cache
 from pathlib import Path
-from typing import Dict, List
+from typing import Callable, Dict, List, Optional, Tuple
 
 try:  # Python 3.11
     import tomllib
 except ModuleNotFoundError:  # pragma: no cover - fallback for <3.11
     tomllib = None  # type: ignore[assignment]
 
+logger = logging.getLogger(__name__)
+
 
 @dataclass(frozen=True)
 class ModuleDefinition:
@@ -22,6 +28,99 @@ class ModuleDefinition:
     slug: str
     title: str
     description: str
+    shards: int = 1
+    indexes: Tuple[str, ...] = ()
+    retention_seconds: Optional[int] = None
+
+
+# Upper bound for ``ModuleDefinition.shards``; every shard is one SQLite file.
+MAX_SHARDS = 64
+# Indexed JSON fields are dotted paths of plain identifiers ("estado",
+# "metricas.latencia_ms"), so they map safely onto column names and JSON paths.
+_INDEX_SEGMENT = r"[A-Za-z][A-Za-z0-9]*(?:_[A-Za-z0-9]+)*"
+INDEX_FIELD_PATTERN = re.compile(rf"{_INDEX_SEGMENT}(?:\.{_INDEX_SEGMENT})*")
+MAX_INDEXES = 16
+
+
+@dataclass(frozen=True)
+class DatabaseSettings:
+    """Connection pool and PRAGMA tuning shared by every module database."""
+
+    pool_size: int = 4
+    journal_mode: str = "WAL"
+    synchronous: str = "NORMAL"
+    busy_timeout_ms: int = 5000
+    cache_size: int = -16384
+    mmap_size: int = 134217728
+    workers_per_module: int = 4
+    max_workers: int = 32
+    bulk_batch_size: int = 1000
+    write_batch_window_ms: float = 0.0
+    write_batch_max: int = 256
+    changes_retention: int = 10000
+    backup_step_pages: int = 1024
+    max_open_databases: int = 256
+
+
+@dataclass(frozen=True)
+class CacheSettings:
+    """Sizes of the in-process caches."""
+
+    response_bytes: int = 32 * 1024 * 1024
+    insight_bytes: int = 16 * 1024 * 1024
+    insight_ttl_seconds: float = 0.0
+
+
+@dataclass(frozen=True)
+class BlobSettings:
+    """Offloading of large insight values to compressed, content-addressed files."""
+
+    threshold_bytes: int = 64 * 1024
+    compression_level: int = 6
+
+
+@dataclass(frozen=True)
+class CompressionSettings:
+    """Negotiated gzip/deflate compression of responses; ``level`` 0 disables it."""
+
+    min_bytes: int = 1024
+    level: int = 3
+
+
+@dataclass(frozen=True)
+class RetentionSettings:
+    """Background deletion of expired insights and reclaiming of their space."""
+
+    sweep_interval_seconds: float = 60.0
+    sweep_batch_size: int = 500
+    vacuum_step_pages: int = 1024
+
+
+@dataclass(frozen=True)
+class AdmissionSettings:
+    """Concurrency budgets per module (reads, writes) and for ``/health``.
+
+    A ``*_concurrency`` of 0 disables the limit. Requests beyond it wait in a
+    queue of at most ``*_queue`` entries for up to ``queue_timeout_ms``.
+    """
+
+    read_concurrency: int = 32
+    read_queue: int = 128
+    write_concurrency: int = 32
+    write_queue: int = 128
+    health_concurrency: int = 4
+    health_queue: int = 16
+    queue_timeout_ms: float = 2000.0
+    retry_after_seconds: int = 1
+
+
+@dataclass(frozen=True)
+class DebugSettings:
+    """Diagnostics endpoints and the slow-request log."""
+
+    admin_token: Optional[str] = None
+    slow_request_ms: float = 500.0
+    slow_request_log_size: int = 100
 
 
 @dataclass(frozen=True)
@@ -30,6 +129,33 @@ class Settings:
 
     data_dir: Path
     modules: Dict[str, ModuleDefinition]
+    database: DatabaseSettings = field(default_factory=DatabaseSettings)
+    modules_reload_interval: float = 2.0
+    cache: CacheSettings = field(default_factory=CacheSettings)
+    snapshot_dir: Optional[Path] = None
+    blobs: BlobSettings = field(default_factory=BlobSettings)
+    debug: DebugSettings = field(default_factory=DebugSettings)
+    admission: AdmissionSettings = field(default_factory=AdmissionSettings)
+    retention: RetentionSettings = field(default_factory=RetentionSettings)
+    compression: CompressionSettings = field(default_factory=CompressionSettings)
+
+    @cached_property
+    def module_slugs(self) -> Tuple[str, ...]:
+        """Configured slugs in sorted order, for paging through the modules."""
+
+        return tuple(sorted(self.modules))
+
+    @property
+    def blobs_path(self) -> Path:
+        """Directory of the content-addressed value store."""
+
+        return self.data_dir / "blobs"
+
+    @property
+    def snapshots_path(self) -> Path:
+        """Directory holding online snapshots (``<data_dir>/snapshots`` by default)."""
+
+        return self.snapshot_dir or self.data_dir / "snapshots"
 
 
 DEFAULT_MODULES: Dict[str, ModuleDefinition] = {
@@ -76,10 +202,18 @@ DEFAULT_MODULES: Dict[str, ModuleDefinition] = {
 }
 
 
-class ModuleConfigurationError(RuntimeError):
+class ConfigurationError(RuntimeError):
+    """Raised when an environment override cannot be parsed."""
+
+
+class ModuleConfigurationError(ConfigurationError):
     """Raised when the module configuration payload is invalid."""
 
 
+JOURNAL_MODES = frozenset({"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"})
+SYNCHRONOUS_MODES = frozenset({"OFF", "NORMAL", "FULL", "EXTRA"})
+
+
 def _normalise_module_payload(payload: object) -> Iterable[Mapping[str, object]]:
     """Coerce raw payloads (list/dict) into an iterable of mappings."""
 
@@ -112,12 +246,15 @@ def _normalise_module_payload(payload: object) -> Iterable[Mapping[str, object]]
     return modules
 
 
+def _resolve_path(path: Path) -> Path:
+    resolved = path.expanduser()
+    return resolved if resolved.is_absolute() else Path.cwd() / resolved
+
+
 def _load_modules_from_file(path: Path) -> Iterable[Mapping[str, object]]:
     """Load module definitions from a JSON or TOML document."""
 
-    resolved = path.expanduser()
-    if not resolved.is_absolute():
-        resolved = Path.cwd() / resolved
+    resolved = _resolve_path(path)
 
     if not resolved.exists():
         raise ModuleConfigurationError(
@@ -148,6 +285,32 @@ def _load_modules_from_file(path: Path) -> Iterable[Mapping[str, object]]:
     return _normalise_module_payload(payload)
 
 
+def _parse_indexes(slug: str, raw: object) -> Tuple[str, ...]:
+    """Validate the JSON fields a module indexes (``indexes = ["estado", ...]``)."""
+
+    if isinstance(raw, (str, bytes)) or not isinstance(raw, Iterable):
+        raise ModuleConfigurationError(
+            f"'indexes' del módulo '{slug}' debe ser una lista de campos JSON."
+        )
+    fields = tuple(dict.fromkeys(str(field).strip() for field in raw))
+    invalid = [field for field in fields if not INDEX_FIELD_PATTERN.fullmatch(field)]
+    if invalid:
+        raise ModuleConfigurationError(
+            f"Campos JSON inválidos en 'indexes' del módulo '{slug}': {', '.join(invalid)}. "
+            "Usa rutas con puntos como 'estado' o 'metricas.latencia_ms'."
+        )
+    if len({field.lower() for field in fields}) < len(fields):
+        # SQLite column names are case-insensitive.
+        raise ModuleConfigurationError(
+            f"'indexes' del módulo '{slug}' repite campos que solo difieren en mayúsculas."
+        )
+    if len(fields) > MAX_INDEXES:
+        raise ModuleConfigurationError(
+            f"El módulo '{slug}' declara más de {MAX_INDEXES} campos en 'indexes'."
+        )
+    return fields
+
+
 def _build_module_map(payload: Iterable[Mapping[str, object]]) -> Dict[str, ModuleDefinition]:
     """Transform a raw payload into module definitions keyed by slug."""
 
@@ -172,7 +335,30 @@ def _build_module_map(payload: Iterable[Mapping[str, object]]) -> Dict[str, Modu
                 f"El slug '{slug}' está duplicado en la configuración de módulos."
             )
 
-        modules[slug] = ModuleDefinition(slug=slug, title=title, description=description)
+        shards = raw.get("shards", 1)
+        if not isinstance(shards, int) or isinstance(shards, bool) or not (
+            1 <= shards <= MAX_SHARDS
+        ):
+            raise ModuleConfigurationError(
+                f"El módulo '{slug}' debe tener un 'shards' entero entre 1 y {MAX_SHARDS}."
+            )
+
+        retention = raw.get("retention_seconds")
+        if retention is not None and (
+            not isinstance(retention, int) or isinstance(retention, bool) or retention < 1
+        ):
+            raise ModuleConfigurationError(
+                f"'retention_seconds' del módulo '{slug}' debe ser un entero positivo."
+            )
+
+        modules[slug] = ModuleDefinition(
+            slug=slug,
+            title=title,
+            description=description,
+            shards=shards,
+            indexes=_parse_indexes(slug, raw.get("indexes", ())),
+            retention_seconds=retention,
+        )
 
     if not modules:
         raise ModuleConfigurationError(
@@ -203,20 +389,383 @@ def _load_module_definitions() -> Dict[str, ModuleDefinition]:
     return DEFAULT_MODULES
 
 
+def _read_int_env(name: str, default: int, *, minimum: int | None = None) -> int:
+    """Parse an integer environment variable, falling back to ``default``."""
+
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return default
+    try:
+        value = int(raw)
+    except ValueError as exc:
+        raise ConfigurationError(f"La variable {name} debe ser un número entero.") from exc
+    if minimum is not None and value < minimum:
+        raise ConfigurationError(f"La variable {name} debe ser mayor o igual a {minimum}.")
+    return value
+
+
+def _read_float_env(name: str, default: float, *, minimum: float | None = None) -> float:
+    """Parse a numeric environment variable, falling back to ``default``."""
+
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return default
+    try:
+        value = float(raw)
+    except ValueError as exc:
+        raise ConfigurationError(f"La variable {name} debe ser numérica.") from exc
+    if minimum is not None and value < minimum:
+        raise ConfigurationError(f"La variable {name} debe ser mayor o igual a {minimum}.")
+    return value
+
+
+def _read_choice_env(name: str, default: str, choices: frozenset[str]) -> str:
+    """Parse an enumerated environment variable (case insensitive)."""
+
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return default
+    value = raw.strip().upper()
+    if value not in choices:
+        allowed = ", ".join(sorted(choices))
+        raise ConfigurationError(f"La variable {name} debe ser uno de: {allowed}.")
+    return value
+
+
+def _load_database_settings() -> DatabaseSettings:
+    """Load connection pool and PRAGMA overrides from the environment."""
+
+    defaults = DatabaseSettings()
+    return DatabaseSettings(
+        pool_size=_read_int_env("AURVO_DB_POOL_SIZE", defaults.pool_size, minimum=1),
+        journal_mode=_read_choice_env(
+            "AURVO_DB_JOURNAL_MODE", defaults.journal_mode, JOURNAL_MODES
+        ),
+        synchronous=_read_choice_env(
+            "AURVO_DB_SYNCHRONOUS", defaults.synchronous, SYNCHRONOUS_MODES
+        ),
+        busy_timeout_ms=_read_int_env(
+            "AURVO_DB_BUSY_TIMEOUT_MS", defaults.busy_timeout_ms, minimum=0
+        ),
+        cache_size=_read_int_env("AURVO_DB_CACHE_SIZE", defaults.cache_size),
+        mmap_size=_read_int_env("AURVO_DB_MMAP_SIZE", defaults.mmap_size, minimum=0),
+        workers_per_module=_read_int_env(
+            "AURVO_DB_WORKERS_PER_MODULE", defaults.workers_per_module, minimum=1
+        ),
+        max_workers=_read_int_env("AURVO_DB_MAX_WORKERS", defaults.max_workers, minimum=1),
+        bulk_batch_size=_read_int_env(
+            "AURVO_BULK_BATCH_SIZE", defaults.bulk_batch_size, minimum=1
+        ),
+        write_batch_window_ms=_read_float_env(
+            "AURVO_WRITE_BATCH_WINDOW_MS", defaults.write_batch_window_ms, minimum=0
+        ),
+        write_batch_max=_read_int_env(
+            "AURVO_WRITE_BATCH_MAX", defaults.write_batch_max, minimum=1
+        ),
+        changes_retention=_read_int_env(
+            "AURVO_CHANGES_RETENTION", defaults.changes_retention, minimum=1
+        ),
+        backup_step_pages=_read_int_env(
+            "AURVO_BACKUP_STEP_PAGES", defaults.backup_step_pages, minimum=1
+        ),
+        max_open_databases=_read_int_env(
+            "AURVO_DB_MAX_OPEN", defaults.max_open_databases, minimum=0
+        ),
+    )
+
+
+def _load_cache_settings() -> CacheSettings:
+    """Load in-process cache limits from the environment."""
+
+    defaults = CacheSettings()
+    return CacheSettings(
+        response_bytes=_read_int_env(
+            "AURVO_RESPONSE_CACHE_BYTES", defaults.response_bytes, minimum=0
+        ),
+        insight_bytes=_read_int_env(
+            "AURVO_INSIGHT_CACHE_BYTES", defaults.insight_bytes, minimum=0
+        ),
+        insight_ttl_seconds=_read_float_env(
+            "AURVO_INSIGHT_CACHE_TTL_SECONDS", defaults.insight_ttl_seconds, minimum=0
+        ),
+    )
+
+
+def _load_blob_settings() -> BlobSettings:
+    """Load value offloading limits from the environment."""
+
+    defaults = BlobSettings()
+    level = _read_int_env(
+        "AURVO_BLOB_COMPRESSION_LEVEL", defaults.compression_level, minimum=1
+    )
+    if level > 9:
+        raise ConfigurationError("La variable AURVO_BLOB_COMPRESSION_LEVEL debe estar entre 1 y 9.")
+    return BlobSettings(
+        threshold_bytes=_read_int_env(
+            "AURVO_BLOB_THRESHOLD_BYTES", defaults.threshold_bytes, minimum=0
+        ),
+        compression_level=level,
+    )
+
+
+def _load_compression_settings() -> CompressionSettings:
+    """Load the response compression threshold and level from the environment."""
+
+    defaults = CompressionSettings()
+    level = _read_int_env("AURVO_COMPRESSION_LEVEL", defaults.level, minimum=0)
+    if level > 9:
+        raise ConfigurationError("La variable AURVO_COMPRESSION_LEVEL debe estar entre 0 y 9.")
+    return CompressionSettings(
+        min_bytes=_read_int_env("AURVO_COMPRESSION_MIN_BYTES", defaults.min_bytes, minimum=0),
+        level=level,
+    )
+
+
+def _load_retention_settings() -> RetentionSettings:
+    """Load the expiry sweeper and incremental vacuum settings from the environment."""
+
+    defaults = RetentionSettings()
+    return RetentionSettings(
+        sweep_interval_seconds=_read_float_env(
+            "AURVO_EXPIRY_SWEEP_INTERVAL_SECONDS", defaults.sweep_interval_seconds, minimum=0
+        ),
+        sweep_batch_size=_read_int_env(
+            "AURVO_EXPIRY_SWEEP_BATCH", defaults.sweep_batch_size, minimum=1
+        ),
+        vacuum_step_pages=_read_int_env(
+            "AURVO_VACUUM_STEP_PAGES", defaults.vacuum_step_pages, minimum=0
+        ),
+    )
+
+
+def _load_admission_settings() -> AdmissionSettings:
+    """Load the per-module admission budgets from the environment."""
+
+    defaults = AdmissionSettings()
+    return AdmissionSettings(
+        read_concurrency=_read_int_env(
+            "AURVO_ADMISSION_READ_CONCURRENCY", defaults.read_concurrency, minimum=0
+        ),
+        read_queue=_read_int_env("AURVO_ADMISSION_READ_QUEUE", defaults.read_queue, minimum=0),
+        write_concurrency=_read_int_env(
+            "AURVO_ADMISSION_WRITE_CONCURRENCY", defaults.write_concurrency, minimum=0
+        ),
+        write_queue=_read_int_env(
+            "AURVO_ADMISSION_WRITE_QUEUE", defaults.write_queue, minimum=0
+        ),
+        health_concurrency=_read_int_env(
+            "AURVO_ADMISSION_HEALTH_CONCURRENCY", defaults.health_concurrency, minimum=0
+        ),
+        health_queue=_read_int_env(
+            "AURVO_ADMISSION_HEALTH_QUEUE", defaults.health_queue, minimum=0
+        ),
+        queue_timeout_ms=_read_float_env(
+            "AURVO_ADMISSION_QUEUE_TIMEOUT_MS", defaults.queue_timeout_ms, minimum=0
+        ),
+        retry_after_seconds=_read_int_env(
+            "AURVO_ADMISSION_RETRY_AFTER_SECONDS", defaults.retry_after_seconds, minimum=0
+        ),
+    )
+
+
+def _load_debug_settings() -> DebugSettings:
+    """Load the admin token and slow-request thresholds from the environment."""
+
+    defaults = DebugSettings()
+    token = os.getenv("AURVO_ADMIN_TOKEN", "").strip()
+    return DebugSettings(
+        admin_token=token or None,
+        slow_request_ms=_read_float_env(
+            "AURVO_SLOW_REQUEST_MS", defaults.slow_request_ms, minimum=0
+        ),
+        slow_request_log_size=_read_int_env(
+            "AURVO_SLOW_REQUEST_LOG_SIZE", defaults.slow_request_log_size, minimum=1
+        ),
+    )
+
+
+@dataclass(frozen=True)
+class ModuleChanges:
+    """Difference between two module maps produced by a registry reload."""
+
+    added: Tuple[ModuleDefinition, ...] = ()
+    removed: Tuple[ModuleDefinition, ...] = ()
+    changed: Tuple[ModuleDefinition, ...] = ()
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+
+def diff_modules(
+    current: Mapping[str, ModuleDefinition], updated: Mapping[str, ModuleDefinition]
+) -> ModuleChanges:
+    """Compare two module maps keyed by slug."""
+
+    return ModuleChanges(
+        added=tuple(module for slug, module in updated.items() if slug not in current),
+        removed=tuple(module for slug, module in current.items() if slug not in updated),
+        changed=tuple(
+            module
+            for slug, module in updated.items()
+            if slug in current and current[slug] != module
+        ),
+    )
+
+
+ModuleChangeListener = Callable[[ModuleChanges], None]
+_module_change_listeners: List[ModuleChangeListener] = []
+
+
+def subscribe_module_changes(listener: ModuleChangeListener) -> None:
+    """Register a callback invoked after every module registry reload."""
+
+    if listener not in _module_change_listeners:
+        _module_change_listeners.append(listener)
+
+
+def _file_signature(path: Path) -> Optional[Tuple[int, int, int]]:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+class ModuleRegistry:
+    """Holds the current ``Settings`` snapshot and reloads the modules file.
+
+    Snapshots are immutable and replaced with a single attribute assignment,
+    so readers on the request path never take a lock. Reloads are triggered
+    by ``refresh`` (or the polling watcher) when the file's inode, mtime or
+    size changes; an invalid file is logged and the previous snapshot kept,
+    and so is one that changes a module's shard count.
+    """
+
+    def __init__(self, settings: Settings, source: Optional[Path] = None) -> None:
+        self._settings = settings
+        self.source = source
+        self._signature = _file_signature(source) if source is not None else None
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+
+    @property
+    def settings(self) -> Settings:
+        return self._settings
+
+    def refresh(self) -> ModuleChanges:
+        """Reload the modules file if it changed and notify the listeners."""
+
+        if self.source is None:
+            return ModuleChanges()
+
+        with self._reload_lock:
+            signature = _file_signature(self.source)
+            if signature is None or signature == self._signature:
+                return ModuleChanges()
+            self._signature = signature
+            try:
+                modules = _build_module_map(_load_modules_from_file(self.source))
+            except ModuleConfigurationError as exc:
+                logger.warning("Se conserva la configuración de módulos anterior: %s", exc)
+                return ModuleChanges()
+            resharded = [
+                module.slug
+                for module in modules.values()
+                if module.slug in self._settings.modules
+                and self._settings.modules[module.slug].shards != module.shards
+            ]
+            if resharded:
+                # Keys would be routed to other files; resharding is an
+                # offline operation (``backend/scripts/reshard.py``).
+                logger.warning(
+                    "Se conserva la configuración de módulos anterior: cambiar 'shards' "
+                    "requiere detener la API y ejecutar reshard (%s).",
+                    ", ".join(resharded),
+                )
+                return ModuleChanges()
+            changes = diff_modules(self._settings.modules, modules)
+            if changes:
+                self._settings = replace(self._settings, modules=modules)
+
+        if changes:
+            for listener in list(_module_change_listeners):
+                try:
+                    listener(changes)
+                except Exception:  # noqa: BLE001 - one listener must not break the others
+                    logger.exception("Error al aplicar los cambios de módulos.")
+        return changes
+
+    def start_watching(self, interval: float) -> None:
+        """Poll the modules file every ``interval`` seconds in a daemon thread."""
+
+        if self.source is None or interval <= 0 or self._watcher is not None:
+            return
+        self._stop.clear()
+
+        def watch() -> None:
+            while not self._stop.wait(interval):
+                self.refresh()
+
+        self._watcher = threading.Thread(target=watch, name="aurvo-modules-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        """Stop the polling thread, if running."""
+
+        self._stop.set()
+        watcher, self._watcher = self._watcher, None
+        if watcher is not None:
+            watcher.join()
+
+
 @lru_cache()
-def get_settings() -> Settings:
-    """Build a cached ``Settings`` instance."""
+def get_registry() -> ModuleRegistry:
+    """Build the process-wide ``ModuleRegistry`` from the environment."""
 
     base_dir = Path(os.getenv("AURVO_DATA_DIR", "data")).expanduser()
     data_dir = base_dir if base_dir.is_absolute() else Path.cwd() / base_dir
-    data_dir.mkdir(parents=True, exist_ok=True)
 
     try:
         modules = _load_module_definitions()
-    except ModuleConfigurationError as exc:
+        database = _load_database_settings()
+        cache = _load_cache_settings()
+        blobs = _load_blob_settings()
+        debug = _load_debug_settings()
+        admission = _load_admission_settings()
+        retention = _load_retention_settings()
+        compression = _load_compression_settings()
+        reload_interval = _read_float_env("AURVO_MODULES_RELOAD_INTERVAL", 2.0, minimum=0)
+    except ConfigurationError as exc:
         raise RuntimeError(str(exc)) from exc
 
-    return Settings(data_dir=data_dir, modules=modules)
+    snapshot_dir = os.getenv("AURVO_SNAPSHOT_DIR")
+
+    modules_file = os.getenv("AURVO_MODULES_FILE")
+    source = None
+    if modules_file and not os.getenv("AURVO_MODULES"):
+        source = _resolve_path(Path(modules_file))
+
+    settings = Settings(
+        data_dir=data_dir,
+        modules=modules,
+        database=database,
+        modules_reload_interval=reload_interval,
+        cache=cache,
+        snapshot_dir=_resolve_path(Path(snapshot_dir)) if snapshot_dir else None,
+        blobs=blobs,
+        debug=debug,
+        admission=admission,
+        retention=retention,
+        compression=compression,
+    )
+    return ModuleRegistry(settings, source=source)
+
+
+def get_settings() -> Settings:
+    """Return the current ``Settings`` snapshot."""
+
+    return get_registry().settings
 
 
 def list_modules() -> List[ModuleDefinition]:
@@ -226,6 +775,23 @@ def list_modules() -> List[ModuleDefinition]:
     return list(settings.modules.values())
 
 
+def list_modules_page(
+    limit: int, after: Optional[str] = None
+) -> Tuple[List[ModuleDefinition], Optional[str]]:
+    """Return up to ``limit`` modules in slug order after the slug ``after``.
+
+    The second item is the slug to pass as ``after`` for the next page, or
+    ``None`` on the last one. Only the in-memory configuration is read.
+    """
+
+    settings = get_settings()
+    slugs = settings.module_slugs
+    start = bisect_right(slugs, after) if after is not None else 0
+    page = slugs[start : start + limit]
+    next_after = page[-1] if start + limit < len(slugs) else None
+    return [settings.modules[slug] for slug in page], next_after
+
+
 def get_module(slug: str) -> ModuleDefinition:
     """Fetch a specific module configuration or raise a ``KeyError``."""
 
@@ -239,4 +805,6 @@ def get_module(slug: str) -> ModuleDefinition:
 def reset_settings_cache() -> None:
     """Clear the cached settings instance (primarily for testing)."""
 
-    get_settings.cache_clear()
+    if get_registry.cache_info().currsize:
+        get_registry().stop_watching()
+    get_registry.cache_clear()
@@ -0,0 +1,195 @@
+"""Group commit for concurrent upserts to the same module database."""
+from __future__ import annotations
+
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import Deque, Dict, List, Optional, Tuple
+
+from .. import metrics
+from ..config import get_settings
+from . import core, executor
+
+
+class _PendingWrite:
+    __slots__ = ("key", "value", "expires_at", "future")
+
+    def __init__(self, key: str, value: str, expires_at: core.Expiry) -> None:
+        self.key = key
+        self.value = value
+        self.expires_at = expires_at
+        self.future: Future = Future()
+
+
+class WriteBatcher:
+    """Coalesces concurrent upserts for one module shard into shared transactions.
+
+    The first write of a burst is committed by its caller (or by a flush task
+    in the module's executor lane for async callers); every write submitted
+    while that commit is
+    waiting for the batching window, or busy in SQLite, joins the next
+    transaction. A batch is written as soon as it
+    reaches ``max_batch`` rows or ``window_ms`` has elapsed, so SQLite pays
+    one commit (and one fsync) per batch instead of one per write.
+    """
+
+    def __init__(
+        self, module_slug: str, *, window_ms: float, max_batch: int, shard: int = 0
+    ) -> None:
+        self.module_slug = module_slug
+        self.shard = shard
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._pending: Deque[_PendingWrite] = deque()
+        self._condition = threading.Condition()
+        self._flush: Optional[Future] = None
+        self._leading = False
+
+    def submit(
+        self,
+        key: str,
+        value: str,
+        *,
+        expires_at: core.Expiry = core.KEEP_EXPIRY,
+        inline: bool = False,
+    ) -> Future:
+        """Queue an upsert; the future resolves to the stored insight row.
+
+        ``expires_at`` is already formatted by ``core.format_expiry``. With
+        ``inline=True`` a caller that finds no flush in progress commits its
+        own batch on the calling thread (it is then the batch leader) instead
+        of handing it to a flush task.
+        """
+
+        write = _PendingWrite(key, value, expires_at)
+        lead = False
+        with self._condition:
+            self._pending.append(write)
+            self._condition.notify()
+            if self._flush is None and not self._leading:
+                if inline:
+                    self._leading = lead = True
+                else:
+                    self._start_flush()
+        if lead:
+            self._write(self._next_batch())
+            with self._condition:
+                self._leading = False
+                if self._pending and self._flush is None:
+                    self._start_flush()
+                self._condition.notify_all()
+        return write.future
+
+    def drain(self) -> None:
+        """Wait until every queued write has been committed."""
+
+        with self._condition:
+            self._condition.wait_for(lambda: self._flush is None and not self._leading)
+
+    def _start_flush(self) -> None:
+        # Flushes run in the module's lane of the shared executor, so a burst
+        # spread over many modules uses the bounded pool rather than a thread
+        # per module. Lane calls never wait on a batcher future, so the flush
+        # cannot be stuck behind its own writers.
+        self._flush = executor.submit(self.module_slug, self._flush_batch)
+
+    def _next_batch(self) -> List[_PendingWrite]:
+        with self._condition:
+            if self.window and len(self._pending) < self.max_batch:
+                self._condition.wait_for(
+                    lambda: len(self._pending) >= self.max_batch, timeout=self.window
+                )
+            size = min(len(self._pending), self.max_batch)
+            return [self._pending.popleft() for _ in range(size)]
+
+    def _flush_batch(self) -> None:
+        """Commit one batch, then queue the next behind the lane's other calls."""
+
+        try:
+            batch = self._next_batch()
+            if batch:
+                self._write(batch)
+        finally:
+            with self._condition:
+                if self._pending:
+                    self._start_flush()
+                else:
+                    self._flush = None
+                    self._condition.notify_all()
+
+    def _write(self, batch: List[_PendingWrite]) -> None:
+        try:
+            # Large values go to the blob store before the writer is locked.
+            prepared = [
+                core.prepare_record(write.key, write.value, write.expires_at) for write in batch
+            ]
+            connection_manager = core.connect(self.module_slug, shard=self.shard)
+            with connection_manager as connection, metrics.track_query(
+                self.module_slug, "upsert_batch"
+            ) as query:
+                rows = []
+                for write, params in zip(batch, prepared):
+                    connection.execute(core.UPSERT_SQL, params)
+                    rows.append(
+                        connection.execute(core.SELECT_INSIGHT_SQL, (write.key,)).fetchone()
+                    )
+                connection.commit()
+                query.rows = len(rows)
+        except Exception as exc:  # noqa: BLE001 - forwarded to the callers
+            if len(batch) == 1:
+                batch[0].future.set_exception(exc)
+                return
+            # Retry one by one so a single failing row cannot fail its neighbours.
+            for write in batch:
+                self._write([write])
+            return
+
+        core.notify_keys_written(self.module_slug, [write.key for write in batch])
+        for write, row in zip(batch, rows):
+            write.future.set_result(core.insight_from_row(*row))
+
+
+_batchers: Dict[Tuple[str, int], WriteBatcher] = {}
+_batchers_lock = threading.Lock()
+
+
+def get_batcher(module_slug: str, shard: int = 0) -> WriteBatcher:
+    """Return (creating on first use) the write batcher for a module shard.
+
+    Each shard has its own writer connection, so batches for different
+    shards commit in parallel.
+    """
+
+    batcher = _batchers.get((module_slug, shard))
+    if batcher is None:
+        with _batchers_lock:
+            batcher = _batchers.get((module_slug, shard))
+            if batcher is None:
+                options = get_settings().database
+                batcher = WriteBatcher(
+                    module_slug,
+                    window_ms=options.write_batch_window_ms,
+                    max_batch=options.write_batch_max,
+                    shard=shard,
+                )
+                _batchers[(module_slug, shard)] = batcher
+    return batcher
+
+
+def drop_batcher(module_slug: str) -> None:
+    """Flush a module's pending writes and forget its batchers."""
+
+    with _batchers_lock:
+        batchers = [_batchers.pop(key) for key in list(_batchers) if key[0] == module_slug]
+    for batcher in batchers:
+        batcher.drain()
+
+
+def drain_batchers() -> None:
+    """Flush pending writes and forget every batcher (used on shutdown and in tests)."""
+
+    with _batchers_lock:
+        batchers = list(_batchers.values())
+        _batchers.clear()
+    for batcher in batchers:
+        batcher.drain()
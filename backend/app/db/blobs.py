@@ -0,0 +1,165 @@
+"""Content-addressed, gzip-compressed storage for large insight values.
+
+Values at or above ``BlobSettings.threshold_bytes`` (UTF-8) are written once
+to ``<data_dir>/blobs/<aa>/<sha256>.gz`` and the row keeps only their digest
+and size. Identical values share one file across every module, and files
+are immutable, so they can be memory-mapped and hard-linked safely.
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import mmap
+import os
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Tuple
+
+from ..config import get_settings
+
+BLOB_SUFFIX = ".gz"
+READ_CHUNK_SIZE = 64 * 1024
+
+BlobRef = Tuple[str, int]
+
+
+class BlobStore:
+    """Directory of immutable compressed values named by their SHA-256."""
+
+    def __init__(self, root: Path, *, threshold: int, level: int) -> None:
+        self.root = root
+        self.threshold = threshold
+        self.level = level
+
+    def path(self, digest: str) -> Path:
+        return self.root / digest[:2] / f"{digest}{BLOB_SUFFIX}"
+
+    def offload(self, value: str) -> Optional[BlobRef]:
+        """Store ``value`` if it is large enough and return ``(sha256, size)``.
+
+        Small values return ``None`` and stay inline. Most values are rejected
+        without encoding them, since UTF-8 needs at most 4 bytes per character.
+        """
+
+        if not self.threshold or len(value) * 4 < self.threshold:
+            return None
+        data = value.encode("utf-8")
+        if len(data) < self.threshold:
+            return None
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        try:
+            # Refresh the mtime so garbage collection's grace period also
+            # covers an existing file that is about to be referenced again.
+            os.utime(path)
+        except FileNotFoundError:
+            self._write(path, gzip.compress(data, compresslevel=self.level, mtime=0))
+        return digest, len(data)
+
+    def _write(self, path: Path, payload: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}")
+        with open(partial, "wb") as handle:
+            handle.write(payload)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(partial, path)
+
+    def read(self, digest: str) -> str:
+        """Return the full value stored under ``digest``."""
+
+        return gzip.decompress(self.path(digest).read_bytes()).decode("utf-8")
+
+    @contextmanager
+    def mapped(self, digest: str) -> Iterator[mmap.mmap]:
+        """Memory-map the compressed (gzip) file of ``digest`` read-only."""
+
+        with open(self.path(digest), "rb") as handle:
+            mapping = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield mapping
+        finally:
+            mapping.close()
+
+    def compressed_size(self, digest: str) -> int:
+        return self.path(digest).stat().st_size
+
+    def iter_compressed_range(self, digest: str, start: int, stop: int) -> Iterator[bytes]:
+        """Yield bytes ``[start, stop)`` of the gzip file straight from a memory map."""
+
+        with self.mapped(digest) as mapping:
+            for offset in range(start, stop, READ_CHUNK_SIZE):
+                yield mapping[offset : min(offset + READ_CHUNK_SIZE, stop)]
+
+    def iter_range(self, digest: str, start: int, stop: int) -> Iterator[bytes]:
+        """Yield bytes ``[start, stop)`` of the decompressed value.
+
+        The gzip stream is inflated incrementally from a memory map and bytes
+        before ``start`` are discarded, so memory stays bounded.
+        """
+
+        position = 0
+        for chunk in self._inflate(digest):
+            end = position + len(chunk)
+            if end > start:
+                yield chunk[max(0, start - position) : stop - position]
+            position = end
+            if position >= stop:
+                return
+
+    def _inflate(self, digest: str) -> Iterator[bytes]:
+        inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        with self.mapped(digest) as mapping:
+            for offset in range(0, len(mapping), READ_CHUNK_SIZE):
+                yield inflater.decompress(mapping[offset : offset + READ_CHUNK_SIZE])
+        yield inflater.flush()
+
+    def digests(self) -> Iterator[str]:
+        for path in self.root.glob(f"??/*{BLOB_SUFFIX}"):
+            yield path.name[: -len(BLOB_SUFFIX)]
+
+    def collect_garbage(self, referenced: Iterable[str], *, grace_seconds: float) -> int:
+        """Delete files no row references and that are older than ``grace_seconds``.
+
+        The grace period protects blobs written by transactions that have not
+        committed yet. Returns the number of files removed.
+        """
+
+        keep = set(referenced)
+        cutoff = time.time() - grace_seconds
+        removed = 0
+        for digest in list(self.digests()):
+            path = self.path(digest)
+            if digest not in keep and path.stat().st_mtime < cutoff:
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+
+_store: Optional[BlobStore] = None
+_store_lock = threading.Lock()
+
+
+def get_blob_store() -> BlobStore:
+    """Return the process-wide ``BlobStore`` for the current settings."""
+
+    global _store
+    settings = get_settings()
+    options = settings.blobs
+    store = _store
+    if (
+        store is None
+        or store.root != settings.blobs_path
+        or store.threshold != options.threshold_bytes
+        or store.level != options.compression_level
+    ):
+        with _store_lock:
+            store = _store = BlobStore(
+                settings.blobs_path,
+                threshold=options.threshold_bytes,
+                level=options.compression_level,
+            )
+    return store
@@ -0,0 +1,108 @@
+"""Commit counters shared by every worker process through memory-mapped files.
+
+Each module database ``<name>.db`` has a companion ``<name>.db-version``
+holding one 8-byte counter. The writer of any process takes an exclusive
+``flock`` on that file for the whole write (so writers of several processes
+queue in the kernel instead of polling SQLite's busy handler) and bumps the
+counter after committing. Other processes notice foreign writes with a
+plain memory read and only then go back to SQLite.
+"""
+from __future__ import annotations
+
+import fcntl
+import mmap
+import os
+import struct
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator
+
+VERSION_SUFFIX = "-version"
+_COUNTER = struct.Struct("<Q")
+
+
+def version_path(database_path: Path) -> Path:
+    """Return the counter file that accompanies ``database_path``."""
+
+    return database_path.with_name(database_path.name + VERSION_SUFFIX)
+
+
+class VersionCounter:
+    """Monotonic commit counter of one database, shared between processes.
+
+    Only the mapping is kept open, so idle counters cost no file descriptor.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size < _COUNTER.size:
+                os.ftruncate(fd, _COUNTER.size)
+            self._map = mmap.mmap(fd, _COUNTER.size)
+        finally:
+            os.close(fd)
+
+    def read(self) -> int:
+        return _COUNTER.unpack_from(self._map)[0]
+
+    def bump(self) -> int:
+        """Advance the counter and return its previous value; hold ``write_lock`` around it."""
+
+        previous = self.read()
+        _COUNTER.pack_into(self._map, 0, previous + 1)
+        return previous
+
+    def close(self) -> None:
+        self._map.close()
+
+
+def open_write_lock(database_path: Path) -> int:
+    """Open the descriptor ``write_lock`` uses; each connection pool keeps its own.
+
+    ``flock`` locks belong to the open file, so separate descriptors exclude
+    each other even within one process and closing one never drops another's.
+    """
+
+    path = version_path(database_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+
+
+@contextmanager
+def write_lock(fd: int) -> Iterator[None]:
+    """Hold the cross-process write lock of the database behind ``fd``."""
+
+    fcntl.flock(fd, fcntl.LOCK_EX)
+    try:
+        yield
+    finally:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+_counters: Dict[Path, VersionCounter] = {}
+_counters_lock = threading.Lock()
+
+
+def get_counter(database_path: Path) -> VersionCounter:
+    """Return (mapping on first use) the counter of ``database_path``."""
+
+    counter = _counters.get(database_path)
+    if counter is None:
+        with _counters_lock:
+            counter = _counters.get(database_path)
+            if counter is None:
+                counter = _counters[database_path] = VersionCounter(version_path(database_path))
+    return counter
+
+
+def close_counters() -> None:
+    """Unmap every counter (used with ``core.close_pools``)."""
+
+    with _counters_lock:
+        counters = list(_counters.values())
+        _counters.clear()
+    for counter in counters:
+        counter.close()
@@ -1,40 +1,560 @@
 """Database utilities for multi-database support."""
 from __future__ import annotations
 
+import hashlib
+import os
+import queue
 import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 from pathlib import Path
-from typing import Generator, Iterable
+from itertools import islice
+from typing import (
+    Callable,
+    Dict,
+    Generator,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
-from ..config import ModuleDefinition, get_module, get_settings, list_modules
+from .. import metrics, profiling
+from . import blobs, coherence
+from ..config import DatabaseSettings, ModuleDefinition, get_module, get_settings, list_modules
 
 DATABASE_TABLE = "project_insights"
+METADATA_TABLE = "module_metadata"
+SEARCH_TABLE = f"{DATABASE_TABLE}_fts"
+CHANGES_TABLE = "insight_changes"
+RECORDS_COUNTER = "records"
+VERSION_COUNTER = "version"
+CHANGES_RETENTION = "changes_retention"
+CHANGES_FLOOR = "changes_floor"
+SHARD_INDEX = "shard_index"
+SHARD_COUNT = "shard_count"
+# Generated columns backing the JSON fields a module declares in ``indexes``.
+JSON_COLUMN_PREFIX = "json__"
+# The change log is compacted whenever its sequence crosses a multiple of this.
+CHANGES_COMPACT_EVERY = 1024
+# ``expires_at`` uses SQLite's ``datetime('now')`` format (UTC), so the two compare as text.
+EXPIRY_FORMAT = "%Y-%m-%d %H:%M:%S"
 
 
-def get_database_path(module: ModuleDefinition) -> Path:
-    """Return the on-disk path for a module database."""
+class KeepExpiry:
+    """Type of ``KEEP_EXPIRY``."""
+
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return "KEEP_EXPIRY"
+
+
+# ``expires_at`` of a write that does not mention it: an existing row keeps its
+# expiry and a new one never expires. An explicit ``None`` clears the expiry.
+KEEP_EXPIRY = KeepExpiry()
+Expiry = Union[str, None, KeepExpiry]
+
+# Rows are ``(key, value, value_sha256, value_size, expires_at, keep_expiry)``
+# as built by ``prepare_record``; offloaded values keep an empty ``value``.
+UPSERT_SQL = f"""
+    INSERT INTO {DATABASE_TABLE} (key, value, value_sha256, value_size, expires_at)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(key) DO UPDATE SET
+        value=excluded.value,
+        value_sha256=excluded.value_sha256,
+        value_size=excluded.value_size,
+        expires_at=CASE WHEN ? THEN expires_at ELSE excluded.expires_at END,
+        updated_at=datetime('now')
+"""
+
+# Same as ``UPSERT_SQL`` but leaves rows whose value is unchanged untouched,
+# so their ``updated_at`` is not bumped.
+UPSERT_IF_CHANGED_SQL = UPSERT_SQL + (
+    "    WHERE value IS NOT excluded.value OR value_sha256 IS NOT excluded.value_sha256\n"
+)
+
+# Columns understood by ``insight_from_row``.
+INSIGHT_COLUMNS = "key, value, updated_at, value_sha256, value_size, expires_at"
+SELECT_INSIGHT_SQL = f"SELECT {INSIGHT_COLUMNS} FROM {DATABASE_TABLE} WHERE key = ?"
+
+# Keys looked up per query when comparing seeds (below SQLite's variable limit).
+SEED_LOOKUP_SIZE = 500
+BOOTSTRAP_WORKERS = 16
+
+T = TypeVar("T")
+
+
+def database_file_name(module_slug: str, shard: int = 0) -> str:
+    """Return the file name of one shard of a module database.
+
+    Shard 0 is ``<slug>.db``, the file unsharded modules have always used;
+    further shards are ``<slug>.<shard>.db``.
+    """
+
+    return f"{module_slug}.{shard}.db" if shard else f"{module_slug}.db"
+
+
+def get_database_path(module: ModuleDefinition, shard: int = 0) -> Path:
+    """Return the on-disk path for one shard of a module database."""
 
     settings = get_settings()
-    return settings.data_dir / f"{module.slug}.db"
+    return settings.data_dir / database_file_name(module.slug, shard)
 
 
-@contextmanager
-def connect(module_slug: str) -> Generator[sqlite3.Connection, None, None]:
-    """Context manager that yields a SQLite connection for the given module."""
+def remove_database(path: Path) -> None:
+    """Delete a database file together with its WAL, shared-memory and journal files."""
+
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        path.with_name(path.name + suffix).unlink(missing_ok=True)
+
+
+def shard_for_key(key: str, shards: int) -> int:
+    """Return the shard holding ``key`` for a module split into ``shards`` files.
+
+    The hash is stable across processes and Python versions (unlike
+    ``hash()``), so every worker and the reshard tool route keys alike.
+    """
+
+    if shards == 1:
+        return 0
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % shards
+
+
+def group_by_shard(records: Iterable[tuple], shards: int) -> Dict[int, List[tuple]]:
+    """Split ``(key, value, ...)`` records by the shard their key belongs to."""
+
+    groups: Dict[int, List[tuple]] = {}
+    for record in records:
+        groups.setdefault(shard_for_key(record[0], shards), []).append(record)
+    return groups
+
+
+class ConnectionPool:
+    """Bounded set of long-lived SQLite connections for one module database.
+
+    Writes go through a single connection serialised behind a lock, while up
+    to ``pool_size`` read-only connections are handed out concurrently. With
+    ``journal_mode=WAL`` readers therefore never wait on the writer.
+    """
+
+    def __init__(
+        self, module_slug: str, path: Path, options: DatabaseSettings, shard: int = 0
+    ) -> None:
+        self.module_slug = module_slug
+        self.shard = shard
+        self.path = path
+        self.options = options
+        self._writer: sqlite3.Connection | None = None
+        self._writer_lock = threading.Lock()
+        self._idle_readers: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._reader_slots = threading.BoundedSemaphore(options.pool_size)
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._closed = False
+        # ``connect`` blocks currently using the pool; guarded by ``_pools_lock``.
+        self.leases = 0
+        self._lock_fd: Optional[int] = None
+        # Whether the initialisers changed rows when the writer was opened; the
+        # ``writer()`` use that opened it reports them like its own writes.
+        self._initialised_changes = False
+
+    def _open(self, *, readonly: bool) -> sqlite3.Connection:
+        options = self.options
+        connection = sqlite3.connect(
+            self.path,
+            timeout=options.busy_timeout_ms / 1000,
+            check_same_thread=False,
+        )
+        connection.row_factory = sqlite3.Row
+        if not readonly:
+            # Only takes effect on new files; ``retention.enable_incremental_vacuum``
+            # converts older ones.
+            connection.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            connection.execute(f"PRAGMA journal_mode={options.journal_mode}")
+        connection.execute(f"PRAGMA synchronous={options.synchronous}")
+        connection.execute(f"PRAGMA busy_timeout={int(options.busy_timeout_ms)}")
+        connection.execute(f"PRAGMA cache_size={int(options.cache_size)}")
+        connection.execute(f"PRAGMA mmap_size={int(options.mmap_size)}")
+        if readonly:
+            connection.execute("PRAGMA query_only=ON")
+        with self._lock:
+            if self._closed:
+                connection.close()
+                raise RuntimeError(f"El pool de '{self.path.name}' está cerrado.")
+            self._connections.append(connection)
+        return connection
+
+    def _writer_connection(self) -> sqlite3.Connection:
+        if self._writer is None:
+            with profiling.track_phase("initialise"):
+                self._writer = self._initialise_writer()
+        return self._writer
+
+    def _initialise_writer(self) -> sqlite3.Connection:
+        """Open the write connection and bring the schema up to date."""
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        connection = self._open(readonly=False)
+        initialise_database(connection)
+        set_change_retention(connection, self.options.changes_retention)
+        module = get_module(self.module_slug)
+        try:
+            claim_shard(connection, self.shard, module.shards)
+        except BaseException:
+            connection.close()
+            raise
+        changes_before = connection.total_changes
+        for initialiser in _database_initialisers:
+            initialiser(connection, module, self.shard)
+        self._initialised_changes = connection.total_changes != changes_before
+        return connection
+
+    def _write_lock_fd(self) -> int:
+        if self._lock_fd is None:
+            self._lock_fd = coherence.open_write_lock(self.path)
+        return self._lock_fd
+
+    @contextmanager
+    def writer(self) -> Generator[sqlite3.Connection, None, None]:
+        """Yield the module's single write connection.
+
+        The database's cross-process lock (``coherence.VersionCounter``) is
+        held as well, and its counter is bumped if rows changed.
+        """
+
+        started = time.perf_counter()
+        counter = coherence.get_counter(self.path)
+        with self._writer_lock, coherence.write_lock(self._write_lock_fd()):
+            connection = self._writer_connection()
+            metrics.observe_connection_wait(
+                time.perf_counter() - started, self.module_slug, "write"
+            )
+            changes_before = connection.total_changes
+            initialised, self._initialised_changes = self._initialised_changes, False
+            try:
+                yield connection
+            finally:
+                if connection.in_transaction:
+                    connection.rollback()
+                changed = initialised or connection.total_changes != changes_before
+                if changed:
+                    _note_local_write(self.path, counter.bump())
+        if changed:
+            for listener in _write_listeners:
+                listener(self.module_slug)
 
+    @contextmanager
+    def reader(self) -> Generator[sqlite3.Connection, None, None]:
+        """Yield one of the pooled read-only connections."""
+
+        started = time.perf_counter()
+        if self._writer is None:
+            # Make sure the file and schema exist before readers attach; going
+            # through ``writer()`` takes the cross-process lock and reports
+            # rows the initialisers wrote.
+            with self.writer():
+                pass
+
+        self._reader_slots.acquire()
+        try:
+            try:
+                connection = self._idle_readers.get_nowait()
+            except queue.Empty:
+                connection = self._open(readonly=True)
+            metrics.observe_connection_wait(
+                time.perf_counter() - started, self.module_slug, "read"
+            )
+            try:
+                yield connection
+            finally:
+                if connection.in_transaction:
+                    connection.rollback()
+                self._idle_readers.put(connection)
+        finally:
+            self._reader_slots.release()
+
+    def drain(self) -> None:
+        """Wait for in-flight users to finish, then close every connection."""
+
+        with self._lock:
+            self._closed = True
+        with self._writer_lock:
+            for _ in range(self.options.pool_size):
+                self._reader_slots.acquire()
+            self.close()
+
+    def close(self) -> None:
+        """Close every connection owned by the pool."""
+
+        with self._lock:
+            self._closed = True
+            connections, self._connections = self._connections, []
+        self._writer = None
+        for connection in connections:
+            connection.close()
+        lock_fd, self._lock_fd = self._lock_fd, None
+        if lock_fd is not None:
+            os.close(lock_fd)
+
+
+# Open pools in least-recently-used order, bounded by ``max_open_databases``.
+_pools: "OrderedDict[Path, ConnectionPool]" = OrderedDict()
+_pools_lock = threading.Lock()
+
+OPEN_DATABASES = metrics.REGISTRY.register(
+    metrics.CallbackMetric(
+        "aurvo_db_open_databases",
+        "Bases de datos de módulo (shards) con un pool abierto.",
+        (),
+        lambda: [((), len(_pools))],
+        kind="gauge",
+    )
+)
+
+DatabaseInitialiser = Callable[[sqlite3.Connection, ModuleDefinition, int], None]
+_database_initialisers: List[DatabaseInitialiser] = []
+
+
+WriteListener = Callable[[str], None]
+_write_listeners: List[WriteListener] = []
+
+
+KeyListener = Callable[[str, Sequence[str]], None]
+_key_listeners: List[KeyListener] = []
+
+
+def register_key_listener(listener: KeyListener) -> None:
+    """Call ``listener(module_slug, keys)`` once writes to ``keys`` are committed.
+
+    Listeners run on the writing thread before the write returns to its
+    caller, so caches invalidated here never serve a value older than a
+    write its client already saw acknowledged.
+    """
+
+    if listener not in _key_listeners:
+        _key_listeners.append(listener)
+
+
+def notify_keys_written(module_slug: str, keys: Sequence[str]) -> None:
+    """Run the key listeners for ``keys`` of ``module_slug``."""
+
+    for listener in _key_listeners:
+        listener(module_slug, keys)
+
+
+def register_write_listener(listener: WriteListener) -> None:
+    """Call ``listener(module_slug)`` after a writer use that modified rows.
+
+    Listeners run once the writer lock is released; rows changed by a
+    transaction that was rolled back also trigger them, so they should treat
+    the call as a hint to re-read.
+    """
+
+    if listener not in _write_listeners:
+        _write_listeners.append(listener)
+
+
+def register_database_initialiser(initialiser: DatabaseInitialiser) -> None:
+    """Run ``initialiser(connection, module, shard)`` when a database is first opened.
+
+    Initialisers run on the write connection of every shard right after the
+    migrations, so modules are bootstrapped lazily on first access.
+    """
+
+    if initialiser not in _database_initialisers:
+        _database_initialisers.append(initialiser)
+
+
+def _evict_idle_pools(limit: int) -> List[ConnectionPool]:
+    """Unregister least recently used idle pools so one more fits under ``limit``.
+
+    Must hold ``_pools_lock``. Pools in use are skipped, so the limit is soft
+    while every open database is busy. Returns the pools to close.
+    """
+
+    excess = len(_pools) - limit + 1
+    if not limit or excess <= 0:
+        return []
+    idle = []
+    for path, pool in _pools.items():
+        if pool.leases == 0:
+            idle.append(path)
+            if len(idle) == excess:
+                break
+    metrics.DB_POOL_EVICTIONS.inc(len(idle))
+    return [_pools.pop(path) for path in idle]
+
+
+def _checkout(module_slug: str, shard: int, *, lease: bool) -> ConnectionPool:
     module = get_module(module_slug)
-    db_path = get_database_path(module)
-    connection = sqlite3.connect(db_path, check_same_thread=False)
+    if not 0 <= shard < module.shards:
+        raise ValueError(f"El módulo '{module_slug}' no tiene el shard {shard}.")
+    db_path = get_database_path(module, shard)
+    evicted: List[ConnectionPool] = []
+    with _pools_lock:
+        pool = _pools.get(db_path)
+        if pool is None:
+            options = get_settings().database
+            evicted = _evict_idle_pools(options.max_open_databases)
+            pool = ConnectionPool(module_slug, db_path, options, shard)
+            _pools[db_path] = pool
+        else:
+            _pools.move_to_end(db_path)
+        if lease:
+            pool.leases += 1
+    for stale in evicted:
+        stale.close()
+    return pool
+
+
+def get_pool(module_slug: str, shard: int = 0) -> ConnectionPool:
+    """Return (creating on first use) the connection pool for a module shard.
+
+    Opening a pool beyond ``DatabaseSettings.max_open_databases`` closes the
+    idle pools used longest ago; their databases reopen on next access.
+    """
+
+    return _checkout(module_slug, shard, lease=False)
+
+
+def is_pool_open(module_slug: str, shard: int = 0) -> bool:
+    """Return whether a module shard currently has a pool (without opening one)."""
+
+    return get_database_path(get_module(module_slug), shard) in _pools
+
+
+def drain_pool(module: ModuleDefinition) -> None:
+    """Forget a module's pools and close them once their in-flight work finishes."""
+
+    with _pools_lock:
+        pools = [
+            _pools.pop(get_database_path(module, shard), None) for shard in range(module.shards)
+        ]
+    for pool in pools:
+        if pool is not None:
+            pool.drain()
+
+
+def close_pools() -> None:
+    """Close every pooled connection (used on shutdown and in tests)."""
+
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+    coherence.close_counters()
+
+
+# Per database: the commit counter value and change-log ``seq`` up to which
+# this process has accounted for writes made by other processes. Executor
+# threads update a mark only if it is still the one they read (under the
+# lock), so a stale thread can never move it past changes nobody replayed.
+_watermarks: Dict[Path, Tuple[int, int]] = {}
+_watermarks_lock = threading.Lock()
+
+
+def _note_local_write(path: Path, previous: int) -> None:
+    """Advance the watermark past a local commit if no foreign commit preceded it.
+
+    Local writes notify their own listeners, so only the counter moves; the
+    change-log position stays and is replayed (harmlessly) with the next
+    foreign write.
+    """
+
+    with _watermarks_lock:
+        mark = _watermarks.get(path)
+        if mark is not None and mark[0] == previous:
+            _watermarks[path] = (previous + 1, mark[1])
+
+
+def foreign_writes_pending(module_slug: str, shard: int = 0) -> bool:
+    """Return whether another process committed to the shard since the last sync.
+
+    Costs a memory read; no database is opened.
+    """
+
+    path = get_database_path(get_module(module_slug), shard)
+    mark = _watermarks.get(path)
+    return mark is None or mark[0] != coherence.get_counter(path).read()
+
+
+def read_version_counter(module_slug: str, shard: int = 0) -> int:
+    """Return the shared commit counter of a module shard (a memory read)."""
+
+    return coherence.get_counter(get_database_path(get_module(module_slug), shard)).read()
+
+
+def sync_foreign_writes(module_slug: str, shard: int = 0) -> Optional[List[str]]:
+    """Return the keys other processes wrote to the shard since the previous call.
+
+    The first call for a database only records the current position. ``None``
+    means the change log no longer reaches back that far (it was compacted or
+    the database replaced), so callers must forget everything they cached.
+    """
+
+    path = get_database_path(get_module(module_slug), shard)
+    version = coherence.get_counter(path).read()
+    mark = _watermarks.get(path)
+    if mark is not None and mark[0] == version:
+        return []
+    with connect(module_slug, readonly=True, shard=shard) as connection, metrics.track_query(
+        module_slug, "sync_foreign_writes"
+    ) as query:
+        floor, head = get_change_bounds(connection)
+        if mark is None:
+            keys: Optional[List[str]] = []
+        elif not floor <= mark[1] <= head:
+            keys = None
+        else:
+            keys = [
+                key
+                for (key,) in connection.execute(
+                    f"SELECT DISTINCT key FROM {CHANGES_TABLE} WHERE seq > ? AND seq <= ?",
+                    (mark[1], head),
+                )
+            ]
+            query.rows = len(keys)
+    with _watermarks_lock:
+        # If another thread synced meanwhile its mark is kept; the next call
+        # may then replay some keys again, which only costs extra invalidation.
+        if _watermarks.get(path) == mark:
+            _watermarks[path] = (version, head)
+    return keys
+
+
+@contextmanager
+def connect(
+    module_slug: str, *, readonly: bool = False, shard: int = 0
+) -> Generator[sqlite3.Connection, None, None]:
+    """Context manager that yields a pooled SQLite connection for the given module.
+
+    ``readonly=True`` hands out one of the concurrent reader connections;
+    otherwise the shard's single writer connection is locked for the caller.
+    Any transaction left open when the block exits is rolled back.
+    """
+
+    pool = _checkout(module_slug, shard, lease=True)
     try:
-        connection.row_factory = sqlite3.Row
-        yield connection
+        manager = pool.reader() if readonly else pool.writer()
+        with manager as connection:
+            yield connection
     finally:
-        connection.close()
-
+        with _pools_lock:
+            pool.leases -= 1
 
-def initialise_database(connection: sqlite3.Connection) -> None:
-    """Ensure the core table exists for the provided connection."""
 
+def _migrate_core_table(connection: sqlite3.Connection) -> None:
     connection.execute(
         f"""
         CREATE TABLE IF NOT EXISTS {DATABASE_TABLE} (
@@ -45,36 +565,695 @@ def initialise_database(connection: sqlite3.Connection) -> None:
         )
         """
     )
+
+
+def _migrate_record_counter(connection: sqlite3.Connection) -> None:
+    """Keep the number of insights in ``module_metadata`` via triggers.
+
+    The counter is updated inside the writing transaction, so reading it never
+    scans the table.
+    """
+
+    connection.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {METADATA_TABLE} (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        ) WITHOUT ROWID
+        """
+    )
+    # Backfill databases that already hold insights.
+    connection.execute(
+        f"""
+        INSERT OR IGNORE INTO {METADATA_TABLE} (name, value)
+        SELECT ?, COUNT(*) FROM {DATABASE_TABLE}
+        """,
+        (RECORDS_COUNTER,),
+    )
+    connection.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {DATABASE_TABLE}_count_insert
+        AFTER INSERT ON {DATABASE_TABLE}
+        BEGIN
+            UPDATE {METADATA_TABLE} SET value = value + 1 WHERE name = '{RECORDS_COUNTER}';
+        END
+        """
+    )
+    connection.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {DATABASE_TABLE}_count_delete
+        AFTER DELETE ON {DATABASE_TABLE}
+        BEGIN
+            UPDATE {METADATA_TABLE} SET value = value - 1 WHERE name = '{RECORDS_COUNTER}';
+        END
+        """
+    )
+
+
+def _migrate_search_index(connection: sqlite3.Connection) -> None:
+    """Add the FTS5 index over ``key``/``value`` and its sync triggers.
+
+    The index is an external-content table, so it stores only the inverted
+    index and reads the text back from ``project_insights``.
+    """
+
+    connection.execute(
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+            key, value, content='{DATABASE_TABLE}', content_rowid='id'
+        )
+        """
+    )
+    connection.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_insert
+        AFTER INSERT ON {DATABASE_TABLE}
+        BEGIN
+            INSERT INTO {SEARCH_TABLE} (rowid, key, value) VALUES (new.id, new.key, new.value);
+        END
+        """
+    )
+    connection.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_delete
+        AFTER DELETE ON {DATABASE_TABLE}
+        BEGIN
+            INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}, rowid, key, value)
+            VALUES ('delete', old.id, old.key, old.value);
+        END
+        """
+    )
+    connection.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_update
+        AFTER UPDATE OF key, value ON {DATABASE_TABLE}
+        BEGIN
+            INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}, rowid, key, value)
+            VALUES ('delete', old.id, old.key, old.value);
+            INSERT INTO {SEARCH_TABLE} (rowid, key, value) VALUES (new.id, new.key, new.value);
+        END
+        """
+    )
+    # Index rows written before the search table existed.
+    connection.execute(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('rebuild')")
+
+
+def _migrate_version_counter(connection: sqlite3.Connection) -> None:
+    """Bump a ``module_metadata`` version on every insert, update and delete.
+
+    The version identifies the current contents of the module, which makes it
+    a cheap basis for ETags and cache keys. It starts at a random offset so a
+    database that is deleted and recreated does not reuse earlier versions.
+    """
+
+    connection.execute(
+        f"INSERT OR IGNORE INTO {METADATA_TABLE} (name, value) "
+        "VALUES (?, abs(random() >> 12))",
+        (VERSION_COUNTER,),
+    )
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        connection.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {DATABASE_TABLE}_version_{event.lower()}
+            AFTER {event} ON {DATABASE_TABLE}
+            BEGIN
+                UPDATE {METADATA_TABLE} SET value = value + 1 WHERE name = '{VERSION_COUNTER}';
+            END
+            """
+        )
+
+
+def _migrate_change_log(connection: sqlite3.Connection) -> None:
+    """Append every insert, update and delete to the ``insight_changes`` log.
+
+    ``seq`` is an AUTOINCREMENT key, so sequence numbers are never reused even
+    after compaction. Deletions are logged with a NULL ``value``. Every
+    ``CHANGES_COMPACT_EVERY`` entries the log drops all but the newest
+    ``changes_retention`` rows and records the highest dropped ``seq`` as
+    ``changes_floor``.
+    """
+
+    connection.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {CHANGES_TABLE} (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            key TEXT NOT NULL,
+            value TEXT,
+            changed_at TEXT NOT NULL DEFAULT (datetime('now'))
+        )
+        """
+    )
+    connection.executemany(
+        f"INSERT OR IGNORE INTO {METADATA_TABLE} (name, value) VALUES (?, ?)",
+        [(CHANGES_RETENTION, DatabaseSettings().changes_retention), (CHANGES_FLOOR, 0)],
+    )
+    for event, row in (("INSERT", "new"), ("UPDATE OF value", "new"), ("DELETE", "old")):
+        value = "NULL" if row == "old" else "new.value"
+        connection.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {CHANGES_TABLE}_{event.split()[0].lower()}
+            AFTER {event} ON {DATABASE_TABLE}
+            BEGIN
+                INSERT INTO {CHANGES_TABLE} (key, value) VALUES ({row}.key, {value});
+            END
+            """
+        )
+    connection.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {CHANGES_TABLE}_compact
+        AFTER INSERT ON {CHANGES_TABLE}
+        WHEN new.seq % {CHANGES_COMPACT_EVERY} = 0
+        BEGIN
+            UPDATE {METADATA_TABLE} SET value = max(
+                value,
+                new.seq - (SELECT value FROM {METADATA_TABLE} WHERE name = '{CHANGES_RETENTION}')
+            ) WHERE name = '{CHANGES_FLOOR}';
+            DELETE FROM {CHANGES_TABLE} WHERE seq <= (
+                SELECT value FROM {METADATA_TABLE} WHERE name = '{CHANGES_FLOOR}'
+            );
+        END
+        """
+    )
+
+
+def _migrate_value_offload(connection: sqlite3.Connection) -> None:
+    """Track values offloaded to the blob store and log their references.
+
+    Offloaded rows keep an empty ``value`` plus the blob's SHA-256 and the
+    value's size in bytes; the change log records the same pair.
+    """
+
+    for table in (DATABASE_TABLE, CHANGES_TABLE):
+        connection.execute(f"ALTER TABLE {table} ADD COLUMN value_sha256 TEXT")
+        connection.execute(f"ALTER TABLE {table} ADD COLUMN value_size INTEGER")
+    for event in ("insert", "update"):
+        connection.execute(f"DROP TRIGGER IF EXISTS {CHANGES_TABLE}_{event}")
+    for event in ("INSERT", "UPDATE OF value, value_sha256"):
+        connection.execute(
+            f"""
+            CREATE TRIGGER {CHANGES_TABLE}_{event.split()[0].lower()}
+            AFTER {event} ON {DATABASE_TABLE}
+            BEGIN
+                INSERT INTO {CHANGES_TABLE} (key, value, value_sha256, value_size)
+                VALUES (new.key, new.value, new.value_sha256, new.value_size);
+            END
+            """
+        )
+
+
+def _migrate_expiry(connection: sqlite3.Connection) -> None:
+    """Add the optional ``expires_at`` and the partial index the sweeper scans."""
+
+    connection.execute(f"ALTER TABLE {DATABASE_TABLE} ADD COLUMN expires_at TEXT")
+    connection.execute(
+        f"CREATE INDEX IF NOT EXISTS {DATABASE_TABLE}_expires_at "
+        f"ON {DATABASE_TABLE} (expires_at) WHERE expires_at IS NOT NULL"
+    )
+
+
+# Ordered schema migrations; ``PRAGMA user_version`` records the last one
+# applied. Append new steps, never reorder or edit released ones. Steps must
+# tolerate databases created before versioning existed (user_version 0).
+MIGRATIONS: Tuple[Tuple[int, Callable[[sqlite3.Connection], None]], ...] = (
+    (1, _migrate_core_table),
+    (2, _migrate_record_counter),
+    (3, _migrate_search_index),
+    (4, _migrate_version_counter),
+    (5, _migrate_change_log),
+    (6, _migrate_value_offload),
+    (7, _migrate_expiry),
+)
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(connection: sqlite3.Connection) -> int:
+    """Return the migration number stored in ``PRAGMA user_version``."""
+
+    return int(connection.execute("PRAGMA user_version").fetchone()[0])
+
+
+def initialise_database(connection: sqlite3.Connection) -> None:
+    """Apply any pending schema migrations to the provided connection.
+
+    Up-to-date databases cost a single ``PRAGMA user_version`` read. Pending
+    migrations run in one ``IMMEDIATE`` transaction so concurrent processes
+    cannot apply them twice.
+    """
+
+    if get_schema_version(connection) >= SCHEMA_VERSION:
+        return
+
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        version = get_schema_version(connection)
+        for number, migrate in MIGRATIONS:
+            if number > version:
+                migrate(connection)
+        connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        connection.commit()
+    except BaseException:
+        connection.rollback()
+        raise
+
+
+def _read_counter(connection: sqlite3.Connection, name: str) -> int:
+    row = connection.execute(
+        f"SELECT value FROM {METADATA_TABLE} WHERE name = ?", (name,)
+    ).fetchone()
+    return int(row[0]) if row is not None else 0
+
+
+def get_record_count(connection: sqlite3.Connection) -> int:
+    """Return the maintained number of insights stored in the module database."""
+
+    return _read_counter(connection, RECORDS_COUNTER)
+
+
+def get_data_version(connection: sqlite3.Connection) -> int:
+    """Return the module's content version, bumped by every row change."""
+
+    return _read_counter(connection, VERSION_COUNTER)
+
+
+def json_index_column(field: str) -> str:
+    """Return the generated column of the JSON field ``field`` (``a.b`` -> ``json__a__b``)."""
+
+    return JSON_COLUMN_PREFIX + field.replace(".", "__")
+
+
+def sync_json_indexes(connection: sqlite3.Connection, fields: Sequence[str]) -> None:
+    """Make the indexed generated columns of ``project_insights`` match ``fields``.
+
+    Every declared field becomes a ``VIRTUAL`` column extracting ``$.<field>``
+    from the value (NULL when the value is not JSON, or is offloaded to the
+    blob store) plus an index on ``(column, key)``, so equality and range
+    filters and their keyset pagination run on the index. Columns of fields
+    no longer declared are dropped. Up-to-date tables cost one PRAGMA.
+    """
+
+    wanted = {json_index_column(field): field for field in fields}
+
+    def generated_columns() -> set:
+        return {
+            row[1]
+            for row in connection.execute(f"PRAGMA table_xinfo({DATABASE_TABLE})")
+            if row[1].startswith(JSON_COLUMN_PREFIX)
+        }
+
+    if generated_columns() == wanted.keys():
+        return
+
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        existing = generated_columns()  # another process may have synced meanwhile
+        for column in existing - wanted.keys():
+            connection.execute(f"DROP INDEX IF EXISTS {DATABASE_TABLE}_{column}")
+            connection.execute(f"ALTER TABLE {DATABASE_TABLE} DROP COLUMN {column}")
+        for column in wanted.keys() - existing:
+            connection.execute(
+                f"""
+                ALTER TABLE {DATABASE_TABLE} ADD COLUMN {column} GENERATED ALWAYS AS (
+                    CASE WHEN json_valid(value) THEN json_extract(value, '$.{wanted[column]}') END
+                ) VIRTUAL
+                """
+            )
+            connection.execute(
+                f"CREATE INDEX {DATABASE_TABLE}_{column} ON {DATABASE_TABLE} ({column}, key)"
+            )
+        connection.commit()
+    except BaseException:
+        connection.rollback()
+        raise
+
+
+def get_shard_layout(connection: sqlite3.Connection) -> Optional[Tuple[int, int]]:
+    """Return the ``(shard, shards)`` a database was created for, if recorded.
+
+    Databases written before sharding existed hold no layout; they are the
+    only shard of their module when they contain insights.
+    """
+
+    rows = dict(
+        connection.execute(
+            f"SELECT name, value FROM {METADATA_TABLE} WHERE name IN (?, ?)",
+            (SHARD_INDEX, SHARD_COUNT),
+        ).fetchall()
+    )
+    if SHARD_COUNT in rows:
+        return int(rows.get(SHARD_INDEX, 0)), int(rows[SHARD_COUNT])
+    if get_record_count(connection):
+        return 0, 1
+    return None
+
+
+def claim_shard(connection: sqlite3.Connection, shard: int, shards: int) -> None:
+    """Record that the database is ``shard`` of ``shards``, or check it already is.
+
+    Opening a file with a different shard count than it was written with
+    would route keys to the wrong shard, so it raises ``RuntimeError`` and
+    points at the offline reshard tool instead.
+    """
+
+    layout = get_shard_layout(connection)
+    if layout is None:
+        layout = (shard, shards)
+    if layout != (shard, shards):
+        raise RuntimeError(
+            f"La base de datos '{_database_name(connection)}' pertenece al shard "
+            f"{layout[0]} de {layout[1]}, pero la configuración indica el shard {shard} "
+            f"de {shards}. Ejecuta backend/scripts/reshard.py para cambiar el número de shards."
+        )
+    connection.executemany(
+        f"INSERT OR IGNORE INTO {METADATA_TABLE} (name, value) VALUES (?, ?)",
+        [(SHARD_INDEX, shard), (SHARD_COUNT, shards)],
+    )
+    connection.commit()
+
+
+def _database_name(connection: sqlite3.Connection) -> str:
+    row = connection.execute("PRAGMA database_list").fetchone()
+    return Path(row[2]).name if row is not None and row[2] else ":memory:"
+
+
+def set_change_retention(connection: sqlite3.Connection, retention: int) -> None:
+    """Store how many change-log entries the compaction trigger keeps."""
+
+    connection.execute(
+        f"UPDATE {METADATA_TABLE} SET value = ? WHERE name = ? AND value IS NOT ?",
+        (retention, CHANGES_RETENTION, retention),
+    )
     connection.commit()
 
 
+def get_change_bounds(connection: sqlite3.Connection) -> Tuple[int, int]:
+    """Return ``(floor, head)`` of the change log.
+
+    Entries with ``seq <= floor`` were compacted away; ``head`` is the last
+    sequence number handed out (0 when nothing was ever logged).
+    """
+
+    row = connection.execute(
+        "SELECT seq FROM sqlite_sequence WHERE name = ?", (CHANGES_TABLE,)
+    ).fetchone()
+    return _read_counter(connection, CHANGES_FLOOR), int(row[0]) if row is not None else 0
+
+
+def fetch_changes(
+    connection: sqlite3.Connection, since: int, limit: int
+) -> List[Tuple[int, str, Optional[str], str, Optional[str], Optional[int]]]:
+    """Return up to ``limit`` changes logged after ``since``.
+
+    Each entry is ``(seq, key, value, changed_at, value_sha256, value_size)``;
+    deletions have neither a value nor a digest.
+    """
+
+    cursor = connection.cursor()
+    cursor.row_factory = None
+    return cursor.execute(
+        f"""
+        SELECT seq, key, value, changed_at, value_sha256, value_size FROM {CHANGES_TABLE}
+        WHERE seq > ? ORDER BY seq LIMIT ?
+        """,
+        (since, limit),
+    ).fetchall()
+
+
+def iter_batches(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Yield consecutive lists of at most ``size`` items."""
+
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+PreparedRecord = Tuple[str, str, Optional[str], Optional[int], Optional[str], bool]
+
+
+def prepare_record(key: str, value: str, expires_at: Expiry = KEEP_EXPIRY) -> PreparedRecord:
+    """Return the ``UPSERT_SQL`` parameters for one insight.
+
+    Values above the blob threshold are written to the blob store first, so a
+    committed row never references a missing file. ``expires_at`` comes from
+    ``format_expiry``.
+    """
+
+    keep = expires_at is KEEP_EXPIRY
+    stored = None if keep else expires_at
+    ref = blobs.get_blob_store().offload(value)
+    if ref is None:
+        return key, value, None, None, stored, keep
+    return key, "", ref[0], ref[1], stored, keep
+
+
+def format_expiry(
+    expires_at: Union[datetime, None, KeepExpiry], retention_seconds: Optional[int] = None
+) -> Expiry:
+    """Return the stored ``expires_at`` of a write.
+
+    An explicit ``expires_at`` wins (naive values are taken as UTC); otherwise
+    the module's ``retention_seconds`` counts from now. Without retention,
+    ``None`` never expires and ``KEEP_EXPIRY`` is passed through so an
+    existing row keeps the expiry it has.
+    """
+
+    if expires_at is None or expires_at is KEEP_EXPIRY:
+        if not retention_seconds:
+            return expires_at
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=retention_seconds)
+    elif expires_at.tzinfo is not None:
+        expires_at = expires_at.astimezone(timezone.utc)
+    return expires_at.strftime(EXPIRY_FORMAT)
+
+
+def insight_from_row(
+    key: str,
+    value: str,
+    updated_at: str,
+    value_sha256: Optional[str],
+    value_size: Optional[int],
+    expires_at: Optional[str],
+) -> dict:
+    """Build the insight dict for a row selected with ``INSIGHT_COLUMNS``.
+
+    Offloaded values are replaced by a ``value_ref`` holding their digest and
+    size; they are served by ``GET /modules/{slug}/insights/{key}/value``.
+    """
+
+    if value_sha256 is None:
+        return {
+            "key": key,
+            "value": value,
+            "updated_at": updated_at,
+            "value_ref": None,
+            "expires_at": expires_at,
+        }
+    return {
+        "key": key,
+        "value": None,
+        "updated_at": updated_at,
+        "value_ref": {"sha256": value_sha256, "size": value_size},
+        "expires_at": expires_at,
+    }
+
+
+def upsert_records(
+    connection: sqlite3.Connection,
+    records: Sequence[tuple],
+    *,
+    only_changed: bool = False,
+) -> int:
+    """Upsert ``(key, value)`` or ``(key, value, expires_at)`` records in one transaction.
+
+    Records without ``expires_at`` keep the expiry of the row they update.
+
+    Returns how many of the keys were new, derived from the maintained record
+    counter so no extra lookups are needed per row. With ``only_changed``
+    existing rows holding the same value keep their ``updated_at``.
+    """
+
+    prepared = [prepare_record(*record) for record in records]
+    before = get_record_count(connection)
+    connection.executemany(UPSERT_IF_CHANGED_SQL if only_changed else UPSERT_SQL, prepared)
+    inserted = get_record_count(connection) - before
+    connection.commit()
+    return inserted
+
+
+def delete_expired(
+    connection: sqlite3.Connection, limit: int, *, now: Optional[str] = None
+) -> List[str]:
+    """Delete up to ``limit`` insights whose ``expires_at`` has passed; return their keys.
+
+    The oldest expiries go first, read from the partial ``expires_at`` index,
+    and the deletions commit as one short transaction.
+    """
+
+    rows = connection.execute(
+        f"""
+        DELETE FROM {DATABASE_TABLE} WHERE id IN (
+            SELECT id FROM {DATABASE_TABLE}
+            WHERE expires_at <= ? ORDER BY expires_at LIMIT ?
+        ) RETURNING key
+        """,
+        (now or datetime.now(timezone.utc).strftime(EXPIRY_FORMAT), limit),
+    ).fetchall()
+    connection.commit()
+    return [key for (key,) in rows]
+
+
+def get_auto_vacuum(connection: sqlite3.Connection) -> int:
+    """Return ``PRAGMA auto_vacuum`` (0 none, 1 full, 2 incremental)."""
+
+    return int(connection.execute("PRAGMA auto_vacuum").fetchone()[0])
+
+
+def get_freelist_count(connection: sqlite3.Connection) -> int:
+    return int(connection.execute("PRAGMA freelist_count").fetchone()[0])
+
+
+def incremental_vacuum(connection: sqlite3.Connection, pages: int) -> int:
+    """Return up to ``pages`` free pages to the filesystem; return how many were freed.
+
+    Only databases in ``auto_vacuum=INCREMENTAL`` mode shrink. The pragma
+    frees one page per step and ``execute`` steps once, so it goes through
+    ``executescript``, which runs statements to completion (and commits).
+    """
+
+    before = get_freelist_count(connection)
+    connection.executescript(f"PRAGMA incremental_vacuum({int(pages)})")
+    return before - get_freelist_count(connection)
+
+
+def open_shards() -> List[Tuple[str, int]]:
+    """Return the ``(module, shard)`` pairs that currently have an open pool."""
+
+    with _pools_lock:
+        return [(pool.module_slug, pool.shard) for pool in _pools.values()]
+
+
+def for_each_module(
+    func: Callable[[ModuleDefinition], T],
+    modules: Iterable[ModuleDefinition] | None = None,
+    *,
+    max_workers: int = BOOTSTRAP_WORKERS,
+) -> List[T]:
+    """Run ``func`` for every module on a thread pool and return the results.
+
+    SQLite releases the GIL while it works, so opening and migrating many
+    module databases in parallel keeps cold starts short.
+    """
+
+    targets = list(list_modules() if modules is None else modules)
+    if len(targets) <= 1:
+        return [func(module) for module in targets]
+    with ThreadPoolExecutor(
+        max_workers=min(max_workers, len(targets)), thread_name_prefix="aurvo-bootstrap"
+    ) as executor:
+        return list(executor.map(func, targets))
+
+
+def backup_database(connection: sqlite3.Connection, target: Path, *, pages: int) -> None:
+    """Copy the database behind ``connection`` to ``target`` ``pages`` at a time.
+
+    A read transaction stays open for the whole copy, so every step reads the
+    same snapshot: in WAL mode writers keep committing meanwhile and the backup
+    never restarts. The copy is written next to ``target`` and renamed into
+    place only once complete.
+    """
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    partial = target.with_name(target.name + ".partial")
+    partial.unlink(missing_ok=True)
+    destination = sqlite3.connect(partial)
+    try:
+        connection.execute("BEGIN")
+        try:
+            connection.execute(f"SELECT 1 FROM {METADATA_TABLE} LIMIT 1").fetchone()
+            connection.backup(destination, pages=pages, sleep=0)
+        finally:
+            connection.rollback()
+    finally:
+        destination.close()
+    partial.replace(target)
+
+
+def restore_database(source: Path, target: Path) -> None:
+    """Overwrite the database at ``target`` with the snapshot at ``source``.
+
+    The target must not be in use; pooled connections to it have to be closed
+    first. Going through the backup API keeps any WAL file of the target
+    consistent with the restored pages.
+    """
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    snapshot = sqlite3.connect(f"{source.resolve().as_uri()}?mode=ro", uri=True)
+    destination = sqlite3.connect(target)
+    try:
+        snapshot.backup(destination)
+    finally:
+        destination.close()
+        snapshot.close()
+
+
 def bootstrap_databases() -> None:
-    """Create all configured databases if they are missing."""
+    """Create and migrate all configured databases if needed.
 
-    for module in list_modules():
-        db_path = get_database_path(module)
-        db_path.parent.mkdir(parents=True, exist_ok=True)
-        with sqlite3.connect(db_path) as connection:
-            initialise_database(connection)
+    The API opens databases lazily on first access; this eager pass is for
+    deployment scripts that want every file ready (and checked) up front.
+    """
 
+    def open_database(module: ModuleDefinition) -> None:
+        for shard in range(module.shards):
+            with connect(module.slug, shard=shard):
+                pass
 
-def seed_records(
-    module_slug: str,
+    for_each_module(open_database)
+
+
+def write_seed_records(
+    connection: sqlite3.Connection,
     records: Iterable[tuple[str, str]],
-) -> None:
-    """Insert default records for a module database when missing."""
+) -> List[str]:
+    """Insert or refresh default records, writing only those that differ.
 
-    with connect(module_slug) as connection:
-        initialise_database(connection)
-        for key, value in records:
+    Stored values are compared first, so re-seeding an up-to-date database
+    neither takes a write transaction nor bumps ``updated_at``. Returns the
+    keys written, for the caller to pass to ``notify_keys_written``.
+    """
+
+    written: List[str] = []
+    for batch in iter_batches(records, SEED_LOOKUP_SIZE):
+        placeholders = ", ".join("?" for _ in batch)
+        stored = dict(
             connection.execute(
-                f"""
-                INSERT INTO {DATABASE_TABLE} (key, value)
-                VALUES (?, ?)
-                ON CONFLICT(key) DO UPDATE SET
-                    value=excluded.value,
-                    updated_at=datetime('now')
-                """,
-                (key, value),
-            )
+                f"SELECT key, value FROM {DATABASE_TABLE} WHERE key IN ({placeholders})",
+                [key for key, _ in batch],
+            ).fetchall()
+        )
+        changed = [(key, value) for key, value in batch if stored.get(key) != value]
+        if changed:
+            upsert_records(connection, changed, only_changed=True)
+            written.extend(key for key, _ in changed)
+    if connection.in_transaction:
         connection.commit()
+    return written
+
+
+def seed_records(
+    module_slug: str,
+    records: Iterable[tuple[str, str]],
+) -> int:
+    """Insert default records into a module's shards, skipping unchanged ones."""
+
+    written = 0
+    shards = get_module(module_slug).shards
+    for shard, group in group_by_shard(records, shards).items():
+        with connect(module_slug, shard=shard) as connection:
+            keys = write_seed_records(connection, group)
+        if keys:
+            notify_keys_written(module_slug, keys)
+        written += len(keys)
+    return written
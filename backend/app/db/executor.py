@@ -0,0 +1,127 @@
+"""Thread executor that keeps SQLite work off the event loop.
+
+Every module shares one pool of at most ``DatabaseSettings.max_workers``
+threads, so the thread count does not grow with the number of modules. Each
+module also has a lane that lets at most ``workers_per_module`` of its calls
+run at once; the rest wait in the lane in FIFO order, so a slow query or a
+long write on one module cannot take every worker from the others.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Deque, Dict, Optional, Tuple, TypeVar
+
+from ..config import get_settings
+
+T = TypeVar("T")
+
+
+class _Lane:
+    """Calls of one module: how many are running and those waiting their turn."""
+
+    __slots__ = ("limit", "active", "pending")
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.active = 0
+        self.pending: Deque[Tuple[Callable[[], object], Future]] = deque()
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_lanes: Dict[str, _Lane] = {}
+_lock = threading.Lock()
+_lane_idle = threading.Condition(_lock)
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Return the shared executor, created on first use (and again after shutdown)."""
+
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=get_settings().database.max_workers, thread_name_prefix="aurvo-db"
+            )
+        return _executor
+
+
+def _dispatch(module_slug: str, lane: _Lane, call: Callable[[], object], future: Future) -> None:
+    def run() -> None:
+        try:
+            if future.set_running_or_notify_cancel():
+                try:
+                    result = call()
+                except BaseException as exc:  # noqa: BLE001 - handed to the awaiting caller
+                    future.set_exception(exc)
+                else:
+                    future.set_result(result)
+        finally:
+            _next(module_slug, lane)
+
+    get_executor().submit(run)
+
+
+def _next(module_slug: str, lane: _Lane) -> None:
+    """Start the lane's next waiting call on the worker that just became free."""
+
+    with _lock:
+        if not lane.pending:
+            lane.active -= 1
+            if not lane.active and _lanes.get(module_slug) is lane:
+                del _lanes[module_slug]
+                _lane_idle.notify_all()
+            return
+        call, future = lane.pending.popleft()
+    _dispatch(module_slug, lane, call, future)
+
+
+def submit(module_slug: str, call: Callable[[], T]) -> "Future[T]":
+    """Schedule ``call`` on the shared executor within the module's lane."""
+
+    future: Future = Future()
+    with _lock:
+        lane = _lanes.get(module_slug)
+        if lane is None:
+            lane = _lanes[module_slug] = _Lane(get_settings().database.workers_per_module)
+        if lane.active >= lane.limit:
+            lane.pending.append((call, future))
+            return future
+        lane.active += 1
+    _dispatch(module_slug, lane, call, future)
+    return future
+
+
+async def run_in_module(module_slug: str, func: Callable[..., T], *args, **kwargs) -> T:
+    """Run ``func`` in the module's lane of the shared executor and await its result.
+
+    Like ``asyncio.to_thread``, the call runs in a copy of the caller's
+    context, so request-scoped state such as ``profiling`` timings follows it.
+    Cancelling the await drops the call if it has not started yet.
+    """
+
+    context = contextvars.copy_context()
+    call = functools.partial(context.run, func, *args, **kwargs)
+    return await asyncio.wrap_future(submit(module_slug, call))
+
+
+def wait_for_module(module_slug: str) -> None:
+    """Wait until every call queued for a module has run (before retiring it)."""
+
+    with _lock:
+        while module_slug in _lanes:
+            _lane_idle.wait()
+
+
+def shutdown_executors(wait: bool = True) -> None:
+    """Stop the shared executor (used on shutdown and in tests)."""
+
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait)
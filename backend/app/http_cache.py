@@ -0,0 +1,157 @@
+"""Conditional GET support: ETags, ``If-None-Match`` and cached response bodies."""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+from typing import Awaitable, Callable, Hashable, Optional, Tuple
+
+from fastapi import Request, Response, status
+
+from . import compression, metrics
+from .cache import LRUCache
+from .config import get_settings
+
+JSON_MEDIA_TYPE = "application/json"
+# Bodies at least this large are compressed on a worker thread (zlib releases
+# the GIL) so the event loop keeps serving other requests meanwhile.
+COMPRESS_OFFLOAD_BYTES = 256 * 1024
+
+RESPONSE_CACHE_REQUESTS = metrics.REGISTRY.register(
+    metrics.Counter(
+        "aurvo_response_cache_requests_total",
+        "Consultas a la caché de respuestas serializadas.",
+        ("result",),
+    )
+)
+
+_response_cache: Optional[LRUCache[bytes]] = None
+
+
+def get_response_cache() -> LRUCache[bytes]:
+    """Return the process-wide cache of serialised response bodies."""
+
+    global _response_cache
+    limit = get_settings().cache.response_bytes
+    if _response_cache is None or _response_cache.max_bytes != limit:
+        _response_cache = LRUCache(limit)
+    return _response_cache
+
+
+def make_etag(*parts: object) -> str:
+    """Build a strong ETag from the values that determine a representation."""
+
+    digest = hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=12).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Apply the weak comparison ``If-None-Match`` requires (RFC 9110 §13.1.2)."""
+
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(",")
+    )
+
+
+class RangeNotSatisfiable(Exception):
+    """Raised when a ``Range`` header selects no byte of the representation."""
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single ``bytes=`` range into ``(start, stop)`` offsets.
+
+    ``None`` means the header is absent, malformed or asks for several ranges,
+    in which case the whole representation is sent (RFC 9110 §14.2).
+    """
+
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, separator, last = header[len("bytes="):].strip().partition("-")
+    if not separator or not (first or last):
+        return None
+    if not (first or "0").isdigit() or not (last or "0").isdigit():
+        return None
+    if not first:
+        suffix = int(last)
+        if suffix == 0 or size == 0:
+            raise RangeNotSatisfiable
+        return max(0, size - suffix), size
+    start = int(first)
+    stop = int(last) + 1 if last else size
+    if last and stop <= start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable
+    return start, min(stop, size)
+
+
+def accepts_gzip(request: Request) -> bool:
+    """Whether ``Accept-Encoding`` allows a gzip-encoded response."""
+
+    for item in request.headers.get("accept-encoding", "").split(","):
+        coding, _, params = item.strip().partition(";")
+        if coding.strip().lower() in ("gzip", "x-gzip"):
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+async def conditional_json(
+    request: Request,
+    etag: str,
+    cache_key: Hashable,
+    render: Callable[[], Awaitable[bytes]],
+) -> Response:
+    """Answer with 304, a cached body, or a freshly rendered and cached body.
+
+    When ``Accept-Encoding`` allows it and the body reaches
+    ``CompressionSettings.min_bytes``, the response is gzip/deflate encoded
+    and the encoded body is cached under ``(cache_key, coding)``, so repeated
+    reads of an unchanged version never compress again. Encoded responses
+    carry their own ETag (see ``compression.encoded_etag``); ``If-None-Match``
+    accepts either validator.
+    """
+
+    options = get_settings().compression
+    coding = compression.negotiate(request.headers.get("accept-encoding"), options)
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if_none_match = request.headers.get("if-none-match")
+    encoded_etags = [compression.encoded_etag(etag, name) for name in compression.CODINGS]
+    for validator in (etag, *encoded_etags):
+        if etag_matches(if_none_match, validator):
+            RESPONSE_CACHE_REQUESTS.inc(result="not_modified")
+            headers["ETag"] = validator
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    cache = get_response_cache()
+    if coding is not None:
+        encoded = cache.get((cache_key, coding))
+        if encoded is not None:
+            RESPONSE_CACHE_REQUESTS.inc(result="hit")
+            return _encoded_response(encoded, coding, headers)
+
+    body = cache.get(cache_key)
+    if body is None:
+        RESPONSE_CACHE_REQUESTS.inc(result="miss")
+        body = await render()
+        cache.put(cache_key, body)
+    else:
+        RESPONSE_CACHE_REQUESTS.inc(result="hit")
+    if coding is None or len(body) < options.min_bytes:
+        return Response(content=body, media_type=JSON_MEDIA_TYPE, headers=headers)
+
+    if len(body) >= COMPRESS_OFFLOAD_BYTES:
+        encoded = await asyncio.to_thread(compression.compress, body, coding, options.level)
+    else:
+        encoded = compression.compress(body, coding, options.level)
+    cache.put((cache_key, coding), encoded)
+    return _encoded_response(encoded, coding, headers)
+
+
+def _encoded_response(body: bytes, coding: str, headers: dict) -> Response:
+    headers["ETag"] = compression.encoded_etag(headers["ETag"], coding)
+    headers["Content-Encoding"] = coding
+    return Response(content=body, media_type=JSON_MEDIA_TYPE, headers=headers)
@@ -3,35 +3,57 @@ from __future__ import annotations
 
 from fastapi import FastAPI
 
-from .config import get_settings
-from .db.core import bootstrap_databases, seed_records
-from .routers import health, modules
+from .admission import AdmissionMiddleware
+from .compression import CompressionMiddleware
+from .config import get_registry
+from .metrics import MetricsMiddleware
+from .db.batching import drain_batchers
+from .db.core import close_pools
+from .db.executor import shutdown_executors
+from .routers import admin, debug, health, metrics, modules, search
+from .services.retention import start_sweeper, stop_sweeper
 
 app = FastAPI(
     title="AURVO Backend",
     description="API modular para la hiperorquestación cognitiva de AURVO.",
     version="0.1.0",
 )
+# Compression runs innermost, so admission slots cover it; admission runs inside
+# MetricsMiddleware, which also counts the 503s.
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(AdmissionMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 
 @app.on_event("startup")
 async def startup_event() -> None:
-    """Initialise module databases on application startup."""
+    """Start watching the modules file and sweeping expired insights.
 
-    bootstrap_databases()
-    settings = get_settings()
-    for module in settings.modules.values():
-        seed_records(
-            module.slug,
-            [
-                ("descripcion", module.description),
-                ("estado", "operativo"),
-            ],
-        )
+    Databases are opened on first access.
+    """
+
+    registry = get_registry()
+    registry.start_watching(registry.settings.modules_reload_interval)
+    start_sweeper()
+
+
+@app.on_event("shutdown")
+async def shutdown_event() -> None:
+    """Flush queued writes, stop the executors and release pooled connections."""
+
+    get_registry().stop_watching()
+    stop_sweeper()
+    drain_batchers()
+    shutdown_executors()
+    close_pools()
 
 
 app.include_router(health.router)
 app.include_router(modules.router)
+app.include_router(search.router)
+app.include_router(metrics.router)
+app.include_router(admin.router)
+app.include_router(debug.router)
 
 
 @app.get("/", tags=["root"], summary="Bienvenida")
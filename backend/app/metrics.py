@@ -0,0 +1,336 @@
+"""Stdlib-only instrumentation exposed in the Prometheus text format.
+
+Metrics keep plain dictionaries keyed by label tuples behind one lock per
+metric, so recording a sample costs a dictionary lookup and a couple of
+additions. Rendering happens only when ``/metrics`` is scraped.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from . import profiling
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+ROW_BUCKETS: Tuple[float, ...] = (0, 1, 5, 10, 50, 100, 500, 1000, 5000, 10000, 100000)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names: Tuple[str, ...] = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:  # pragma: no cover - implemented by subclasses
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing value."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()) -> None:
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Gauge(Counter):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """Distribution of observations over fixed, cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labels)
+        self.buckets: Tuple[float, ...] = tuple(sorted(buckets))
+        # Per label set: [bucket counts..., +Inf count, sum]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            state[index] += 1
+            state[-1] += value
+
+    def count(self, **labels: str) -> int:
+        state = self._values.get(self._key(labels))
+        return int(sum(state[:-1])) if state else 0
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(state)) for key, state in self._values.items()]
+        lines = []
+        for key, state in items:
+            cumulative = 0.0
+            for bound, observed in zip(self.buckets + (float("inf"),), state[:-1]):
+                cumulative += observed
+                labels = _format_labels(
+                    self.label_names, key, f'le="{_format_value(bound)}"'
+                )
+                lines.append(f"{self.name}_bucket{labels} {_format_value(cumulative)}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {repr(state[-1])}")
+            lines.append(f"{self.name}_count{labels} {_format_value(cumulative)}")
+        return lines
+
+
+class CallbackMetric(_Metric):
+    """Counter or gauge whose samples are read from a callback when scraped.
+
+    Suits state that is already counted elsewhere (cache statistics), so the
+    hot path pays nothing extra.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Iterable[str],
+        callback: Callable[[], Iterable[Tuple[LabelValues, float]]],
+        *,
+        kind: str = "counter",
+    ) -> None:
+        super().__init__(name, documentation, labels)
+        self.kind = kind
+        self.callback = callback
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+            for key, value in self.callback()
+        ]
+
+
+class MetricsRegistry:
+    """Ordered collection of metrics rendered together."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"La métrica '{metric.name}' ya está registrada.")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUEST_DURATION = REGISTRY.register(
+    Histogram(
+        "aurvo_http_request_duration_seconds",
+        "Latencia de las peticiones HTTP por ruta y estado.",
+        ("method", "route", "status"),
+    )
+)
+HTTP_REQUESTS_IN_FLIGHT = REGISTRY.register(
+    Gauge("aurvo_http_requests_in_flight", "Peticiones HTTP en curso.", ("method",))
+)
+DB_QUERY_DURATION = REGISTRY.register(
+    Histogram(
+        "aurvo_db_query_duration_seconds",
+        "Tiempo de ejecución de las sentencias SQL por módulo.",
+        ("module", "statement"),
+    )
+)
+DB_ROWS_RETURNED = REGISTRY.register(
+    Histogram(
+        "aurvo_db_rows_returned",
+        "Filas devueltas por sentencia SQL.",
+        ("module", "statement"),
+        buckets=ROW_BUCKETS,
+    )
+)
+DB_CONNECTION_WAIT = REGISTRY.register(
+    Histogram(
+        "aurvo_db_connection_acquire_seconds",
+        "Espera para obtener una conexión del pool.",
+        ("module", "mode"),
+    )
+)
+
+DB_POOL_EVICTIONS = REGISTRY.register(
+    Counter(
+        "aurvo_db_pool_evictions_total",
+        "Pools de módulo cerrados por superar AURVO_DB_MAX_OPEN.",
+    )
+)
+
+
+class QueryTimer:
+    """Context manager recording SQL time (and optionally rows) for a statement."""
+
+    __slots__ = ("module", "statement", "rows", "_started")
+
+    def __init__(self, module: str, statement: str) -> None:
+        self.module = module
+        self.statement = statement
+        self.rows: Optional[int] = None
+        self._started = 0.0
+
+    def __enter__(self) -> "QueryTimer":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        elapsed = time.perf_counter() - self._started
+        DB_QUERY_DURATION.observe(elapsed, module=self.module, statement=self.statement)
+        profiling.record_phase("query", elapsed)
+        if self.rows is not None:
+            DB_ROWS_RETURNED.observe(self.rows, module=self.module, statement=self.statement)
+
+
+def track_query(module: str, statement: str) -> QueryTimer:
+    """Time the SQL executed inside the ``with`` block; set ``.rows`` if relevant."""
+
+    return QueryTimer(module, statement)
+
+
+def observe_connection_wait(seconds: float, module: str, mode: str) -> None:
+    """Record time spent obtaining a pooled connection (the ``connect`` phase)."""
+
+    DB_CONNECTION_WAIT.observe(seconds, module=module, mode=mode)
+    profiling.record_phase("connect", seconds)
+
+
+def _route_label(scope: Scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency per route template and status code.
+
+    It wraps ``send`` instead of using ``BaseHTTPMiddleware`` so streaming
+    responses are neither buffered nor moved to another task, and the
+    duration covers the full response body. Requests slower than
+    ``AURVO_SLOW_REQUEST_MS`` also land in ``profiling.SLOW_REQUESTS``.
+    """
+
+    def __init__(self, app: ASGIApp, clock: Callable[[], float] = time.perf_counter) -> None:
+        self.app = app
+        self.clock = clock
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        started = self.clock()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc(method=method)
+        timings = profiling.start_request()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec(method=method)
+            elapsed = self.clock() - started
+            route = _route_label(scope)
+            HTTP_REQUEST_DURATION.observe(
+                elapsed, method=method, route=route, status=str(status_code)
+            )
+            profiling.finish_request(
+                timings,
+                method=method,
+                path=scope["path"],
+                route=route,
+                status=status_code,
+                seconds=elapsed,
+            )
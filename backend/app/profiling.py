@@ -0,0 +1,240 @@
+"""On-demand diagnostics: a sampling profiler and the slow-request log.
+
+Both are stdlib-only and cost next to nothing while unused. The profiler is a
+background thread reading ``sys._current_frames()`` at a fixed interval and
+counting whole stacks, so the profiled code is never traced. Request phases
+(``connect``, ``query``, ``serialise``...) are recorded into a per-request
+``RequestTimings`` held in a context variable; ``executor.run_in_module``
+copies the context, so phases measured on module threads land in the request
+that waited for them.
+"""
+from __future__ import annotations
+
+import contextvars
+import logging
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from types import CodeType, FrameType
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+from .config import get_settings
+
+logger = logging.getLogger(__name__)
+
+MAX_STACK_DEPTH = 128
+_THREAD_SUFFIX = re.compile(r"_\d+$")
+
+
+class ProfilerBusyError(RuntimeError):
+    """Raised when a profile is requested while another one is running."""
+
+
+_profile_lock = threading.Lock()
+_labels: Dict[CodeType, str] = {}
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    label = _labels.get(code)
+    if label is None:
+        module = frame.f_globals.get("__name__", "?")
+        label = _labels[code] = f"{module}.{getattr(code, 'co_qualname', code.co_name)}"
+    return label
+
+
+def _thread_label(name: str) -> str:
+    # Pool threads (``aurvo-db_0``, ``aurvo-db_1``...) share one root.
+    return _THREAD_SUFFIX.sub("", name).replace(";", ":")
+
+
+def sample_stacks(seconds: float, *, interval: float = 0.005) -> Counter[str]:
+    """Sample every thread of the process for ``seconds`` and count their stacks.
+
+    Keys are collapsed stacks, root first and frames separated by ``;``,
+    starting with the thread name. Only one profile runs at a time; a second
+    caller gets ``ProfilerBusyError``.
+    """
+
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusyError("Ya hay un perfilado en curso.")
+    try:
+        me = threading.get_ident()
+        stacks: Counter[str] = Counter()
+        deadline = time.monotonic() + seconds
+        while True:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                labels: List[str] = []
+                current: Optional[FrameType] = frame
+                while current is not None and len(labels) < MAX_STACK_DEPTH:
+                    labels.append(_frame_label(current))
+                    current = current.f_back
+                labels.append(_thread_label(names.get(ident, f"thread-{ident}")))
+                stacks[";".join(reversed(labels))] += 1
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return stacks
+            time.sleep(min(interval, remaining))
+    finally:
+        _profile_lock.release()
+
+
+def collapse(stacks: Counter[str]) -> str:
+    """Render stack counts as ``frame;frame;frame count`` lines (flamegraph input)."""
+
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+class RequestTimings:
+    """Wall-clock time per phase of one request, possibly across several threads.
+
+    Each phase keeps the disjoint ``(start, end)`` spans it was in progress, so
+    calls running at once on different threads (a batch read fanning out to
+    many modules) count their overlap once instead of adding up.
+    """
+
+    __slots__ = ("_phases", "_lock")
+
+    def __init__(self) -> None:
+        self._phases: Dict[str, Tuple[List[Tuple[float, float]], List[int]]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, phase: str, seconds: float, *, end: Optional[float] = None) -> None:
+        """Record that ``phase`` ran for ``seconds`` ending at ``end`` (default: now)."""
+
+        end = time.perf_counter() if end is None else end
+        start = end - seconds
+        with self._lock:
+            spans, count = self._phases.setdefault(phase, ([], [0]))
+            count[0] += 1
+            # Spans are sorted and disjoint; a new one usually ends last, so
+            # only the tail needs to be looked at.
+            first = len(spans)
+            while first and spans[first - 1][1] >= start:
+                first -= 1
+            last = first
+            while last < len(spans) and spans[last][0] <= end:
+                start = min(start, spans[last][0])
+                end = max(end, spans[last][1])
+                last += 1
+            spans[first:last] = [(start, end)]
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            return {
+                phase: {
+                    "ms": round(sum(end - start for start, end in spans) * 1000, 3),
+                    "count": count[0],
+                }
+                for phase, (spans, count) in self._phases.items()
+            }
+
+
+_timings: contextvars.ContextVar[Optional[RequestTimings]] = contextvars.ContextVar(
+    "aurvo_request_timings", default=None
+)
+
+
+def record_phase(phase: str, seconds: float) -> None:
+    """Record ``seconds`` just spent in ``phase`` by the current request, if timed."""
+
+    timings = _timings.get()
+    if timings is not None:
+        timings.add(phase, seconds)
+
+
+@contextmanager
+def track_phase(phase: str) -> Iterator[None]:
+    """Time the ``with`` block as ``phase`` of the current request."""
+
+    timings = _timings.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(phase, time.perf_counter() - started)
+
+
+class SlowRequestLog:
+    """The most recent requests that took at least the configured threshold."""
+
+    def __init__(self) -> None:
+        self._entries: Deque[dict] = deque()
+        self._lock = threading.Lock()
+
+    def add(self, entry: dict, *, limit: int) -> None:
+        with self._lock:
+            self._entries.append(entry)
+            while len(self._entries) > limit:
+                self._entries.popleft()
+
+    def entries(self) -> List[dict]:
+        """Return the recorded requests, slowest first."""
+
+        with self._lock:
+            entries = list(self._entries)
+        return sorted(entries, key=lambda entry: entry["duration_ms"], reverse=True)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+SLOW_REQUESTS = SlowRequestLog()
+
+
+def start_request() -> Optional[contextvars.Token]:
+    """Begin timing the current request's phases unless the slow log is disabled."""
+
+    if get_settings().debug.slow_request_ms <= 0:
+        return None
+    return _timings.set(RequestTimings())
+
+
+def finish_request(
+    token: Optional[contextvars.Token],
+    *,
+    method: str,
+    path: str,
+    route: str,
+    status: int,
+    seconds: float,
+) -> None:
+    """Stop timing and log the request if it reached the slow threshold."""
+
+    if token is None:
+        return
+    timings = _timings.get()
+    _timings.reset(token)
+    options = get_settings().debug
+    duration_ms = seconds * 1000
+    if timings is None or duration_ms < options.slow_request_ms:
+        return
+    entry = {
+        "method": method,
+        "path": path,
+        "route": route,
+        "status": status,
+        "finished_at": datetime.now(timezone.utc),
+        "duration_ms": round(duration_ms, 3),
+        "phases": timings.snapshot(),
+    }
+    SLOW_REQUESTS.add(entry, limit=options.slow_request_log_size)
+    logger.warning(
+        "Petición lenta %s %s -> %s en %.1f ms: %s",
+        method,
+        path,
+        status,
+        duration_ms,
+        ", ".join(f"{name}={phase['ms']}ms" for name, phase in entry["phases"].items()),
+    )
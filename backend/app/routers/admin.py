@@ -0,0 +1,61 @@
+"""Administrative endpoints, reserved to holders of ``AURVO_ADMIN_TOKEN``.
+
+They create and list online snapshots of the module databases and collect
+unreferenced blobs.
+"""
+from __future__ import annotations
+
+import asyncio
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from ..auth import require_admin
+from ..schemas.admin import Snapshot
+from ..services import backups as backup_service
+from ..services import modules as module_service
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+
+@router.post(
+    "/snapshots",
+    response_model=Snapshot,
+    status_code=status.HTTP_201_CREATED,
+    summary="Crear snapshot en caliente",
+)
+async def create_snapshot(
+    module: Optional[List[str]] = Query(None, description="Módulos a copiar (todos por defecto)"),
+) -> Snapshot:
+    """Back up module databases while the API keeps serving reads and writes.
+
+    Each database is copied with SQLite's online backup API in page-sized
+    steps from a single read snapshot, so the copies are consistent.
+    """
+
+    try:
+        manifest = await backup_service.create_snapshot_async(module)
+    except KeyError as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
+    return Snapshot(**manifest)
+
+
+@router.get("/snapshots", response_model=list[Snapshot], summary="Listar snapshots")
+async def list_snapshots() -> list[Snapshot]:
+    """Return the stored snapshots, newest first."""
+
+    return [Snapshot(**manifest) for manifest in backup_service.list_snapshots()]
+
+
+@router.post("/blobs/gc", summary="Eliminar valores grandes sin referencias")
+async def collect_blob_garbage(
+    grace_seconds: float = Query(
+        3600, ge=0, description="Conservar archivos más recientes que estos segundos"
+    ),
+) -> dict:
+    """Delete offloaded values that no module row references any more."""
+
+    removed = await asyncio.to_thread(
+        module_service.collect_blob_garbage, grace_seconds=grace_seconds
+    )
+    return {"removed": removed}
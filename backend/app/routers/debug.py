@@ -0,0 +1,47 @@
+"""Diagnostics endpoints, reserved to holders of ``AURVO_ADMIN_TOKEN``."""
+from __future__ import annotations
+
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+
+from .. import profiling
+from ..auth import require_admin
+from ..schemas.admin import SlowRequest
+
+router = APIRouter(prefix="/debug", tags=["debug"], dependencies=[Depends(require_admin)])
+
+
+@router.get(
+    "/profile",
+    summary="Perfilar el proceso por muestreo",
+    response_class=Response,
+    responses={200: {"content": {"text/plain": {}}}, 409: {"description": "Perfilado en curso"}},
+)
+async def profile(
+    seconds: float = Query(5.0, gt=0, le=60, description="Duración del muestreo"),
+    interval_ms: float = Query(5.0, ge=1, le=1000, description="Intervalo entre muestras"),
+) -> Response:
+    """Sample every thread of this worker and return collapsed stacks.
+
+    Each line is ``thread;frame;...;frame count`` with the root first, ready
+    for ``flamegraph.pl`` or speedscope. Idle threads show up too, blocked in
+    their waiting frame. Only the worker process that answers is profiled.
+    """
+
+    try:
+        stacks = await asyncio.to_thread(
+            profiling.sample_stacks, seconds, interval=interval_ms / 1000
+        )
+    except profiling.ProfilerBusyError as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc)) from exc
+    return Response(content=profiling.collapse(stacks), media_type="text/plain; charset=utf-8")
+
+
+@router.get(
+    "/slow-requests", response_model=list[SlowRequest], summary="Peticiones lentas recientes"
+)
+async def slow_requests() -> list[SlowRequest]:
+    """Return the requests over ``AURVO_SLOW_REQUEST_MS`` kept by this worker, slowest first."""
+
+    return [SlowRequest(**entry) for entry in profiling.SLOW_REQUESTS.entries()]
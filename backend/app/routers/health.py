@@ -1,8 +1,11 @@
 """Health check endpoints."""
 from __future__ import annotations
 
-from fastapi import APIRouter
+import asyncio
 
+from fastapi import APIRouter, Response, status
+
+from ..config import list_modules
 from ..services import modules as module_service
 
 router = APIRouter(tags=["health"])
@@ -10,7 +13,34 @@ router = APIRouter(tags=["health"])
 
 @router.get("/health", summary="Estado del backend")
 async def healthcheck() -> dict:
-    """Return a minimal status payload for uptime monitors."""
+    """Cheap liveness probe for uptime monitors; it never touches the databases.
+
+    The per-module summaries it used to list under ``modules`` are served by
+    ``/health/ready``; only their count is reported here, as ``module_count``.
+    """
+
+    return {"status": "ok", "module_count": len(list_modules())}
+
+
+@router.get("/health/ready", summary="Disponibilidad de los módulos")
+async def readiness(response: Response) -> dict:
+    """Deep readiness check that queries every module database."""
+
+    modules = list_modules()
+    results = await asyncio.gather(
+        *(module_service.get_module_summary_async(module) for module in modules),
+        return_exceptions=True,
+    )
+
+    summaries = []
+    healthy = True
+    for module, result in zip(modules, results):
+        if isinstance(result, Exception):
+            healthy = False
+            summaries.append({"slug": module.slug, "error": str(result)})
+        else:
+            summaries.append(result)
 
-    summaries = module_service.list_module_summaries()
-    return {"status": "ok", "modules": summaries}
+    if not healthy:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {"status": "ok" if healthy else "degraded", "modules": summaries}
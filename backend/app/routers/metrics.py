@@ -0,0 +1,15 @@
+"""Prometheus metrics endpoint."""
+from __future__ import annotations
+
+from fastapi import APIRouter, Response
+
+from .. import metrics
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", summary="Métricas en formato Prometheus", response_class=Response)
+async def prometheus_metrics() -> Response:
+    """Expose request, SQL and connection pool metrics for Prometheus scrapers."""
+
+    return Response(content=metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
@@ -1,20 +1,83 @@
 """Module-related API endpoints."""
 from __future__ import annotations
 
-from fastapi import APIRouter, HTTPException, status
+from datetime import datetime
+from typing import List, Literal, Optional
 
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+
+from .. import config, http_cache, profiling
+from ..config import get_module
+from ..db.blobs import get_blob_store
+from ..services import changes as change_service
+from ..services import ingest
 from ..services import modules as module_service
-from ..schemas.module import InsightCreate, InsightResponse, ModuleDetail, ModuleSummary
+from ..schemas.module import (
+    BulkIngestResponse,
+    ChangeFeed,
+    FieldQueryResult,
+    InsightBatch,
+    InsightCreate,
+    InsightResponse,
+    ModuleDetail,
+    ModuleSummary,
+)
 
 router = APIRouter(prefix="/modules", tags=["modules"])
 
+_SUMMARY_LIST = TypeAdapter(list[ModuleSummary])
+
 
 @router.get("/", response_model=list[ModuleSummary], summary="Listar módulos")
-async def list_modules() -> list[ModuleSummary]:
-    """Return every configured module with its record count."""
+async def list_modules(
+    request: Request,
+    limit: Optional[int] = Query(
+        None, ge=1, le=1000, description="Módulos por página, en orden de `slug`"
+    ),
+    cursor: Optional[str] = Query(None, description="Último `slug` de la página anterior"),
+    counts: bool = Query(True, description="Incluir `records` (abre cada base de datos)"),
+) -> Response:
+    """Return the configured modules, optionally paged and without record counts.
+
+    With ``limit`` only that many modules (in slug order, after ``cursor``) are
+    returned and a ``Link: rel="next"`` header points at the following page.
+    ``counts=false`` answers from the configuration alone, without opening
+    any module database. The ETag covers the definitions and, when counts
+    are included, every listed module's content version.
+    """
+
+    if limit is None:
+        modules, next_cursor = config.list_modules(), None
+    else:
+        modules, next_cursor = config.list_modules_page(limit, cursor)
+    if counts:
+        summaries = await module_service.list_module_summaries_async(modules)
+    else:
+        summaries = [module_service.get_module_info(module) for module in modules]
+    state = tuple(
+        (
+            summary["slug"],
+            summary["title"],
+            summary["description"],
+            summary.get("version"),
+            tuple(summary["indexes"]),
+        )
+        for summary in summaries
+    )
+
+    async def render() -> bytes:
+        with profiling.track_phase("serialise"):
+            return _SUMMARY_LIST.dump_json([ModuleSummary(**summary) for summary in summaries])
 
-    summaries = module_service.list_module_summaries()
-    return [ModuleSummary(**summary) for summary in summaries]
+    response = await http_cache.conditional_json(
+        request, http_cache.make_etag("modules", state), ("modules", state), render
+    )
+    if next_cursor is not None:
+        next_url = request.url.include_query_params(cursor=next_cursor)
+        response.headers["Link"] = f'<{next_url}>; rel="next"'
+    return response
 
 
 @router.get(
@@ -22,14 +85,345 @@ async def list_modules() -> list[ModuleSummary]:
     response_model=ModuleDetail,
     summary="Detalle de un módulo",
 )
-async def retrieve_module(slug: str) -> ModuleDetail:
-    """Return metadata and the stored insights for a module."""
+async def retrieve_module(
+    request: Request,
+    slug: str,
+    limit: Optional[int] = Query(None, ge=1, le=10000, description="Tamaño de página"),
+    cursor: Optional[str] = Query(None, description="Clave a partir de la cual continuar"),
+    prefix: Optional[str] = Query(None, description="Filtrar claves por prefijo"),
+    updated_since: Optional[datetime] = Query(
+        None, description="Solo insights actualizados desde esta fecha (UTC)"
+    ),
+    stream: bool = Query(False, description="Transmitir el volcado completo por bloques"),
+):
+    """Return metadata and the stored insights for a module.
+
+    Results follow key order and can be paged with ``limit``/``cursor``.
+    ``stream=true`` ignores ``limit`` and streams every matching insight.
+
+    Responses carry a strong ETag derived from the module's content version and
+    the query; ``If-None-Match`` revalidation answers 304 without touching the
+    insights, and non-streamed bodies are served from the response cache.
+    Bodies are encoded straight from SQLite rows; ``response_model`` only
+    documents the shape in the OpenAPI schema.
+    """
+
+    try:
+        module = get_module(slug)
+    except KeyError as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
+
+    filters = {"cursor": cursor, "prefix": prefix, "updated_since": updated_since}
+    # The version is read before the page, so a concurrent write can only make
+    # the body newer than its ETag; the next request then sees a new version.
+    version = await module_service.get_module_version_async(slug)
+    query = (limit, cursor, prefix, updated_since and updated_since.isoformat(), stream)
+    etag = http_cache.make_etag(module.slug, module.title, module.description, version, query)
+
+    if stream:
+        if http_cache.etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(
+                status_code=status.HTTP_304_NOT_MODIFIED,
+                headers={"ETag": etag, "Cache-Control": "no-cache"},
+            )
+        return StreamingResponse(
+            module_service.stream_module_detail(slug, **filters),
+            media_type="application/json",
+            headers={"ETag": etag, "Cache-Control": "no-cache"},
+        )
+
+    async def render() -> bytes:
+        return await module_service.render_module_detail_async(slug, limit=limit, **filters)
+
+    return await http_cache.conditional_json(request, etag, (slug, etag), render)
+
+
+@router.get("/{slug}/query", response_model=FieldQueryResult, summary="Consultar por campo JSON")
+async def query_module(
+    request: Request,
+    slug: str,
+    field: str = Query(..., description="Campo JSON declarado en `indexes` del módulo"),
+    eq: Optional[str] = Query(
+        None, description="Igual a; se lee como JSON (`10`, `true`, `\"10\"`) o como texto"
+    ),
+    gt: Optional[str] = Query(None, description="Mayor que"),
+    gte: Optional[str] = Query(None, description="Mayor o igual que"),
+    lt: Optional[str] = Query(None, description="Menor que"),
+    lte: Optional[str] = Query(None, description="Menor o igual que"),
+    limit: int = Query(module_service.FIELD_QUERY_LIMIT, ge=1, le=10000),
+    cursor: Optional[str] = Query(None, description="`next_cursor` de la página anterior"),
+) -> Response:
+    """Filter insights by equality or range on an indexed JSON field.
+
+    Results are ordered by the field and then the key, and paged with
+    ``cursor``. The filter runs on the field's generated-column index inside
+    SQLite; responses carry an ETag like ``GET /modules/{slug}``.
+    """
+
+    try:
+        module = get_module(slug)
+    except KeyError as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
+    if field not in module.indexes:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"El campo '{field}' no está indexado en el módulo '{slug}'.",
+        )
+
+    operands = {"eq": eq, "gt": gt, "gte": gte, "lt": lt, "lte": lte}
+    filters = {
+        operator: module_service.parse_field_operand(raw)
+        for operator, raw in operands.items()
+        if raw is not None
+    }
+    version = await module_service.get_module_version_async(slug)
+    etag = http_cache.make_etag(
+        module.slug, "query", version, field, tuple(operands.items()), limit, cursor
+    )
+
+    async def render() -> bytes:
+        try:
+            result = await module_service.query_insights_async(
+                slug, field, filters, limit=limit, cursor=cursor
+            )
+        except module_service.FieldQueryError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc)
+            ) from exc
+        with profiling.track_phase("serialise"):
+            return FieldQueryResult(**result).model_dump_json().encode("utf-8")
+
+    return await http_cache.conditional_json(request, etag, (slug, etag), render)
+
+
+@router.get(
+    "/{slug}/changes",
+    response_model=ChangeFeed,
+    summary="Cambios de un módulo",
+    responses={200: {"content": {"text/event-stream": {}}}},
+)
+async def module_changes(
+    request: Request,
+    slug: str,
+    since: Optional[int] = Query(
+        None, ge=0, description="Último `seq` recibido; sin él se empieza desde ahora"
+    ),
+    wait: float = Query(
+        0, ge=0, le=60, description="Segundos a esperar si todavía no hay cambios (long-poll)"
+    ),
+    limit: int = Query(change_service.CHANGES_PAGE_SIZE, ge=1, le=10000),
+    shard: int = Query(0, ge=0, description="Shard a seguir en módulos particionados"),
+):
+    """Return the insight changes logged after ``since``.
+
+    With ``wait`` the request is held until a change arrives (long-poll).
+    Clients sending ``Accept: text/event-stream`` receive the feed as
+    Server-Sent Events instead; ``Last-Event-ID`` resumes an interrupted
+    stream. ``reset=true`` means older changes were compacted and the module
+    must be reloaded with ``GET /modules/{slug}``. Sharded modules have one
+    independent feed (and ``seq``) per shard, selected with ``shard``.
+    """
 
     try:
-        module = module_service.get_module_detail(slug)
+        module = get_module(slug)
     except KeyError as exc:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
-    return ModuleDetail(**module)
+    if shard >= module.shards:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"El módulo '{slug}' tiene {module.shards} shard(s).",
+        )
+
+    if "text/event-stream" in request.headers.get("accept", ""):
+        last_event_id = request.headers.get("last-event-id", "")
+        if since is None and last_event_id.isdigit():
+            since = int(last_event_id)
+        return StreamingResponse(
+            change_service.stream_changes(slug, since, limit=limit, shard=shard),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    if wait:
+        feed = await change_service.wait_for_changes(slug, since, wait, limit=limit, shard=shard)
+    else:
+        feed = await change_service.read_changes_async(slug, since, limit=limit, shard=shard)
+    return ChangeFeed(**feed)
+
+
+@router.get(
+    "/{slug}/export",
+    summary="Exportar insights",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {}, "text/csv": {}}}},
+)
+async def export_module(
+    slug: str,
+    format: Literal["ndjson", "csv"] = Query("ndjson", description="Formato de salida"),
+) -> StreamingResponse:
+    """Stream every insight of a module as NDJSON or CSV with constant memory.
+
+    The output is accepted as-is by ``POST /modules/{slug}/insights/bulk``.
+    """
+
+    try:
+        get_module(slug)
+    except KeyError as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
+
+    return StreamingResponse(
+        module_service.stream_module_export(slug, format),
+        media_type=module_service.EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{slug}.{format}"'},
+    )
+
+
+_VALUE_MEDIA_TYPE = "text/plain; charset=utf-8"
+
+
+@router.get(
+    "/{slug}/insights/{key:path}/value",
+    summary="Valor completo de un insight",
+    response_class=Response,
+    responses={
+        200: {"content": {"text/plain": {}}},
+        206: {"description": "Rango parcial del valor"},
+        304: {"description": "El valor no ha cambiado"},
+        416: {"description": "Rango no satisfacible"},
+    },
+)
+async def insight_value(request: Request, slug: str, key: str) -> Response:
+    """Serve the raw value of an insight, including values offloaded to blobs.
+
+    Supports ``If-None-Match`` and single ``Range`` requests. Offloaded values
+    are sent as their stored gzip file with ``Content-Encoding: gzip`` when
+    the client accepts it (ranges then address the compressed bytes, read via
+    ``mmap``); otherwise they are inflated on the fly.
+    """
+
+    try:
+        insight = await module_service.get_insight_async(slug, key)
+    except KeyError as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
+
+    ref = insight["value_ref"]
+    encoded = ref is not None and http_cache.accepts_gzip(request)
+    if ref is None:
+        body = insight["value"].encode("utf-8")
+        # ``updated_at`` has one-second resolution, so the value is part of the
+        # validator too: two overwrites within a second must not share an ETag.
+        etag = http_cache.make_etag(slug, key, insight["updated_at"], insight["value"])
+        size = len(body)
+    else:
+        store = get_blob_store()
+        etag = f'"{ref["sha256"]}{"-gz" if encoded else ""}"'
+        try:
+            # Checked before any byte is sent: once streaming, a missing file
+            # (lost in a restore without ``blobs/``) could only cut the body.
+            compressed_size = store.compressed_size(ref["sha256"])
+        except FileNotFoundError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"El valor del insight '{key}' no está en el almacén de blobs.",
+            ) from exc
+        size = compressed_size if encoded else ref["size"]
+
+    headers = {"ETag": etag, "Accept-Ranges": "bytes", "Vary": "Accept-Encoding"}
+    if encoded:
+        headers["Content-Encoding"] = "gzip"
+    if http_cache.etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    try:
+        selected = http_cache.parse_range(request.headers.get("range"), size)
+    except http_cache.RangeNotSatisfiable:
+        return Response(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            headers={**headers, "Content-Range": f"bytes */{size}"},
+        )
+    start, stop = selected or (0, size)
+    status_code = status.HTTP_200_OK
+    if selected is not None:
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+        headers["Content-Range"] = f"bytes {start}-{stop - 1}/{size}"
+    headers["Content-Length"] = str(stop - start)
+
+    if ref is None:
+        return Response(
+            body[start:stop], status_code=status_code, media_type=_VALUE_MEDIA_TYPE, headers=headers
+        )
+    # Synchronous iterators are consumed in Starlette's thread pool, so mmap
+    # page faults and inflation never block the event loop.
+    chunks = (
+        store.iter_compressed_range(ref["sha256"], start, stop)
+        if encoded
+        else store.iter_range(ref["sha256"], start, stop)
+    )
+    return StreamingResponse(
+        chunks, status_code=status_code, media_type=_VALUE_MEDIA_TYPE, headers=headers
+    )
+
+
+@router.get(
+    "/{slug}/insights/{key:path}",
+    response_model=InsightResponse,
+    summary="Obtener un insight",
+    responses={304: {"description": "El insight no ha cambiado"}},
+)
+async def retrieve_insight(request: Request, slug: str, key: str) -> Response:
+    """Return one insight by key, served from the insight cache when possible."""
+
+    try:
+        insight = await module_service.get_insight_async(slug, key)
+    except KeyError as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
+
+    ref = insight["value_ref"]
+    etag = http_cache.make_etag(
+        slug, key, insight["updated_at"], insight["value"] if ref is None else ref["sha256"]
+    )
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if http_cache.etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    with profiling.track_phase("serialise"):
+        body = InsightResponse(**insight).model_dump_json().encode("utf-8")
+    return Response(content=body, media_type=http_cache.JSON_MEDIA_TYPE, headers=headers)
+
+
+@router.get("/{slug}/insights", response_model=InsightBatch, summary="Obtener varios insights")
+async def retrieve_insights(
+    slug: str,
+    keys: List[str] = Query(
+        ...,
+        description="Claves a leer: separadas por comas en un único parámetro "
+        "(`?keys=a,b`) o repitiendo el parámetro (`?keys=a&keys=b`); al repetirlo, "
+        "cada valor es una clave completa, con sus comas",
+    ),
+) -> Response:
+    """Return several insights at once; keys that do not exist are listed in ``missing``.
+
+    A single ``keys`` value is a comma-separated list. Repeated ``keys`` values
+    are taken verbatim, which is how keys containing commas are requested.
+    Cached keys are answered from memory and the rest are read with one
+    query per shard.
+    """
+
+    raw_keys = keys[0].split(",") if len(keys) == 1 else keys
+    wanted = [key for key in raw_keys if key]
+    if len(wanted) > module_service.MULTI_GET_LIMIT:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=(
+                f"Se admiten como máximo {module_service.MULTI_GET_LIMIT} claves por petición."
+            ),
+        )
+    try:
+        result = await module_service.get_insights_async(slug, wanted)
+    except KeyError as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
+    with profiling.track_phase("serialise"):
+        body = InsightBatch(**result).model_dump_json().encode("utf-8")
+    return Response(content=body, media_type=http_cache.JSON_MEDIA_TYPE)
 
 
 @router.post(
@@ -39,10 +433,71 @@ async def retrieve_module(slug: str) -> ModuleDetail:
     summary="Crear o actualizar insight",
 )
 async def create_insight(slug: str, payload: InsightCreate) -> InsightResponse:
-    """Insert or update a module insight."""
+    """Insert or update a module insight, optionally expiring at ``expires_at``.
+
+    Omitting ``expires_at`` keeps the expiry an existing insight already has
+    (or applies the module's ``retention_seconds``); ``null`` clears it.
+    """
 
+    expires_at = (
+        payload.expires_at
+        if "expires_at" in payload.model_fields_set
+        else module_service.KEEP_EXPIRY
+    )
     try:
-        record = module_service.upsert_insight(slug, payload.key, payload.value)
+        record = await module_service.upsert_insight_async(
+            slug, payload.key, payload.value, expires_at
+        )
     except KeyError as exc:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
     return InsightResponse(**record)
+
+
+_INSIGHT_LIST_SCHEMA = {"type": "array", "items": {"$ref": "#/components/schemas/InsightCreate"}}
+
+
+@router.post(
+    "/{slug}/insights/bulk",
+    response_model=BulkIngestResponse,
+    summary="Carga masiva de insights",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": _INSIGHT_LIST_SCHEMA},
+                "application/x-ndjson": {
+                    "schema": {"$ref": "#/components/schemas/InsightCreate"}
+                },
+                "text/csv": {"schema": {"type": "string"}},
+            },
+        }
+    },
+)
+async def bulk_create_insights(slug: str, request: Request) -> BulkIngestResponse:
+    """Upsert a JSON array, NDJSON or CSV stream of insights in chunked transactions.
+
+    Rows are validated as they arrive; every full chunk is committed before the
+    rest of the body is read, so the payload is never buffered in memory.
+    """
+
+    try:
+        get_module(slug)
+    except KeyError as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
+
+    media_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if media_type in ingest.NDJSON_MEDIA_TYPES:
+        items = ingest.iter_ndjson(request.stream())
+    elif media_type in ingest.CSV_MEDIA_TYPES:
+        items = ingest.iter_csv(request.stream())
+    else:
+        items = ingest.iter_json_array(request.stream())
+
+    try:
+        result = await ingest.ingest_insights(slug, items)
+    except ingest.IngestError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail={"row": exc.row, "message": exc.message, "committed": exc.batches},
+        ) from exc
+    return BulkIngestResponse(**result)
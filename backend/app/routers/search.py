@@ -0,0 +1,24 @@
+"""Cross-module search endpoints."""
+from __future__ import annotations
+
+from fastapi import APIRouter, HTTPException, Query, status
+
+from ..schemas.module import SearchHit, SearchResponse
+from ..services import search as search_service
+
+router = APIRouter(tags=["search"])
+
+
+@router.get("/search", response_model=SearchResponse, summary="Buscar insights")
+async def search(
+    q: str = Query(..., min_length=1, description="Términos a buscar"),
+    limit: int = Query(20, ge=1, le=200, description="Máximo de resultados"),
+    raw: bool = Query(False, description="Interpretar `q` como sintaxis FTS5"),
+) -> SearchResponse:
+    """Full-text search over the key and value of every module's insights."""
+
+    try:
+        hits = await search_service.search_insights(q, limit=limit, raw=raw)
+    except search_service.SearchQueryError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    return SearchResponse(query=q, results=[SearchHit(**hit) for hit in hits])
@@ -0,0 +1,43 @@
+"""Pydantic models for administrative endpoints."""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Dict
+
+from pydantic import BaseModel, Field
+
+
+class SnapshotModule(BaseModel):
+    records: int = Field(..., description="Insights incluidos en la copia")
+    version: int = Field(..., description="Versión de datos del módulo en la copia")
+    bytes: int = Field(..., description="Tamaño de los archivos de la copia")
+    shards: int = Field(1, description="Archivos (shards) copiados del módulo")
+
+
+class Snapshot(BaseModel):
+    name: str = Field(..., description="Identificador del snapshot")
+    created_at: datetime = Field(..., description="Fecha de creación (UTC)")
+    modules: Dict[str, SnapshotModule]
+
+
+class RequestPhase(BaseModel):
+    ms: float = Field(
+        ...,
+        description=(
+            "Tiempo de reloj con la fase en curso (milisegundos); las llamadas "
+            "concurrentes de la misma fase no se suman"
+        ),
+    )
+    count: int = Field(..., description="Veces que la petición pasó por la fase")
+
+
+class SlowRequest(BaseModel):
+    method: str
+    path: str
+    route: str = Field(..., description="Plantilla de la ruta que atendió la petición")
+    status: int
+    finished_at: datetime = Field(..., description="Fin de la petición (UTC)")
+    duration_ms: float = Field(..., description="Duración total (milisegundos)")
+    phases: Dict[str, RequestPhase] = Field(
+        ..., description="Desglose por fase: queue, connect, initialise, query, write, serialise"
+    )
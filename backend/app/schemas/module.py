@@ -2,21 +2,43 @@
 from __future__ import annotations
 
 from datetime import datetime
+from typing import Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 
 
 class ModuleSummary(BaseModel):
     slug: str = Field(..., description="Identificador interno del módulo")
     title: str = Field(..., description="Nombre legible del módulo")
     description: str = Field(..., description="Descripción del dominio cognitivo")
-    records: int = Field(..., description="Cantidad de insights registrados")
+    records: Optional[int] = Field(
+        ..., description="Cantidad de insights registrados (`null` con `counts=false`)"
+    )
+    shards: int = Field(1, description="Archivos SQLite entre los que se reparten los insights")
+    indexes: list[str] = Field(
+        default_factory=list, description="Campos JSON indexados, consultables en `/query`"
+    )
+
+
+class ValueRef(BaseModel):
+    sha256: str = Field(..., description="Huella SHA-256 del valor almacenado aparte")
+    size: int = Field(..., description="Tamaño del valor en bytes (UTF-8)")
 
 
 class Insight(BaseModel):
     key: str = Field(..., description="Clave única del insight")
-    value: str = Field(..., description="Contenido del insight")
+    value: Optional[str] = Field(
+        ..., description="Contenido del insight; nulo si se almacena aparte (ver `value_ref`)"
+    )
     updated_at: datetime = Field(..., description="Fecha de la última actualización")
+    value_ref: Optional[ValueRef] = Field(
+        None,
+        description="Referencia a un valor grande, disponible en "
+        "`GET /modules/{slug}/insights/{key}/value`",
+    )
+    expires_at: Optional[datetime] = Field(
+        None, description="Fecha de caducidad (UTC); nula si el insight no caduca"
+    )
 
 
 class ModuleDetail(BaseModel):
@@ -24,12 +46,105 @@ class ModuleDetail(BaseModel):
     title: str
     description: str
     insights: list[Insight]
+    next_cursor: Optional[str] = Field(
+        None, description="Cursor para solicitar la siguiente página, si existe"
+    )
+
+
+class FieldQueryResult(BaseModel):
+    module: str
+    field: str = Field(..., description="Campo JSON consultado")
+    insights: list[Insight] = Field(..., description="Insights ordenados por el campo y la clave")
+    next_cursor: Optional[str] = Field(
+        None, description="Cursor para solicitar la siguiente página, si existe"
+    )
+
+
+class InsightBatch(BaseModel):
+    module: str
+    insights: list[Insight] = Field(..., description="Insights encontrados, en el orden pedido")
+    missing: list[str] = Field(..., description="Claves pedidas que no existen")
+
+
+VALUE_SUFFIX = "/value"
 
 
 class InsightCreate(BaseModel):
-    key: str = Field(..., description="Identificador del insight")
+    key: str = Field(
+        ..., description="Identificador del insight; no puede terminar en `/value`"
+    )
     value: str = Field(..., description="Información a registrar")
+    expires_at: Optional[datetime] = Field(
+        None,
+        description="Fecha de caducidad (UTC si no lleva zona); por defecto se aplica "
+        "`retention_seconds` del módulo, si lo tiene",
+    )
+
+    @field_validator("key")
+    @classmethod
+    def _key_is_addressable(cls, value: str) -> str:
+        # ``/insights/{key:path}/value`` would shadow ``/insights/{key:path}``
+        # for such a key, leaving its plain read unreachable.
+        if value.endswith(VALUE_SUFFIX):
+            raise ValueError(
+                f"La clave no puede terminar en '{VALUE_SUFFIX}': esa ruta está reservada "
+                "para descargar el valor."
+            )
+        return value
+
+    @field_validator("expires_at", mode="before")
+    @classmethod
+    def _blank_means_none(cls, value: object) -> object:
+        # CSV rows carry an empty column for insights that never expire.
+        return None if value == "" else value
 
 
 class InsightResponse(Insight):
     pass
+
+
+class BulkBatch(BaseModel):
+    batch: int = Field(..., description="Número de lote, empezando en 1")
+    received: int = Field(..., description="Insights recibidos en el lote")
+    inserted: int = Field(..., description="Insights nuevos")
+    updated: int = Field(..., description="Insights existentes actualizados")
+
+
+class BulkIngestResponse(BaseModel):
+    received: int
+    inserted: int
+    updated: int
+    batches: list[BulkBatch]
+
+
+class SearchHit(Insight):
+    module: str = Field(..., description="Módulo al que pertenece el insight")
+    rank: float = Field(..., description="Puntuación BM25 (menor es más relevante)")
+
+
+class SearchResponse(BaseModel):
+    query: str
+    results: list[SearchHit]
+
+
+class Change(BaseModel):
+    seq: int = Field(..., description="Número de secuencia del cambio")
+    key: str = Field(..., description="Clave del insight modificado")
+    value: Optional[str] = Field(
+        None, description="Nuevo valor; nulo si se eliminó o si se almacena aparte"
+    )
+    value_ref: Optional[ValueRef] = Field(None, description="Referencia a un valor grande")
+    deleted: bool = Field(False, description="Indica si el insight fue eliminado")
+    changed_at: datetime = Field(..., description="Momento del cambio (UTC)")
+
+
+class ChangeFeed(BaseModel):
+    module: str
+    shard: int = Field(0, description="Shard cuyo registro de cambios se lee")
+    changes: list[Change]
+    next_since: int = Field(..., description="Valor de `since` para la siguiente consulta")
+    reset: bool = Field(
+        False,
+        description="Se perdieron cambios compactados: recarga el módulo completo y "
+        "continúa desde `next_since`",
+    )
@@ -0,0 +1,203 @@
+"""Online snapshots of module databases and their restoration."""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import shutil
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from .. import metrics
+from ..config import get_module, get_settings, list_modules
+from ..db import core
+from ..db.blobs import BlobStore, get_blob_store
+from ..db.executor import run_in_module
+from .modules import clear_insight_cache
+
+MANIFEST_NAME = "manifest.json"
+
+
+class SnapshotError(ValueError):
+    """Raised when a snapshot does not exist or cannot be restored."""
+
+
+def _snapshot_stats(path: Path) -> tuple[dict, List[str]]:
+    """Read the maintained counters and referenced blobs of a snapshot file."""
+
+    connection = sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True)
+    try:
+        try:
+            digests = [
+                digest
+                for (digest,) in connection.execute(
+                    f"SELECT DISTINCT value_sha256 FROM {core.DATABASE_TABLE} "
+                    "WHERE value_sha256 IS NOT NULL"
+                )
+            ]
+        except sqlite3.OperationalError:  # snapshot predates value offloading
+            digests = []
+        stats = {
+            "records": core.get_record_count(connection),
+            "version": core.get_data_version(connection),
+            "bytes": path.stat().st_size,
+        }
+        return stats, digests
+    finally:
+        connection.close()
+
+
+def _copy_blobs(digests: Sequence[str], source: BlobStore, target: BlobStore) -> None:
+    """Hard-link (or copy) blob files; they are immutable, so links are safe."""
+
+    for digest in digests:
+        destination = target.path(digest)
+        if destination.exists():
+            continue
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.link(source.path(digest), destination)
+        except FileExistsError:
+            pass
+        except OSError:
+            shutil.copy2(source.path(digest), destination)
+
+
+def _snapshot_blob_store(directory: Path) -> BlobStore:
+    return BlobStore(directory / "blobs", threshold=0, level=1)
+
+
+def snapshot_module(slug: str, directory: Path) -> dict:
+    """Back up one module into ``directory`` without blocking its readers or writers.
+
+    Offloaded values referenced by the copy are linked into the snapshot too,
+    so it stays restorable after the live blobs are garbage collected. Each
+    shard of a sharded module is copied from its own read snapshot.
+    """
+
+    shards = get_module(slug).shards
+    totals = {"records": 0, "version": 0, "bytes": 0, "shards": shards}
+    for shard in range(shards):
+        target = directory / core.database_file_name(slug, shard)
+        with core.connect(slug, readonly=True, shard=shard) as connection, metrics.track_query(
+            slug, "backup"
+        ):
+            core.backup_database(
+                connection, target, pages=get_settings().database.backup_step_pages
+            )
+        stats, digests = _snapshot_stats(target)
+        _copy_blobs(digests, get_blob_store(), _snapshot_blob_store(directory))
+        for name, value in stats.items():
+            totals[name] += value
+    return totals
+
+
+def _new_snapshot_directory() -> tuple[str, Path]:
+    name = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    directory = get_settings().snapshots_path / name
+    directory.mkdir(parents=True)
+    return name, directory
+
+
+def _write_manifest(name: str, directory: Path, modules: Dict[str, dict]) -> dict:
+    manifest = {
+        "name": name,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "modules": modules,
+    }
+    (directory / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return manifest
+
+
+def _resolve_modules(slugs: Optional[Sequence[str]]) -> List[str]:
+    if not slugs:
+        return [module.slug for module in list_modules()]
+    return [get_module(slug).slug for slug in slugs]
+
+
+def create_snapshot(slugs: Optional[Sequence[str]] = None) -> dict:
+    """Snapshot ``slugs`` (every module by default) and return the manifest."""
+
+    targets = _resolve_modules(slugs)
+    name, directory = _new_snapshot_directory()
+    stats = core.for_each_module(
+        lambda module: snapshot_module(module.slug, directory),
+        [get_module(slug) for slug in targets],
+    )
+    return _write_manifest(name, directory, dict(zip(targets, stats)))
+
+
+async def create_snapshot_async(slugs: Optional[Sequence[str]] = None) -> dict:
+    """Awaitable ``create_snapshot`` backing up each module on its own executor."""
+
+    targets = _resolve_modules(slugs)
+    name, directory = _new_snapshot_directory()
+    stats = await asyncio.gather(
+        *(run_in_module(slug, snapshot_module, slug, directory) for slug in targets)
+    )
+    return _write_manifest(name, directory, dict(zip(targets, stats)))
+
+
+def list_snapshots() -> List[dict]:
+    """Return the manifests of every stored snapshot, newest first."""
+
+    root = get_settings().snapshots_path
+    manifests = []
+    for manifest in sorted(root.glob(f"*/{MANIFEST_NAME}"), reverse=True):
+        manifests.append(json.loads(manifest.read_text(encoding="utf-8")))
+    return manifests
+
+
+def resolve_snapshot(reference: str) -> Path:
+    """Map a snapshot name (or ``latest``, or a directory path) to its directory."""
+
+    root = get_settings().snapshots_path
+    if reference == "latest":
+        candidates = sorted(path.parent for path in root.glob(f"*/{MANIFEST_NAME}"))
+        if not candidates:
+            raise SnapshotError(f"No hay snapshots en {root}.")
+        return candidates[-1]
+    for candidate in (root / reference, Path(reference).expanduser()):
+        if (candidate / MANIFEST_NAME).is_file():
+            return candidate
+    raise SnapshotError(f"No existe el snapshot '{reference}'.")
+
+
+def restore_snapshot(reference: str, slugs: Optional[Sequence[str]] = None) -> List[str]:
+    """Replace module databases with the copies stored in a snapshot.
+
+    Meant to run while the API is stopped: pooled connections of this process
+    are closed first, but other processes must not have the databases open.
+    Sharded modules get the snapshot's shard layout back, so the module
+    configuration must declare the same ``shards``. Returns the restored
+    module slugs.
+    """
+
+    directory = resolve_snapshot(reference)
+    manifest = json.loads((directory / MANIFEST_NAME).read_text(encoding="utf-8"))
+    available = list(manifest["modules"])
+    targets = available if not slugs else list(slugs)
+    missing = [slug for slug in targets if slug not in available]
+    if missing:
+        raise SnapshotError(
+            f"El snapshot '{manifest['name']}' no contiene: {', '.join(missing)}."
+        )
+
+    core.close_pools()
+    clear_insight_cache()
+    data_dir = get_settings().data_dir
+    for slug in targets:
+        shards = manifest["modules"][slug].get("shards", 1)
+        for shard in range(shards):
+            name = core.database_file_name(slug, shard)
+            _, digests = _snapshot_stats(directory / name)
+            _copy_blobs(digests, _snapshot_blob_store(directory), get_blob_store())
+            core.restore_database(directory / name, data_dir / name)
+        # Drop shards beyond the snapshot's layout left by a wider one.
+        shard = shards
+        while (data_dir / core.database_file_name(slug, shard)).exists():
+            core.remove_database(data_dir / core.database_file_name(slug, shard))
+            shard += 1
+    return targets
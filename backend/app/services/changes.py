@@ -0,0 +1,208 @@
+"""Per-module change feed: incremental reads, long-poll and Server-Sent Events."""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Set, Tuple
+
+from .. import metrics
+from ..config import get_module
+from ..db import core
+from ..db.executor import run_in_module
+from ..schemas.module import Change
+
+# Upper bound between re-reads while waiting. Writes made by other processes
+# (which cannot notify this one) are noticed sooner through the shared commit
+# counter, checked every ``COUNTER_POLL_SECONDS``.
+CHANGES_POLL_SECONDS = 1.0
+COUNTER_POLL_SECONDS = 0.05
+SSE_HEARTBEAT_SECONDS = 15.0
+CHANGES_PAGE_SIZE = 1000
+
+_Waiter = Tuple[asyncio.AbstractEventLoop, asyncio.Event]
+_waiters: Dict[str, Set[_Waiter]] = {}
+_waiters_lock = threading.Lock()
+
+
+def _notify(slug: str) -> None:
+    """Wake every coroutine waiting for changes in ``slug`` (any thread)."""
+
+    with _waiters_lock:
+        waiters = list(_waiters.get(slug, ()))
+    for loop, event in waiters:
+        try:
+            loop.call_soon_threadsafe(event.set)
+        except RuntimeError:  # loop already closed
+            pass
+
+
+core.register_write_listener(_notify)
+
+
+@contextmanager
+def _subscribe(slug: str) -> Iterator[asyncio.Event]:
+    """Register an event that is set after every local write to ``slug``.
+
+    Subscribing before reading the log guarantees that a write landing between
+    the read and the wait still wakes the waiter.
+    """
+
+    waiter = (asyncio.get_running_loop(), asyncio.Event())
+    with _waiters_lock:
+        _waiters.setdefault(slug, set()).add(waiter)
+    try:
+        yield waiter[1]
+    finally:
+        with _waiters_lock:
+            waiters = _waiters.get(slug)
+            if waiters is not None:
+                waiters.discard(waiter)
+                if not waiters:
+                    del _waiters[slug]
+
+
+async def _wait(event: asyncio.Event, timeout: float, slug: str, shard: int) -> None:
+    """Wait for a local write, a foreign commit to ``shard`` or ``timeout``."""
+
+    deadline = time.monotonic() + timeout
+    counter = core.read_version_counter(slug, shard)
+    while True:
+        remaining = deadline - time.monotonic()
+        try:
+            await asyncio.wait_for(event.wait(), max(0.0, min(remaining, COUNTER_POLL_SECONDS)))
+            break
+        except asyncio.TimeoutError:
+            pass
+        if remaining <= COUNTER_POLL_SECONDS or core.read_version_counter(slug, shard) != counter:
+            break
+    event.clear()
+
+
+def read_changes(
+    slug: str,
+    since: Optional[int] = None,
+    *,
+    limit: int = CHANGES_PAGE_SIZE,
+    shard: int = 0,
+) -> dict:
+    """Return the changes logged after ``since``.
+
+    Without ``since`` the feed starts at the current head and no changes are
+    returned. ``reset`` is set when ``since`` predates the compacted part of
+    the log (or belongs to a different database); the caller must then
+    reload the module and continue from ``next_since``. Every shard of a
+    sharded module keeps its own log and sequence, so each is read separately.
+    """
+
+    get_module(slug)
+    with core.connect(slug, readonly=True, shard=shard) as connection, metrics.track_query(
+        slug, "fetch_changes"
+    ) as query:
+        floor, head = core.get_change_bounds(connection)
+        if since is None or since < floor or since > head:
+            query.rows = 0
+            return {
+                "module": slug,
+                "shard": shard,
+                "changes": [],
+                "next_since": head,
+                "reset": since is not None,
+            }
+        rows = core.fetch_changes(connection, since, limit)
+        query.rows = len(rows)
+    changes: List[dict] = [
+        {
+            "seq": seq,
+            "key": key,
+            "value": value if value_sha256 is None else None,
+            "value_ref": (
+                None if value_sha256 is None else {"sha256": value_sha256, "size": value_size}
+            ),
+            "deleted": value is None,
+            "changed_at": changed_at,
+        }
+        for seq, key, value, changed_at, value_sha256, value_size in rows
+    ]
+    return {
+        "module": slug,
+        "shard": shard,
+        "changes": changes,
+        "next_since": changes[-1]["seq"] if changes else since,
+        "reset": False,
+    }
+
+
+async def read_changes_async(slug: str, since: Optional[int] = None, **kwargs) -> dict:
+    """Awaitable ``read_changes`` running on the module's executor."""
+
+    get_module(slug)
+    return await run_in_module(slug, read_changes, slug, since, **kwargs)
+
+
+async def wait_for_changes(
+    slug: str,
+    since: Optional[int],
+    timeout: float,
+    *,
+    limit: int = CHANGES_PAGE_SIZE,
+    shard: int = 0,
+) -> dict:
+    """Long-poll: return as soon as changes after ``since`` exist, or after ``timeout``.
+
+    Without ``since`` the wait starts from the current head.
+    """
+
+    deadline = time.monotonic() + timeout
+    with _subscribe(slug) as written:
+        feed = await read_changes_async(slug, since, limit=limit, shard=shard)
+        feed["reset"] = feed["reset"] and since is not None
+        since = feed["next_since"]
+        while not feed["changes"] and not feed["reset"]:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            await _wait(written, min(remaining, CHANGES_POLL_SECONDS), slug, shard)
+            feed = await read_changes_async(slug, since, limit=limit, shard=shard)
+    return feed
+
+
+def _encode_event(event: str, seq: int, data: str) -> str:
+    return f"event: {event}\nid: {seq}\ndata: {data}\n\n"
+
+
+async def stream_changes(
+    slug: str, since: Optional[int], *, limit: int = CHANGES_PAGE_SIZE, shard: int = 0
+) -> AsyncIterator[bytes]:
+    """Yield the change feed as Server-Sent Events until the client disconnects.
+
+    Each change is a ``change`` event whose ``id`` is its ``seq``, so clients
+    resume with ``Last-Event-ID``. A ``reset`` event carries the sequence to
+    resume from after reloading the module; comments keep idle streams open.
+    """
+
+    with _subscribe(slug) as written:
+        feed = await read_changes_async(slug, since, limit=limit, shard=shard)
+        # Announce the starting point so a reconnect resumes from it.
+        yield f"retry: 1000\nid: {feed['next_since']}\n\n".encode("utf-8")
+        if since is None:
+            feed["reset"] = False
+        last_event = time.monotonic()
+        while True:
+            events = [
+                _encode_event("change", change["seq"], Change(**change).model_dump_json())
+                for change in feed["changes"]
+            ]
+            if feed["reset"]:
+                events.insert(0, _encode_event("reset", feed["next_since"], str(feed["next_since"])))
+            if events:
+                yield "".join(events).encode("utf-8")
+                last_event = time.monotonic()
+            elif time.monotonic() - last_event >= SSE_HEARTBEAT_SECONDS:
+                yield b": keep-alive\n\n"
+                last_event = time.monotonic()
+            since = feed["next_since"]
+            if len(feed["changes"]) < limit:
+                await _wait(written, CHANGES_POLL_SECONDS, slug, shard)
+            feed = await read_changes_async(slug, since, limit=limit, shard=shard)
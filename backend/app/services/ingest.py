@@ -0,0 +1,206 @@
+"""Streaming bulk ingestion of module insights."""
+from __future__ import annotations
+
+import codecs
+import csv
+import json
+from typing import AsyncIterable, AsyncIterator, List
+
+from pydantic import ValidationError
+
+from ..config import get_settings
+from ..schemas.module import InsightCreate
+from . import modules as module_service
+
+NDJSON_MEDIA_TYPES = frozenset({"application/x-ndjson", "application/ndjson", "application/jsonl"})
+CSV_MEDIA_TYPES = frozenset({"text/csv", "application/csv"})
+
+
+class IngestError(ValueError):
+    """Raised when a streamed row cannot be parsed or validated.
+
+    ``batches`` holds the per-batch results that were already committed before
+    the invalid row was reached.
+    """
+
+    def __init__(self, row: int, message: str, batches: List[dict]) -> None:
+        super().__init__(f"Fila {row}: {message}")
+        self.row = row
+        self.message = message
+        self.batches = batches
+
+
+async def _iter_text(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """Decode a byte stream as UTF-8 without splitting multi-byte characters."""
+
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    async for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+async def iter_ndjson(chunks: AsyncIterable[bytes]) -> AsyncIterator[object]:
+    """Yield one decoded JSON document per non-empty line of the stream."""
+
+    buffer = ""
+    row = 0
+    async for text in _iter_text(chunks):
+        buffer += text
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            if line.strip():
+                row += 1
+                yield _decode_line(line, row)
+    if buffer.strip():
+        yield _decode_line(buffer, row + 1)
+
+
+def _decode_line(line: str, row: int) -> object:
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError as exc:
+        raise IngestError(row, "JSON inválido.", []) from exc
+
+
+async def iter_json_array(chunks: AsyncIterable[bytes]) -> AsyncIterator[object]:
+    """Yield the objects of a top-level JSON array as soon as each is complete."""
+
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    started = False
+    expect_value = True
+    row = 0
+
+    async for text in _iter_text(chunks):
+        buffer = buffer[position:] + text
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position].isspace():
+                position += 1
+            if position >= len(buffer):
+                break
+            char = buffer[position]
+            if not started:
+                if char != "[":
+                    raise IngestError(0, "Se esperaba un arreglo JSON.", [])
+                started = True
+                position += 1
+                continue
+            if char == "]":
+                if expect_value and row:
+                    raise IngestError(row, "Coma final no permitida.", [])
+                return
+            if not expect_value:
+                if char != ",":
+                    raise IngestError(row, "Se esperaba ',' entre elementos.", [])
+                expect_value = True
+                position += 1
+                continue
+            if char != "{":
+                raise IngestError(row + 1, "Cada elemento debe ser un objeto JSON.", [])
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                break  # incomplete object, wait for more data
+            row += 1
+            expect_value = False
+            yield item
+
+    raise IngestError(row, "El arreglo JSON está incompleto.", [])
+
+
+async def _iter_csv_records(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """Yield the text of each complete CSV record, including quoted newlines.
+
+    A line break ends a record only when the quotes seen so far are balanced.
+    """
+
+    record = ""
+    quotes = 0
+    async for text in _iter_text(chunks):
+        *lines, tail = text.split("\n")
+        for line in lines:
+            record += line + "\n"
+            quotes += line.count('"')
+            if quotes % 2 == 0:
+                yield record
+                record = ""
+                quotes = 0
+        record += tail
+        quotes += tail.count('"')
+    if record.strip():
+        yield record
+
+
+async def iter_csv(chunks: AsyncIterable[bytes]) -> AsyncIterator[object]:
+    """Yield one ``{column: value}`` mapping per row of a CSV stream with a header.
+
+    The header must name ``key`` and ``value`` and may name ``expires_at``;
+    other columns (such as the ``updated_at`` written by the export) are ignored.
+    """
+
+    header = None
+    row = 0
+    async for record in _iter_csv_records(chunks):
+        try:
+            fields = next(csv.reader([record]), [])
+        except csv.Error as exc:
+            raise IngestError(row + 1, f"CSV inválido: {exc}.", []) from exc
+        if not fields:
+            continue
+        if header is None:
+            header = [name.strip().lstrip("\ufeff") for name in fields]
+            if "key" not in header or "value" not in header:
+                raise IngestError(0, "La cabecera CSV debe incluir 'key' y 'value'.", [])
+            continue
+        row += 1
+        if len(fields) != len(header):
+            raise IngestError(row, "Número de columnas distinto al de la cabecera.", [])
+        yield dict(zip(header, fields))
+
+
+async def ingest_insights(slug: str, items: AsyncIterable[object]) -> dict:
+    """Validate streamed items and upsert them in chunked transactions."""
+
+    batch_size = get_settings().database.bulk_batch_size
+    batches: List[dict] = []
+    pending: List[tuple] = []
+    row = 0
+
+    async def flush() -> None:
+        result = await module_service.upsert_insights_batch_async(slug, pending)
+        batches.append({"batch": len(batches) + 1, **result})
+        pending.clear()
+
+    try:
+        async for item in items:
+            row += 1
+            try:
+                insight = InsightCreate.model_validate(item)
+            except ValidationError as exc:
+                raise IngestError(row, exc.errors()[0]["msg"], batches) from exc
+            if "expires_at" in insight.model_fields_set:
+                pending.append((insight.key, insight.value, insight.expires_at))
+            else:
+                pending.append((insight.key, insight.value))
+            if len(pending) >= batch_size:
+                await flush()
+    except IngestError as exc:
+        if exc.batches is not batches:
+            raise IngestError(exc.row, exc.message, batches) from exc
+        raise
+
+    if pending:
+        await flush()
+
+    return {
+        "received": sum(batch["received"] for batch in batches),
+        "inserted": sum(batch["inserted"] for batch in batches),
+        "updated": sum(batch["updated"] for batch in batches),
+        "batches": batches,
+    }
@@ -1,68 +1,938 @@
 """Service layer for module data access."""
 from __future__ import annotations
 
-from typing import List
+import asyncio
+import base64
+import csv
+import heapq
+import io
+import json
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from itertools import islice
+from json.encoder import encode_basestring
+from operator import itemgetter
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Mapping, Optional, Sequence, Tuple, Union
 
-from ..config import get_module, list_modules
+from .. import metrics, profiling
+from ..cache import LRUCache
+from ..config import (
+    ModuleChanges,
+    ModuleDefinition,
+    get_module,
+    get_settings,
+    list_modules,
+    subscribe_module_changes,
+)
 from ..db import core
+from ..db.blobs import get_blob_store
+from ..db.batching import drop_batcher, get_batcher
+from ..db.executor import run_in_module, wait_for_module
+
+STREAM_CHUNK_SIZE = 500
+# Pass as ``expires_at`` when a write does not mention it (see ``core.KEEP_EXPIRY``).
+KEEP_EXPIRY = core.KEEP_EXPIRY
+ExpiresAt = Union[datetime, None, core.KeepExpiry]
+
+
+def default_seed_records(module: ModuleDefinition) -> List[tuple[str, str]]:
+    """Return the insights every module database starts with."""
+
+    return [
+        ("descripcion", module.description),
+        ("estado", "operativo"),
+    ]
+
+
+def _seed_default_records(
+    connection: sqlite3.Connection, module: ModuleDefinition, shard: int
+) -> None:
+    records = core.group_by_shard(default_seed_records(module), module.shards).get(shard, [])
+    keys = core.write_seed_records(connection, records)
+    if keys:
+        core.notify_keys_written(module.slug, keys)
+
+
+def _sync_json_indexes(
+    connection: sqlite3.Connection, module: ModuleDefinition, shard: int
+) -> None:
+    core.sync_json_indexes(connection, module.indexes)
+
+
+core.register_database_initialiser(_sync_json_indexes)
+core.register_database_initialiser(_seed_default_records)
+
+
+def bootstrap_modules() -> None:
+    """Create, migrate and seed every configured module database in parallel."""
+
+    core.bootstrap_databases()
+
+
+def _retire_module(module: ModuleDefinition) -> None:
+    drop_batcher(module.slug)
+    wait_for_module(module.slug)
+    core.drain_pool(module)
+
+
+def apply_module_changes(changes: ModuleChanges) -> None:
+    """React to a module registry reload.
+
+    Added modules need nothing: they are bootstrapped on first access.
+    Removed modules are drained in the background, and open modules whose
+    definition changed get their JSON indexes and default records refreshed.
+    Closed ones are refreshed when next opened, but their cached default
+    records are dropped right away so they are not served meanwhile.
+    """
+
+    if changes.removed:
+        clear_insight_cache()
+    for module in changes.removed:
+        threading.Thread(
+            target=_retire_module, args=(module,), name=f"aurvo-retire-{module.slug}"
+        ).start()
+    for module in changes.changed:
+        # Closed databases pick the new definition up when they are next opened.
+        if not any(core.is_pool_open(module.slug, shard) for shard in range(module.shards)):
+            core.notify_keys_written(module.slug, [key for key, _ in default_seed_records(module)])
+            continue
+        for shard in range(module.shards):
+            with core.connect(module.slug, shard=shard) as connection:
+                core.sync_json_indexes(connection, module.indexes)
+        core.seed_records(module.slug, default_seed_records(module))
+
+
+subscribe_module_changes(apply_module_changes)
+
+
+def get_module_info(module: ModuleDefinition) -> dict:
+    """Return a module's configured metadata without opening its database."""
+
+    return {
+        "slug": module.slug,
+        "title": module.title,
+        "description": module.description,
+        "records": None,
+        "shards": module.shards,
+        "indexes": list(module.indexes),
+    }
+
+
+def get_module_summary(module: ModuleDefinition) -> dict:
+    """Return metadata and basic statistics for a single module.
+
+    Counters of sharded modules are summed; every shard's version only grows,
+    so their sum still changes whenever any row does.
+    """
+
+    count = version = 0
+    for shard in range(module.shards):
+        with core.connect(module.slug, readonly=True, shard=shard) as connection:
+            with metrics.track_query(module.slug, "record_count"):
+                count += core.get_record_count(connection)
+                version += core.get_data_version(connection)
+    return {**get_module_info(module), "records": count, "version": version}
 
 
 def list_module_summaries() -> List[dict]:
     """Return metadata and basic statistics for each module."""
 
-    summaries = []
+    return [get_module_summary(module) for module in list_modules()]
+
+
+def get_module_version(slug: str) -> int:
+    """Return the module's content version; it changes whenever a row does."""
+
+    version = 0
+    for shard in range(get_module(slug).shards):
+        with core.connect(slug, readonly=True, shard=shard) as connection, metrics.track_query(
+            slug, "data_version"
+        ):
+            version += core.get_data_version(connection)
+    return version
+
+
+# Rough per-entry cost of a cached insight beyond its key and value text:
+# the dict, the (slug, key) tuple, the timestamp and the LRU bookkeeping.
+INSIGHT_ENTRY_OVERHEAD = 400
+# Keys accepted by one multi-get request.
+MULTI_GET_LIMIT = 1000
+
+_insight_cache: Optional[LRUCache[dict]] = None
+_insight_cache_root: Optional[Path] = None
+
+
+def _insight_size(insight: dict) -> int:
+    return INSIGHT_ENTRY_OVERHEAD + len(insight["key"]) + len(insight["value"] or "")
+
+
+def get_insight_cache() -> LRUCache[dict]:
+    """Return the process-wide read-through cache of insights keyed by ``(slug, key)``."""
+
+    global _insight_cache, _insight_cache_root
+    settings = get_settings()
+    options = settings.cache
+    cache = _insight_cache
+    if (
+        cache is None
+        or _insight_cache_root != settings.data_dir
+        or cache.max_bytes != options.insight_bytes
+        or cache.ttl_seconds != (options.insight_ttl_seconds or None)
+    ):
+        cache = _insight_cache = LRUCache(
+            options.insight_bytes, sizeof=_insight_size, ttl_seconds=options.insight_ttl_seconds
+        )
+        _insight_cache_root = settings.data_dir
+    return cache
+
+
+def _invalidate_insights(slug: str, keys: Sequence[str]) -> None:
+    cache = _insight_cache
+    if cache is not None:
+        for key in keys:
+            cache.discard((slug, key))
+
+
+core.register_key_listener(_invalidate_insights)
+
+
+def _cache_events() -> List[Tuple[Tuple[str, ...], float]]:
+    cache = _insight_cache
+    if cache is None:
+        return []
+    return [
+        (("hit",), cache.hits),
+        (("miss",), cache.misses),
+        (("eviction",), cache.evictions),
+        (("expiration",), cache.expirations),
+    ]
+
+
+INSIGHT_CACHE_EVENTS = metrics.REGISTRY.register(
+    metrics.CallbackMetric(
+        "aurvo_insight_cache_events_total",
+        "Aciertos, fallos, desalojos y expiraciones de la caché de insights.",
+        ("event",),
+        _cache_events,
+    )
+)
+INSIGHT_CACHE_BYTES = metrics.REGISTRY.register(
+    metrics.CallbackMetric(
+        "aurvo_insight_cache_bytes",
+        "Tamaño estimado de los insights en caché.",
+        (),
+        lambda: [((), _insight_cache.size)] if _insight_cache is not None else [],
+        kind="gauge",
+    )
+)
+
+
+def _foreign_writes_pending(slug: str) -> bool:
+    return any(
+        core.foreign_writes_pending(slug, shard) for shard in range(get_module(slug).shards)
+    )
+
+
+def _discard_foreign_writes(slug: str) -> None:
+    """Drop cached insights of ``slug`` that other worker processes have changed."""
+
+    for shard in range(get_module(slug).shards):
+        keys = core.sync_foreign_writes(slug, shard)
+        if keys is None:
+            clear_insight_cache()
+        elif keys:
+            _invalidate_insights(slug, keys)
+
+
+def _cached_insights(slug: str, keys: Sequence[str]) -> Tuple[Dict[str, dict], List[str]]:
+    """Split ``keys`` into cached insights (copied) and keys still to be loaded."""
+
+    cache = get_insight_cache()
+    found: Dict[str, dict] = {}
+    misses: List[str] = []
+    for key in keys:
+        cached = cache.get((slug, key))
+        if cached is None:
+            misses.append(key)
+        else:
+            found[key] = dict(cached)
+    return found, misses
+
+
+def _load_insights(slug: str, keys: Sequence[str]) -> Dict[str, dict]:
+    """Read ``keys`` with one ``IN (...)`` query per shard and cache what exists.
+
+    Generations are taken before reading, so a row loaded just before a
+    concurrent write invalidates it is not cached.
+    """
+
+    cache = get_insight_cache()
+    module = get_module(slug)
+    generations = {key: cache.generation((slug, key)) for key in keys}
+    by_shard: Dict[int, List[str]] = {}
+    for key in keys:
+        by_shard.setdefault(core.shard_for_key(key, module.shards), []).append(key)
+
+    loaded: Dict[str, dict] = {}
+    for shard, shard_keys in by_shard.items():
+        for batch in core.iter_batches(shard_keys, core.SEED_LOOKUP_SIZE):
+            placeholders = ", ".join("?" for _ in batch)
+            with core.connect(slug, readonly=True, shard=shard) as connection, metrics.track_query(
+                slug, "get_insights"
+            ) as query:
+                rows = connection.execute(
+                    f"SELECT {core.INSIGHT_COLUMNS} FROM {core.DATABASE_TABLE} "
+                    f"WHERE key IN ({placeholders})",
+                    batch,
+                ).fetchall()
+                query.rows = len(rows)
+            for row in rows:
+                insight = core.insight_from_row(*row)
+                cache.put((slug, insight["key"]), insight, generation=generations[insight["key"]])
+                loaded[insight["key"]] = dict(insight)
+    return loaded
+
+
+def get_insight(slug: str, key: str) -> dict:
+    """Return one insight (with ``value_ref`` if offloaded) or raise ``KeyError``.
+
+    Served from the insight cache when possible; misses read the key's shard
+    and populate the cache.
+    """
+
+    get_module(slug)
+    _discard_foreign_writes(slug)
+    found, misses = _cached_insights(slug, [key])
+    if misses:
+        found = _load_insights(slug, misses)
+    if key not in found:
+        raise KeyError(f"No existe el insight '{key}' en el módulo '{slug}'.")
+    return found[key]
+
+
+async def get_insight_async(slug: str, key: str) -> dict:
+    """Awaitable ``get_insight``; cache hits are answered without leaving the loop.
+
+    Writes from other worker processes are detected with a memory read; only
+    then is the change log replayed, on the module's executor.
+    """
+
+    get_module(slug)
+    if not _foreign_writes_pending(slug):
+        found, misses = _cached_insights(slug, [key])
+        if not misses:
+            return found[key]
+    return await run_in_module(slug, get_insight, slug, key)
+
+
+def _multi_get_result(slug: str, keys: Sequence[str], found: Mapping[str, dict]) -> dict:
+    return {
+        "module": slug,
+        "insights": [found[key] for key in keys if key in found],
+        "missing": [key for key in keys if key not in found],
+    }
+
+
+def get_insights(slug: str, keys: Sequence[str]) -> dict:
+    """Return the insights for ``keys`` (in request order) and the keys that do not exist.
+
+    Cached keys are answered from memory and the rest are loaded together.
+    """
+
+    get_module(slug)
+    _discard_foreign_writes(slug)
+    keys = list(dict.fromkeys(keys))
+    found, misses = _cached_insights(slug, keys)
+    if misses:
+        found.update(_load_insights(slug, misses))
+    return _multi_get_result(slug, keys, found)
+
+
+async def get_insights_async(slug: str, keys: Sequence[str]) -> dict:
+    """Awaitable ``get_insights``; only cache misses are sent to the module's executor."""
+
+    get_module(slug)
+    if _foreign_writes_pending(slug):
+        return await run_in_module(slug, get_insights, slug, keys)
+    keys = list(dict.fromkeys(keys))
+    found, misses = _cached_insights(slug, keys)
+    if misses:
+        found.update(await run_in_module(slug, _load_insights, slug, misses))
+    return _multi_get_result(slug, keys, found)
+
+
+def clear_insight_cache() -> None:
+    """Forget every cached insight (after databases are replaced wholesale)."""
+
+    if _insight_cache is not None:
+        _insight_cache.clear()
+
+
+def collect_blob_garbage(*, grace_seconds: float = 3600.0) -> int:
+    """Delete offloaded values that no module references any more.
+
+    Every configured module is scanned for the digests it uses; files newer
+    than ``grace_seconds`` are kept for writes that have not committed yet.
+    """
+
+    referenced: set[str] = set()
     for module in list_modules():
-        with core.connect(module.slug) as connection:
-            core.initialise_database(connection)
-            count = connection.execute(
-                f"SELECT COUNT(*) AS count FROM {core.DATABASE_TABLE}"
-            ).fetchone()["count"]
-        summaries.append(
-            {
-                "slug": module.slug,
-                "title": module.title,
-                "description": module.description,
-                "records": count,
-            }
+        for shard in range(module.shards):
+            with core.connect(module.slug, readonly=True, shard=shard) as connection:
+                referenced.update(
+                    digest
+                    for (digest,) in connection.execute(
+                        f"SELECT DISTINCT value_sha256 FROM {core.DATABASE_TABLE} "
+                        "WHERE value_sha256 IS NOT NULL"
+                    )
+                )
+    return get_blob_store().collect_garbage(referenced, grace_seconds=grace_seconds)
+
+
+def _prefix_upper_bound(prefix: str) -> Optional[str]:
+    """Return the smallest string greater than every string starting with ``prefix``."""
+
+    while prefix:
+        last = ord(prefix[-1])
+        if last < 0x10FFFF:
+            return prefix[:-1] + chr(last + 1)
+        prefix = prefix[:-1]
+    return None
+
+
+def _sqlite_timestamp(value: datetime) -> str:
+    """Format a datetime like SQLite's ``datetime('now')`` (UTC, no offset)."""
+
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.strftime("%Y-%m-%d %H:%M:%S")
+
+
+InsightRow = Tuple[str, str, str, Optional[str], Optional[int], Optional[str]]
+
+
+def _insight_query(
+    *,
+    limit: Optional[int],
+    after: Optional[str],
+    prefix: Optional[str],
+    updated_since: Optional[datetime],
+) -> tuple[str, List[object]]:
+    """Build the keyset query shared by ``fetch_insights`` and the JSON fast path."""
+
+    clauses: List[str] = []
+    params: List[object] = []
+    if after is not None:
+        clauses.append("key > ?")
+        params.append(after)
+    if prefix:
+        clauses.append("key >= ?")
+        params.append(prefix)
+        upper = _prefix_upper_bound(prefix)
+        if upper is not None:
+            clauses.append("key < ?")
+            params.append(upper)
+    if updated_since is not None:
+        clauses.append("updated_at >= ?")
+        params.append(_sqlite_timestamp(updated_since))
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    params.append(-1 if limit is None else limit)
+    sql = f"""
+        SELECT {core.INSIGHT_COLUMNS} FROM {core.DATABASE_TABLE}
+        {where}
+        ORDER BY key
+        LIMIT ?
+    """
+    return sql, params
+
+
+def fetch_insight_rows(
+    slug: str,
+    *,
+    limit: Optional[int] = None,
+    after: Optional[str] = None,
+    prefix: Optional[str] = None,
+    updated_since: Optional[datetime] = None,
+) -> List[InsightRow]:
+    """Like ``fetch_insights`` but return plain tuples of ``core.INSIGHT_COLUMNS``.
+
+    The cursor bypasses the pool's ``sqlite3.Row`` factory, so no per-row
+    objects are built beyond the tuples SQLite already produces. Sharded
+    modules run the same keyset query on every shard and k-way merge the
+    key-ordered results; each shard contributes at most ``limit`` rows.
+    """
+
+    sql, params = _insight_query(
+        limit=limit, after=after, prefix=prefix, updated_since=updated_since
+    )
+    per_shard = []
+    for shard in range(get_module(slug).shards):
+        with core.connect(slug, readonly=True, shard=shard) as connection, metrics.track_query(
+            slug, "fetch_insights"
+        ) as query:
+            cursor = connection.cursor()
+            cursor.row_factory = None
+            per_shard.append(cursor.execute(sql, params).fetchall())
+            query.rows = len(per_shard[-1])
+    if len(per_shard) == 1:
+        return per_shard[0]
+    merged = heapq.merge(*per_shard, key=itemgetter(0))
+    return list(merged if limit is None else islice(merged, limit))
+
+
+def fetch_insights(
+    slug: str,
+    *,
+    limit: Optional[int] = None,
+    after: Optional[str] = None,
+    prefix: Optional[str] = None,
+    updated_since: Optional[datetime] = None,
+) -> List[dict]:
+    """Return insights in key order, walking the ``key`` index from ``after``.
+
+    ``prefix`` is turned into a key range so it is also served by the index;
+    ``updated_since`` is applied while scanning that range.
+    """
+
+    return [
+        core.insight_from_row(*row)
+        for row in fetch_insight_rows(
+            slug, limit=limit, after=after, prefix=prefix, updated_since=updated_since
         )
-    return summaries
+    ]
 
 
-def get_module_detail(slug: str) -> dict:
-    """Return the module metadata together with its insights."""
+def get_module_detail(
+    slug: str,
+    *,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    prefix: Optional[str] = None,
+    updated_since: Optional[datetime] = None,
+) -> dict:
+    """Return the module metadata together with one page of its insights.
+
+    Without ``limit`` every matching insight is returned. Otherwise
+    ``next_cursor`` holds the key to pass as ``cursor`` for the next page.
+    """
 
     module = get_module(slug)
-    with core.connect(slug) as connection:
-        rows = connection.execute(
-            f"SELECT key, value, updated_at FROM {core.DATABASE_TABLE} ORDER BY key"
-        ).fetchall()
+    insights = fetch_insights(
+        slug,
+        limit=None if limit is None else limit + 1,
+        after=cursor,
+        prefix=prefix,
+        updated_since=updated_since,
+    )
+    next_cursor = None
+    if limit is not None and len(insights) > limit:
+        insights = insights[:limit]
+        next_cursor = insights[-1]["key"]
     return {
         "slug": module.slug,
         "title": module.title,
         "description": module.description,
-        "insights": [dict(row) for row in rows],
+        "insights": insights,
+        "next_cursor": next_cursor,
+    }
+
+
+class FieldQueryError(ValueError):
+    """Raised when a field query names an undeclared field or carries a bad cursor."""
+
+
+# Comparison operators accepted by ``query_insights``.
+FIELD_OPERATORS = {"eq": "=", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+FIELD_QUERY_LIMIT = 100
+
+
+def parse_field_operand(raw: str) -> object:
+    """Read a query-string operand as a JSON scalar, falling back to plain text.
+
+    ``10`` and ``2.5`` compare as numbers, ``true``/``false`` as SQLite's 1/0
+    (what ``json_extract`` yields for booleans) and ``"10"`` as text.
+    """
+
+    try:
+        value = json.loads(raw)
+    except ValueError:
+        return raw
+    if isinstance(value, bool):
+        return int(value)
+    return value if isinstance(value, (int, float, str)) else raw
+
+
+def _encode_field_cursor(value: object, key: str) -> str:
+    payload = json.dumps([value, key], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+
+def _decode_field_cursor(cursor: str) -> Tuple[object, str]:
+    try:
+        value, key = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError) as exc:
+        raise FieldQueryError("El cursor de la consulta no es válido.") from exc
+    if not isinstance(key, str):
+        raise FieldQueryError("El cursor de la consulta no es válido.")
+    return value, key
+
+
+def _sqlite_order(row: tuple) -> tuple:
+    """Sort key matching SQLite's ``ORDER BY value, key`` (numbers before text)."""
+
+    value = row[0]
+    rank = 0 if isinstance(value, (int, float)) else 1 if isinstance(value, str) else 2
+    return rank, value, row[1]
+
+
+def query_insights(
+    slug: str,
+    field: str,
+    filters: Mapping[str, object],
+    *,
+    limit: int = FIELD_QUERY_LIMIT,
+    cursor: Optional[str] = None,
+) -> dict:
+    """Return insights whose JSON ``field`` satisfies ``filters``, ordered by that field.
+
+    ``field`` must be one of the module's declared ``indexes``; ``filters``
+    maps ``FIELD_OPERATORS`` names to operands. The filter, the ordering and
+    the ``(field, key)`` keyset pagination all run on the generated column's
+    index. Insights whose value lacks the field are never returned.
+    """
+
+    module = get_module(slug)
+    if field not in module.indexes:
+        raise FieldQueryError(f"El campo '{field}' no está indexado en el módulo '{slug}'.")
+    column = core.json_index_column(field)
+    clauses = [f"{column} IS NOT NULL"]
+    params: List[object] = []
+    for operator, operand in filters.items():
+        clauses.append(f"{column} {FIELD_OPERATORS[operator]} ?")
+        params.append(operand)
+    if cursor is not None:
+        clauses.append(f"({column}, key) > (?, ?)")
+        params.extend(_decode_field_cursor(cursor))
+    params.append(limit + 1)
+    sql = f"""
+        SELECT {column}, {core.INSIGHT_COLUMNS} FROM {core.DATABASE_TABLE}
+        WHERE {' AND '.join(clauses)}
+        ORDER BY {column}, key
+        LIMIT ?
+    """
+
+    per_shard = []
+    for shard in range(module.shards):
+        with core.connect(slug, readonly=True, shard=shard) as connection, metrics.track_query(
+            slug, "query_field"
+        ) as query:
+            sql_cursor = connection.cursor()
+            sql_cursor.row_factory = None
+            per_shard.append(sql_cursor.execute(sql, params).fetchall())
+            query.rows = len(per_shard[-1])
+    rows = per_shard[0] if len(per_shard) == 1 else heapq.merge(*per_shard, key=_sqlite_order)
+    page = list(islice(rows, limit + 1))
+
+    next_cursor = None
+    if len(page) > limit:
+        del page[limit:]
+        next_cursor = _encode_field_cursor(page[-1][0], page[-1][1])
+    return {
+        "module": slug,
+        "field": field,
+        "insights": [core.insight_from_row(*row[1:]) for row in page],
+        "next_cursor": next_cursor,
+    }
+
+
+async def query_insights_async(
+    slug: str, field: str, filters: Mapping[str, object], **kwargs
+) -> dict:
+    """Awaitable ``query_insights`` running on the module's executor."""
+
+    get_module(slug)
+    return await run_in_module(slug, query_insights, slug, field, filters, **kwargs)
+
+
+def upsert_insight(
+    slug: str, key: str, value: str, expires_at: ExpiresAt = KEEP_EXPIRY
+) -> dict:
+    """Create or update an insight for a module.
+
+    Concurrent calls for the same module are committed together by the
+    module's ``WriteBatcher``; each caller still receives its own row.
+    Without ``expires_at`` the module's ``retention_seconds`` applies, or the
+    row keeps its current expiry if the module has none; ``None`` clears it.
+    """
+
+    module = get_module(slug)
+    shard = core.shard_for_key(key, module.shards)
+    expiry = core.format_expiry(expires_at, module.retention_seconds)
+    return get_batcher(slug, shard).submit(key, value, expires_at=expiry, inline=True).result()
+
+
+def _with_expiry(
+    module: ModuleDefinition, records: Sequence[tuple]
+) -> List[Tuple[str, str, core.Expiry]]:
+    return [
+        (
+            record[0],
+            record[1],
+            core.format_expiry(
+                record[2] if len(record) > 2 else KEEP_EXPIRY, module.retention_seconds
+            ),
+        )
+        for record in records
+    ]
+
+
+def upsert_insights_batch(slug: str, records: Sequence[tuple]) -> dict:
+    """Upsert ``(key, value[, expires_at])`` records in one transaction per shard."""
+
+    module = get_module(slug)
+    inserted = 0
+    for shard, group in core.group_by_shard(_with_expiry(module, records), module.shards).items():
+        with core.connect(slug, shard=shard) as connection, metrics.track_query(
+            slug, "bulk_upsert"
+        ):
+            inserted += core.upsert_records(connection, group)
+        core.notify_keys_written(slug, [record[0] for record in group])
+    return {
+        "received": len(records),
+        "inserted": inserted,
+        "updated": len(records) - inserted,
     }
 
 
-def upsert_insight(slug: str, key: str, value: str) -> dict:
-    """Create or update an insight for a module."""
-
-    get_module(slug)  # ensure module exists
-    with core.connect(slug) as connection:
-        core.initialise_database(connection)
-        connection.execute(
-            f"""
-            INSERT INTO {core.DATABASE_TABLE} (key, value)
-            VALUES (?, ?)
-            ON CONFLICT(key) DO UPDATE SET
-                value=excluded.value,
-                updated_at=datetime('now')
-            """,
-            (key, value),
+async def get_module_summary_async(module: ModuleDefinition) -> dict:
+    """Awaitable ``get_module_summary`` running on the module's executor."""
+
+    return await run_in_module(module.slug, get_module_summary, module)
+
+
+async def list_module_summaries_async(
+    modules: Optional[Sequence[ModuleDefinition]] = None,
+) -> List[dict]:
+    """Awaitable ``list_module_summaries`` that queries ``modules`` (default: all) concurrently."""
+
+    targets = list_modules() if modules is None else modules
+    return list(await asyncio.gather(*(get_module_summary_async(module) for module in targets)))
+
+
+async def get_module_detail_async(slug: str, **filters) -> dict:
+    """Awaitable ``get_module_detail`` running on the module's executor."""
+
+    get_module(slug)  # fail fast before scheduling work for unknown modules
+    return await run_in_module(slug, get_module_detail, slug, **filters)
+
+
+async def get_module_version_async(slug: str) -> int:
+    """Awaitable ``get_module_version`` running on the module's executor."""
+
+    get_module(slug)
+    return await run_in_module(slug, get_module_version, slug)
+
+
+def _encode_insight(row: InsightRow) -> str:
+    """Encode one ``core.INSIGHT_COLUMNS`` row as an ``Insight`` JSON object.
+
+    ``updated_at`` and ``expires_at`` are stored as ``YYYY-MM-DD HH:MM:SS``;
+    swapping the space for ``T`` yields the ISO form Pydantic would emit for
+    the parsed datetime.
+    """
+
+    key, value, updated_at, value_sha256, value_size, expires_at = row
+    if value_sha256 is None:
+        value_json, ref_json = encode_basestring(value), "null"
+    else:
+        value_json = "null"
+        ref_json = f'{{"sha256":"{value_sha256}","size":{value_size}}}'
+    return (
+        '{"key":' + encode_basestring(key)
+        + ',"value":' + value_json
+        + ',"updated_at":"' + updated_at.replace(" ", "T", 1)
+        + '","value_ref":' + ref_json
+        + ',"expires_at":'
+        + ("null" if expires_at is None else '"' + expires_at.replace(" ", "T", 1) + '"')
+        + "}"
+    )
+
+
+def _encode_module_header(module: ModuleDefinition) -> str:
+    """Return the opening of a ``ModuleDetail`` document up to its insights array."""
+
+    return (
+        '{"slug":' + encode_basestring(module.slug)
+        + ',"title":' + encode_basestring(module.title)
+        + ',"description":' + encode_basestring(module.description)
+        + ',"insights":['
+    )
+
+
+def render_module_detail(
+    slug: str,
+    *,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    prefix: Optional[str] = None,
+    updated_since: Optional[datetime] = None,
+) -> bytes:
+    """Return ``get_module_detail`` already serialised as ``ModuleDetail`` JSON.
+
+    Rows go straight from SQLite tuples into the output string, skipping the
+    dict, ``datetime`` parsing and model validation of the regular path. The
+    document matches ``ModuleDetail.model_dump_json()`` value for value.
+    """
+
+    module = get_module(slug)
+    rows = fetch_insight_rows(
+        slug,
+        limit=None if limit is None else limit + 1,
+        after=cursor,
+        prefix=prefix,
+        updated_since=updated_since,
+    )
+    next_cursor = "null"
+    if limit is not None and len(rows) > limit:
+        del rows[limit:]
+        next_cursor = encode_basestring(rows[-1][0])
+    with profiling.track_phase("serialise"):
+        body = (
+            _encode_module_header(module)
+            + ",".join(map(_encode_insight, rows))
+            + '],"next_cursor":' + next_cursor + "}"
+        )
+        return body.encode("utf-8")
+
+
+async def render_module_detail_async(slug: str, **filters) -> bytes:
+    """Awaitable ``render_module_detail`` running on the module's executor."""
+
+    get_module(slug)
+    return await run_in_module(slug, render_module_detail, slug, **filters)
+
+
+async def stream_module_detail(
+    slug: str,
+    *,
+    cursor: Optional[str] = None,
+    prefix: Optional[str] = None,
+    updated_since: Optional[datetime] = None,
+) -> AsyncIterator[bytes]:
+    """Yield a ``ModuleDetail`` JSON document in chunks of ``STREAM_CHUNK_SIZE`` rows.
+
+    Each chunk is a separate keyset query, so no connection is held between
+    chunks and memory stays constant regardless of the table size.
+    """
+
+    module = get_module(slug)
+    yield _encode_module_header(module).encode("utf-8")
+
+    after = cursor
+    separator = ""
+    while True:
+        rows = await run_in_module(
+            slug,
+            fetch_insight_rows,
+            slug,
+            limit=STREAM_CHUNK_SIZE,
+            after=after,
+            prefix=prefix,
+            updated_since=updated_since,
+        )
+        if rows:
+            chunk = separator + ",".join(map(_encode_insight, rows))
+            yield chunk.encode("utf-8")
+            separator = ","
+            after = rows[-1][0]
+        if len(rows) < STREAM_CHUNK_SIZE:
+            break
+
+    yield b'],"next_cursor":null}'
+
+
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+EXPORT_COLUMNS = ("key", "value", "updated_at", "expires_at")
+
+
+def _encode_csv(rows: Sequence[Sequence[str]]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerows(rows)
+    return buffer.getvalue()
+
+
+def _export_chunk(
+    slug: str, after: Optional[str], export_format: str
+) -> tuple[str, Optional[str], int]:
+    """Encode the next ``STREAM_CHUNK_SIZE`` rows after ``after`` for export.
+
+    Offloaded values are read back from the blob store, so exports are
+    self-contained. Returns the text, the last key and the number of rows.
+    """
+
+    rows = fetch_insight_rows(slug, limit=STREAM_CHUNK_SIZE, after=after)
+    store = get_blob_store()
+    # ``expires_at`` is stored in UTC; the ``Z`` keeps it UTC when re-imported.
+    records = [
+        (
+            key,
+            value if value_sha256 is None else store.read(value_sha256),
+            updated_at,
+            "" if expires_at is None else expires_at.replace(" ", "T", 1) + "Z",
         )
-        row = connection.execute(
-            f"SELECT key, value, updated_at FROM {core.DATABASE_TABLE} WHERE key = ?",
-            (key,),
-        ).fetchone()
-        connection.commit()
-    return dict(row)
+        for key, value, updated_at, value_sha256, _, expires_at in rows
+    ]
+    if export_format == "csv":
+        text = _encode_csv(records)
+    else:
+        text = "".join(
+            '{"key":' + encode_basestring(key)
+            + ',"value":' + encode_basestring(value)
+            + ',"updated_at":"' + updated_at.replace(" ", "T", 1)
+            + '","expires_at":' + (f'"{expires_at}"' if expires_at else "null") + "}\n"
+            for key, value, updated_at, expires_at in records
+        )
+    return text, rows[-1][0] if rows else after, len(rows)
+
+
+async def stream_module_export(slug: str, export_format: str = "ndjson") -> AsyncIterator[bytes]:
+    """Yield every insight of a module as NDJSON lines or CSV rows.
+
+    Rows are read in ``STREAM_CHUNK_SIZE`` keyset pages, so memory stays flat
+    and no connection is pinned while a slow client downloads. The output can
+    be fed back to ``POST /modules/{slug}/insights/bulk``.
+    """
+
+    get_module(slug)
+    if export_format == "csv":
+        yield _encode_csv([EXPORT_COLUMNS]).encode("utf-8")
+    after = None
+    while True:
+        text, after, count = await run_in_module(slug, _export_chunk, slug, after, export_format)
+        if text:
+            yield text.encode("utf-8")
+        if count < STREAM_CHUNK_SIZE:
+            break
+
+
+async def upsert_insight_async(
+    slug: str, key: str, value: str, expires_at: ExpiresAt = KEEP_EXPIRY
+) -> dict:
+    """Awaitable ``upsert_insight`` that waits on the group commit without a thread."""
+
+    module = get_module(slug)
+    shard = core.shard_for_key(key, module.shards)
+    expiry = core.format_expiry(expires_at, module.retention_seconds)
+    with profiling.track_phase("write"):
+        return await asyncio.wrap_future(
+            get_batcher(slug, shard).submit(key, value, expires_at=expiry)
+        )
+
+
+async def upsert_insights_batch_async(slug: str, records: Sequence[tuple]) -> dict:
+    """Awaitable ``upsert_insights_batch`` running on the module's executor."""
+
+    get_module(slug)
+    return await run_in_module(slug, upsert_insights_batch, slug, records)
@@ -0,0 +1,189 @@
+"""Expiry of insights: the background sweeper and incremental vacuum.
+
+Insights written with an ``expires_at`` (explicit, or derived from the
+module's ``retention_seconds``) are deleted by a daemon thread every
+``RetentionSettings.sweep_interval_seconds``. Each batch of at most
+``sweep_batch_size`` rows is its own short write transaction, so requests
+queue behind the sweeper for one batch at most. The pages freed are then
+handed back to the filesystem with ``PRAGMA incremental_vacuum`` in steps of
+``vacuum_step_pages``, again one short transaction each.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from typing import List, Optional
+
+from .. import metrics
+from ..config import get_module, get_settings
+from ..db import core
+
+logger = logging.getLogger(__name__)
+
+AUTO_VACUUM_INCREMENTAL = 2
+
+EXPIRED_INSIGHTS = metrics.REGISTRY.register(
+    metrics.Counter(
+        "aurvo_expired_insights_total",
+        "Insights caducados eliminados por el barrido.",
+        ("module",),
+    )
+)
+VACUUMED_PAGES = metrics.REGISTRY.register(
+    metrics.Counter(
+        "aurvo_vacuum_pages_total",
+        "Páginas libres devueltas al sistema de archivos con incremental_vacuum.",
+        ("module",),
+    )
+)
+
+
+def _stopped(stop: Optional[threading.Event]) -> bool:
+    return stop is not None and stop.is_set()
+
+
+def vacuum_shard(slug: str, shard: int = 0, *, stop: Optional[threading.Event] = None) -> int:
+    """Release the free pages of one shard in small steps; return how many were freed.
+
+    Files created before incremental auto-vacuum existed are left alone (see
+    ``enable_incremental_vacuum``).
+    """
+
+    step = get_settings().retention.vacuum_step_pages
+    if not step:
+        return 0
+    with core.connect(slug, readonly=True, shard=shard) as connection:
+        if core.get_auto_vacuum(connection) != AUTO_VACUUM_INCREMENTAL:
+            return 0
+        if not core.get_freelist_count(connection):
+            return 0
+    freed = 0
+    while not _stopped(stop):
+        with core.connect(slug, shard=shard) as connection, metrics.track_query(
+            slug, "incremental_vacuum"
+        ) as query:
+            released = core.incremental_vacuum(connection, step)
+            query.rows = released
+        freed += released
+        if released < step:
+            break
+    if freed:
+        VACUUMED_PAGES.inc(freed, module=slug)
+    return freed
+
+
+def sweep_shard(slug: str, shard: int = 0, *, stop: Optional[threading.Event] = None) -> dict:
+    """Delete the expired insights of one shard, then vacuum the space they held."""
+
+    batch_size = get_settings().retention.sweep_batch_size
+    expired = 0
+    while not _stopped(stop):
+        with core.connect(slug, shard=shard) as connection, metrics.track_query(
+            slug, "expire"
+        ) as query:
+            keys = core.delete_expired(connection, batch_size)
+            query.rows = len(keys)
+        if keys:
+            core.notify_keys_written(slug, keys)
+            EXPIRED_INSIGHTS.inc(len(keys), module=slug)
+            expired += len(keys)
+        if len(keys) < batch_size:
+            break
+    return {"expired": expired, "freed_pages": vacuum_shard(slug, shard, stop=stop)}
+
+
+def sweep_module(slug: str) -> dict:
+    """Sweep every shard of ``slug``, opening its databases if needed."""
+
+    totals = {"expired": 0, "freed_pages": 0}
+    for shard in range(get_module(slug).shards):
+        for name, value in sweep_shard(slug, shard).items():
+            totals[name] += value
+    return totals
+
+
+def sweep_open_modules(stop: Optional[threading.Event] = None) -> int:
+    """Sweep the shards that have an open pool; return how many insights expired.
+
+    Closed databases are not opened just to be swept; they are swept once a
+    request opens them again, or with ``backend/scripts/expire.py``.
+    """
+
+    modules = get_settings().modules
+    expired = 0
+    for slug, shard in core.open_shards():
+        if _stopped(stop):
+            break
+        if slug not in modules:  # being retired
+            continue
+        try:
+            expired += sweep_shard(slug, shard, stop=stop)["expired"]
+        except Exception:  # noqa: BLE001 - one failing module must not stop the others
+            logger.exception("No se pudo barrer el módulo '%s' (shard %s).", slug, shard)
+    return expired
+
+
+def enable_incremental_vacuum(slug: str) -> List[int]:
+    """Convert the shards of ``slug`` to ``auto_vacuum=INCREMENTAL``; return those converted.
+
+    Rewrites each file with ``VACUUM`` while holding its write lock, so run
+    it with the API stopped (or at a quiet time) on files created before
+    expiry existed. New files are created in incremental mode.
+    """
+
+    converted = []
+    for shard in range(get_module(slug).shards):
+        with core.connect(slug, shard=shard) as connection:
+            if core.get_auto_vacuum(connection) == AUTO_VACUUM_INCREMENTAL:
+                continue
+            connection.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            connection.execute("VACUUM")
+        converted.append(shard)
+    return converted
+
+
+class ExpirySweeper:
+    """Daemon thread running ``sweep_open_modules`` every ``interval`` seconds."""
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        def run() -> None:
+            while not self._stop.wait(self.interval):
+                sweep_open_modules(self._stop)
+
+        self._thread = threading.Thread(target=run, name="aurvo-expiry-sweeper", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join()
+
+
+_sweeper: Optional[ExpirySweeper] = None
+
+
+def start_sweeper() -> None:
+    """Start the process-wide sweeper unless it is disabled or already running."""
+
+    global _sweeper
+    interval = get_settings().retention.sweep_interval_seconds
+    if _sweeper is not None or interval <= 0:
+        return
+    _sweeper = ExpirySweeper(interval)
+    _sweeper.start()
+
+
+def stop_sweeper() -> None:
+    """Stop the sweeper, letting a batch in progress commit first."""
+
+    global _sweeper
+    sweeper, _sweeper = _sweeper, None
+    if sweeper is not None:
+        sweeper.stop()
+
@@ -0,0 +1,100 @@
+"""Full-text search across every module's insights."""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import sqlite3
+from typing import List
+
+from .. import metrics
+from ..config import get_module, list_modules
+from ..db import core
+from ..db.executor import run_in_module
+
+
+_QUERY_ERROR_MARKERS = ("fts5", "syntax error", "unterminated string", "no such column")
+
+
+class SearchQueryError(ValueError):
+    """Raised when a full-text query cannot be parsed by FTS5."""
+
+
+def build_match_expression(query: str) -> str:
+    """Quote every whitespace-separated term so user input is never FTS5 syntax.
+
+    The resulting expression matches insights containing all the terms; a
+    trailing ``*`` on a term is kept as a prefix search.
+    """
+
+    terms = []
+    for term in query.split():
+        prefix = term.endswith("*") and len(term) > 1
+        if prefix:
+            term = term[:-1]
+        quoted = '"' + term.replace('"', '""') + '"'
+        terms.append(quoted + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
+def _search_shard(slug: str, shard: int, match: str, limit: int) -> List[sqlite3.Row]:
+    with core.connect(slug, readonly=True, shard=shard) as connection, metrics.track_query(
+        slug, "search"
+    ) as query:
+        try:
+            rows = connection.execute(
+                f"""
+                SELECT insight.key, insight.value, insight.updated_at,
+                       insight.value_sha256, insight.value_size, insight.expires_at,
+                       bm25({core.SEARCH_TABLE}) AS rank
+                FROM {core.SEARCH_TABLE}
+                JOIN {core.DATABASE_TABLE} AS insight ON insight.id = {core.SEARCH_TABLE}.rowid
+                WHERE {core.SEARCH_TABLE} MATCH ?
+                ORDER BY rank
+                LIMIT ?
+                """,
+                (match, limit),
+            ).fetchall()
+        except sqlite3.OperationalError as exc:
+            if any(marker in str(exc) for marker in _QUERY_ERROR_MARKERS):
+                raise SearchQueryError(f"Consulta de búsqueda inválida: {exc}") from exc
+            raise
+        query.rows = len(rows)
+    return rows
+
+
+def search_module(slug: str, match: str, limit: int) -> List[dict]:
+    """Return the best ``limit`` matches of one module, best rank first.
+
+    Each shard has its own FTS5 index; their hits are merged by rank. BM25
+    statistics are per shard, which is close enough for evenly hashed keys.
+    """
+
+    per_shard = [
+        _search_shard(slug, shard, match, limit) for shard in range(get_module(slug).shards)
+    ]
+    rows = heapq.merge(*per_shard, key=lambda row: row["rank"])
+    return [
+        {"module": slug, "rank": row["rank"], **core.insight_from_row(*tuple(row)[:-1])}
+        for _, row in zip(range(limit), rows)
+    ]
+
+
+async def search_insights(query: str, *, limit: int = 20, raw: bool = False) -> List[dict]:
+    """Search every configured module in parallel and merge the hits by rank.
+
+    Ranks are FTS5 ``bm25`` scores (lower is better). Each module contributes
+    at most ``limit`` hits, and only the global top ``limit`` are returned.
+    """
+
+    match = query if raw else build_match_expression(query)
+    if not match.strip():
+        return []
+
+    per_module = await asyncio.gather(
+        *(
+            run_in_module(module.slug, search_module, module.slug, match, limit)
+            for module in list_modules()
+        )
+    )
+    merged = heapq.merge(*per_module, key=lambda hit: hit["rank"])
+    return [hit for _, hit in zip(range(limit), merged)]
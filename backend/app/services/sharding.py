@@ -0,0 +1,141 @@
+"""Offline resharding: redistribute a module's insights across a new number of files."""
+from __future__ import annotations
+
+import os
+import shutil
+import sqlite3
+from pathlib import Path
+from typing import List
+
+from ..config import MAX_SHARDS, get_settings
+from ..db import core
+
+RESHARD_BATCH_SIZE = 5000
+
+
+class ReshardError(ValueError):
+    """Raised when a module cannot be resharded as requested."""
+
+
+def _open(path: Path) -> sqlite3.Connection:
+    options = get_settings().database
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    connection.execute(f"PRAGMA journal_mode={options.journal_mode}")
+    connection.execute(f"PRAGMA synchronous={options.synchronous}")
+    return connection
+
+
+def current_shard_count(slug: str) -> int:
+    """Return how many shard files ``slug`` has on disk (0 if it has none yet)."""
+
+    path = get_settings().data_dir / core.database_file_name(slug)
+    if not path.exists():
+        return 0
+    connection = sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True)
+    try:
+        layout = core.get_shard_layout(connection)
+    except sqlite3.OperationalError:  # predates the metadata table, hence sharding
+        return 1
+    finally:
+        connection.close()
+    return 1 if layout is None else layout[1]
+
+
+def _copy_rows(source: sqlite3.Connection, targets: List[sqlite3.Connection]) -> int:
+    """Insert every row of ``source`` into the target chosen by its key hash."""
+
+    copied = 0
+    cursor = source.execute(
+        f"SELECT key, value, updated_at, value_sha256, value_size, expires_at "
+        f"FROM {core.DATABASE_TABLE}"
+    )
+    while True:
+        rows = cursor.fetchmany(RESHARD_BATCH_SIZE)
+        if not rows:
+            return copied
+        groups: dict[int, list] = {}
+        for row in rows:
+            groups.setdefault(core.shard_for_key(row[0], len(targets)), []).append(row)
+        for shard, group in groups.items():
+            targets[shard].executemany(
+                f"INSERT INTO {core.DATABASE_TABLE} "
+                "(key, value, updated_at, value_sha256, value_size, expires_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                group,
+            )
+            targets[shard].commit()
+        copied += len(rows)
+
+
+def _restart_change_log(connection: sqlite3.Connection) -> None:
+    """Compact away the entries logged by the copy itself.
+
+    Clients following the old feeds then get ``reset`` and reload the module
+    instead of replaying every row as a change.
+    """
+
+    _, head = core.get_change_bounds(connection)
+    connection.execute(f"DELETE FROM {core.CHANGES_TABLE}")
+    connection.execute(
+        f"UPDATE {core.METADATA_TABLE} SET value = ? WHERE name = ?", (head, core.CHANGES_FLOOR)
+    )
+    connection.commit()
+
+
+def reshard_module(slug: str, shards: int) -> dict:
+    """Rewrite ``slug`` as ``shards`` files routed by ``core.shard_for_key``.
+
+    Must run while the API is stopped. The new files are built in a staging
+    directory and only swapped in once complete; the module configuration
+    then has to declare the same ``shards`` before the API starts again.
+    Returns the previous and new shard counts and the number of rows copied.
+    """
+
+    if not 1 <= shards <= MAX_SHARDS:
+        raise ReshardError(f"El número de shards debe estar entre 1 y {MAX_SHARDS}.")
+    previous = current_shard_count(slug)
+    if previous == 0:
+        raise ReshardError(f"No existe la base de datos del módulo '{slug}'.")
+    if previous == shards:
+        return {"module": slug, "from": previous, "to": shards, "records": 0}
+
+    core.close_pools()
+    settings = get_settings()
+    data_dir = settings.data_dir
+    staging = data_dir / f".reshard-{slug}"
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+
+    targets = [_open(staging / core.database_file_name(slug, shard)) for shard in range(shards)]
+    copied = 0
+    try:
+        for shard, target in enumerate(targets):
+            core.initialise_database(target)
+            core.set_change_retention(target, settings.database.changes_retention)
+            core.claim_shard(target, shard, shards)
+        for shard in range(previous):
+            source = _open(data_dir / core.database_file_name(slug, shard))
+            try:
+                core.initialise_database(source)  # older files may lack newer columns
+                copied += _copy_rows(source, targets)
+            finally:
+                source.close()
+        for target in targets:
+            _restart_change_log(target)
+    finally:
+        for target in targets:
+            target.close()
+
+    # Move the old files aside first, so an interruption never loses both layouts.
+    retired = staging / "previous"
+    retired.mkdir()
+    for shard in range(previous):
+        name = core.database_file_name(slug, shard)
+        os.replace(data_dir / name, retired / name)
+        core.remove_database(data_dir / name)
+    for shard in range(shards):
+        name = core.database_file_name(slug, shard)
+        os.replace(staging / name, data_dir / name)
+    shutil.rmtree(staging)
+    return {"module": slug, "from": previous, "to": shards, "records": copied}
@@ -1,23 +1,52 @@
-"""Utility script to bootstrap local databases."""
+"""Utility script to bootstrap local databases or restore them from a snapshot.
+
+Usage::
+
+    python backend/scripts/bootstrap.py
+    python backend/scripts/bootstrap.py --restore latest
+    python backend/scripts/bootstrap.py --restore 20240101T000000000000Z --module aurvoui
+"""
 from __future__ import annotations
 
-from backend.app.config import get_settings
-from backend.app.db.core import bootstrap_databases, seed_records
+import argparse
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.app.config import get_settings  # noqa: E402
+from backend.app.db.core import close_pools  # noqa: E402
+from backend.app.services.backups import SnapshotError, restore_snapshot  # noqa: E402
+from backend.app.services.modules import bootstrap_modules  # noqa: E402
+
 
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Inicializa o restaura las bases de datos.")
+    parser.add_argument(
+        "--restore",
+        metavar="SNAPSHOT",
+        help="Nombre o ruta de un snapshot (o 'latest') a restaurar; la API debe estar detenida",
+    )
+    parser.add_argument(
+        "--module", action="append", help="Restaurar solo este módulo (repetible)"
+    )
+    args = parser.parse_args(argv)
 
-def main() -> None:
-    bootstrap_databases()
     settings = get_settings()
-    for module in settings.modules.values():
-        seed_records(
-            module.slug,
-            [
-                ("descripcion", module.description),
-                ("estado", "operativo"),
-            ],
-        )
+    if args.restore:
+        try:
+            restored = restore_snapshot(args.restore, args.module)
+        except SnapshotError as exc:
+            print(exc, file=sys.stderr)
+            return 1
+        print("Módulos restaurados:", ", ".join(restored))
+    bootstrap_modules()
+    close_pools()
     print("Bases de datos inicializadas en", settings.data_dir)
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
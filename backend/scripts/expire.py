@@ -0,0 +1,63 @@
+"""Delete expired insights and reclaim their space in every module database.
+
+Usage::
+
+    python backend/scripts/expire.py
+    python backend/scripts/expire.py aurvoui hoc-engine --convert
+
+The API's background sweeper only visits databases it has open; this script
+opens and sweeps every module. ``--convert`` first rewrites files created
+before expiry existed into ``auto_vacuum=INCREMENTAL`` mode with ``VACUUM``,
+which locks each file while it runs: stop the API first.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.app.config import get_module, list_modules  # noqa: E402
+from backend.app.db.core import close_pools  # noqa: E402
+from backend.app.services.retention import (  # noqa: E402
+    enable_incremental_vacuum,
+    sweep_module,
+)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Elimina insights caducados y libera espacio.")
+    parser.add_argument("modules", nargs="*", help="Slugs a barrer (todos por defecto)")
+    parser.add_argument(
+        "--convert",
+        action="store_true",
+        help="Convertir antes los archivos antiguos a auto_vacuum=INCREMENTAL (API detenida)",
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        slugs = [get_module(slug).slug for slug in args.modules] or [
+            module.slug for module in list_modules()
+        ]
+    except KeyError as exc:
+        print(exc.args[0], file=sys.stderr)
+        return 1
+    try:
+        for slug in slugs:
+            if args.convert and enable_incremental_vacuum(slug):
+                print(f"'{slug}' convertido a auto_vacuum=INCREMENTAL.")
+            result = sweep_module(slug)
+            print(
+                f"'{slug}': {result['expired']} insights caducados eliminados, "
+                f"{result['freed_pages']} páginas liberadas."
+            )
+    finally:
+        close_pools()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,46 @@
+"""Split a module's insights across a different number of SQLite files.
+
+Usage::
+
+    python backend/scripts/reshard.py hoc-engine --shards 4
+
+Stop the API first, then declare the same ``shards`` for the module in the
+modules file (``AURVO_MODULES_FILE``/``AURVO_MODULES``) before starting it again.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.app.services.sharding import ReshardError, reshard_module  # noqa: E402
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Cambia el número de shards de un módulo.")
+    parser.add_argument("module", help="Slug del módulo a redistribuir")
+    parser.add_argument("--shards", type=int, required=True, help="Número de shards nuevo")
+    args = parser.parse_args(argv)
+
+    try:
+        result = reshard_module(args.module, args.shards)
+    except ReshardError as exc:
+        print(exc, file=sys.stderr)
+        return 1
+    if result["from"] == result["to"]:
+        print(f"El módulo '{args.module}' ya tiene {args.shards} shard(s).")
+        return 0
+    print(
+        f"{result['records']} insights de '{args.module}' redistribuidos de "
+        f"{result['from']} a {result['to']} shard(s)."
+    )
+    print(f"Declara \"shards\": {args.shards} para '{args.module}' antes de iniciar la API.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
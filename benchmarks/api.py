@@ -0,0 +1,60 @@
+"""Benchmarks that drive the FastAPI application in-process over ASGI."""
+from __future__ import annotations
+
+import asyncio
+import random
+from typing import List
+
+import httpx
+
+from benchmarks.datasets import insight_key
+from benchmarks.harness import run_tasks, summarise
+from backend.app.config import list_modules
+from backend.app.main import app
+from backend.app.services import modules as module_service
+
+
+async def _run(insights: int, *, iterations: int, clients: int) -> List[dict]:
+    slugs = [module.slug for module in list_modules()]
+    rng = random.Random(1)
+    results = []
+    module_service.bootstrap_modules()  # the ASGI transport does not run lifespan events
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def listing(index: int, iteration: int) -> None:
+            response = await client.get("/modules/")
+            response.raise_for_status()
+
+        async def page(index: int, iteration: int) -> None:
+            params = {"limit": 100}
+            if insights:
+                params["cursor"] = insight_key(rng.randrange(insights))
+            response = await client.get(f"/modules/{rng.choice(slugs)}", params=params)
+            response.raise_for_status()
+
+        async def write(index: int, iteration: int) -> None:
+            response = await client.post(
+                f"/modules/{rng.choice(slugs)}/insights",
+                json={"key": f"api-write-{index}-{iteration}", "value": "valor de prueba"},
+            )
+            response.raise_for_status()
+
+        for name, operation in (
+            ("GET /modules/", listing),
+            ("GET /modules/{slug}?limit=100", page),
+            ("POST /modules/{slug}/insights", write),
+        ):
+            for concurrency in (1, clients):
+                latencies, elapsed = await run_tasks(
+                    operation, concurrency, max(1, iterations // concurrency)
+                )
+                results.append(summarise(name, latencies, elapsed, clients=concurrency))
+    return results
+
+
+def run(insights: int, *, iterations: int, clients: int) -> List[dict]:
+    """Benchmark the HTTP endpoints with ``clients`` concurrent in-process clients."""
+
+    return asyncio.run(_run(insights, iterations=iterations, clients=clients))
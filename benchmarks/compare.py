@@ -0,0 +1,82 @@
+"""Compare a benchmark results file against a stored baseline.
+
+Usage::
+
+    python -m benchmarks.compare results.json baseline.json --threshold 0.25
+
+Both files are ``benchmarks.run --output`` reports from the same machine and
+profile.
+
+Exits with status 1 when any latency percentile regressed by more than the
+threshold (relative) or throughput dropped by more than it.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+LATENCY_FIELDS = ("p50_ms", "p95_ms", "p99_ms")
+# Ignore relative changes on latencies this small; they are timer noise.
+MIN_LATENCY_MS = 0.05
+
+
+def _index(results: dict) -> Dict[Tuple[str, str, str, str], dict]:
+    return {
+        (
+            entry["dataset"],
+            entry["suite"],
+            entry["name"],
+            json.dumps(entry["params"], sort_keys=True),
+        ): entry
+        for entry in results["results"]
+    }
+
+
+def compare(current: dict, baseline: dict, *, threshold: float = 0.25) -> List[str]:
+    """Return a human readable line for every regression beyond ``threshold``."""
+
+    regressions = []
+    baseline_index = _index(baseline)
+    for key, entry in _index(current).items():
+        reference = baseline_index.get(key)
+        if reference is None:
+            continue
+        label = f"{key[0]} {key[1]} {key[2]} {key[3]}"
+        for field in LATENCY_FIELDS:
+            old, new = reference[field], entry[field]
+            if max(old, new) >= MIN_LATENCY_MS and new > old * (1 + threshold):
+                regressions.append(f"{label}: {field} {old:.3f} -> {new:.3f}")
+        old, new = reference["throughput"], entry["throughput"]
+        if old and new < old * (1 - threshold):
+            regressions.append(f"{label}: throughput {old:.1f} -> {new:.1f}")
+
+    old_rss, new_rss = baseline.get("peak_rss_kb"), current.get("peak_rss_kb")
+    if old_rss and new_rss and new_rss > old_rss * (1 + threshold):
+        regressions.append(f"peak_rss_kb {old_rss} -> {new_rss}")
+    return regressions
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("results", type=Path)
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    regressions = compare(
+        json.loads(args.results.read_text(encoding="utf-8")),
+        json.loads(args.baseline.read_text(encoding="utf-8")),
+        threshold=args.threshold,
+    )
+    for line in regressions:
+        print("REGRESIÓN", line)
+    if not regressions:
+        print("Sin regresiones respecto a la línea base.")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""Measure bytes saved against CPU spent when compressing module detail bodies.
+
+Usage::
+
+    python -m benchmarks.compression --insights 1000 10000 100000 --levels 1 3 6 9
+
+For every dataset size the ``GET /modules/{slug}`` body is compressed with
+gzip at each level, reporting the ratio, the bytes saved, the CPU time per
+compression (``time.thread_time``) and the kilobytes saved per CPU
+millisecond. The ``api`` rows time the endpoint in-process for an identity
+response, a first gzip response (compressed and cached) and the following
+gzip responses, which come from the precompressed cache.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.datasets import build_dataset, module_definitions
+from benchmarks.harness import benchmark_environment, percentile
+
+from backend.app import compression
+from backend.app.main import app
+from backend.app.services import modules as module_service
+
+
+def measure_level(body: bytes, level: int, iterations: int) -> dict:
+    """Return the size and CPU cost of compressing ``body`` with gzip at ``level``."""
+
+    cpu: List[float] = []
+    for _ in range(iterations):
+        started = time.thread_time()
+        engine = compression.compressor("gzip", level)
+        encoded = engine.compress(body) + engine.flush()
+        cpu.append(time.thread_time() - started)
+    cpu.sort()
+    cpu_ms = percentile(cpu, 0.50) * 1000
+    saved = len(body) - len(encoded)
+    return {
+        "bytes": len(body),
+        "compressed_bytes": len(encoded),
+        "ratio": len(encoded) / len(body) if body else 0.0,
+        "saved_bytes": saved,
+        "cpu_ms": cpu_ms,
+        "saved_kib_per_cpu_ms": saved / 1024 / cpu_ms if cpu_ms else 0.0,
+    }
+
+
+async def measure_api(slug: str, iterations: int) -> Dict[str, float]:
+    """Return the p50 latency (ms) of identity, first gzip and cached gzip responses."""
+
+    module_service.bootstrap_modules()  # the ASGI transport does not run lifespan events
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def timed(encoding: str) -> float:
+            started = time.perf_counter()
+            async with client.stream(
+                "GET", f"/modules/{slug}", headers={"Accept-Encoding": encoding}
+            ) as response:
+                response.raise_for_status()
+                async for _ in response.aiter_raw():  # what goes over the wire, undecoded
+                    pass
+            return time.perf_counter() - started
+
+        identity = sorted([await timed("identity") for _ in range(iterations)])
+        first = await timed("gzip")
+        cached = sorted([await timed("gzip") for _ in range(iterations)])
+    return {
+        "identity_p50_ms": percentile(identity, 0.50) * 1000,
+        "gzip_first_ms": first * 1000,
+        "gzip_cached_p50_ms": percentile(cached, 0.50) * 1000,
+    }
+
+
+def main(argv: list[str] | None = None) -> dict:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--insights", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 3, 6, 9])
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--data-dir", type=Path, help="Directorio donde cachear los datasets")
+    parser.add_argument("--json", type=Path, help="Write the results to this file")
+    args = parser.parse_args(argv)
+
+    data_root = args.data_dir or Path(tempfile.mkdtemp(prefix="aurvo-bench-"))
+    results: dict = {"levels": [], "api": []}
+    print(
+        f"{'insights':>9} {'level':>5} {'bytes':>11} {'ratio':>6} {'saved':>11} "
+        f"{'cpu ms':>8} {'KiB/cpu ms':>10}"
+    )
+    for insights in args.insights:
+        data_dir = build_dataset(data_root, 1, insights)
+        with benchmark_environment(data_dir, module_definitions(1)):
+            slug = module_definitions(1)[0]["slug"]
+            body = module_service.render_module_detail(slug)
+            for level in args.levels:
+                run = measure_level(body, level, args.iterations)
+                results["levels"].append({"insights": insights, "level": level, **run})
+                print(
+                    f"{insights:>9} {level:>5} {run['bytes']:>11} {run['ratio']:>6.3f} "
+                    f"{run['saved_bytes']:>11} {run['cpu_ms']:>8.2f} "
+                    f"{run['saved_kib_per_cpu_ms']:>10.1f}"
+                )
+            api = asyncio.run(measure_api(slug, args.iterations))
+        results["api"].append({"insights": insights, **api})
+        print(
+            f"{insights:>9}   api identity {api['identity_p50_ms']:.2f} ms, "
+            f"gzip first {api['gzip_first_ms']:.2f} ms, "
+            f"gzip cached {api['gzip_cached_p50_ms']:.2f} ms"
+        )
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    return results
+
+
+if __name__ == "__main__":
+    main()
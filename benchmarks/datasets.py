@@ -0,0 +1,73 @@
+"""Synthetic module databases for the benchmark suite."""
+from __future__ import annotations
+
+import random
+from pathlib import Path
+from typing import Dict, List
+
+from benchmarks.harness import benchmark_environment
+from backend.app.db import core
+
+WORDS = (
+    "aurvo", "cuántico", "motor", "nube", "vehículo", "sensor", "flujo", "modelo",
+    "seguridad", "borde", "latencia", "interfaz", "oro", "pipeline", "señal", "ruta",
+)
+GENERATION_BATCH = 10_000
+
+
+def module_definitions(count: int) -> List[Dict[str, str]]:
+    """Return ``count`` synthetic module definitions."""
+
+    return [
+        {
+            "slug": f"bench-{index:03d}",
+            "title": f"Bench {index:03d}",
+            "description": "Módulo sintético para benchmarks.",
+        }
+        for index in range(count)
+    ]
+
+
+def insight_key(index: int) -> str:
+    return f"insight-{index:07d}"
+
+
+def _value(rng: random.Random, size: int) -> str:
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)[:size]
+
+
+def dataset_dir(root: Path, modules: int, insights: int) -> Path:
+    return root / f"{modules}x{insights}"
+
+
+def build_dataset(
+    root: Path, modules: int, insights: int, *, value_size: int = 128, seed: int = 0
+) -> Path:
+    """Create (or reuse) ``modules`` databases holding ``insights`` rows each.
+
+    Datasets are cached under ``root`` so repeated runs skip generation.
+    """
+
+    data_dir = dataset_dir(root, modules, insights)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    definitions = module_definitions(modules)
+    with benchmark_environment(data_dir, definitions):
+        for definition in definitions:
+            rng = random.Random(f"{seed}-{definition['slug']}")
+            with core.connect(definition["slug"]) as connection:
+                existing = connection.execute(
+                    f"SELECT COUNT(*) FROM {core.DATABASE_TABLE} WHERE key LIKE 'insight-%'"
+                ).fetchone()[0]
+                for start in range(existing, insights, GENERATION_BATCH):
+                    stop = min(insights, start + GENERATION_BATCH)
+                    core.upsert_records(
+                        connection,
+                        [(insight_key(index), _value(rng, value_size)) for index in range(start, stop)],
+                    )
+    return data_dir
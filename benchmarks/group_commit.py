@@ -0,0 +1,107 @@
+"""Compare per-call commits with group commit for concurrent upserts.
+
+Usage::
+
+    python -m benchmarks.group_commit --clients 1 8 64 --seconds 3
+
+Each client is a thread that upserts distinct keys into the same module as
+fast as it can. ``per-call`` reproduces one transaction per write while
+``grouped`` goes through ``services.modules.upsert_insight`` and its
+``WriteBatcher``. ``--shards N`` splits the module across N files, each with
+its own writer and batcher.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.app import config  # noqa: E402
+from backend.app.db import batching, core  # noqa: E402
+from backend.app.services import modules as module_service  # noqa: E402
+
+MODULE = "hoc-engine"
+
+
+def per_call_upsert(slug: str, key: str, value: str) -> dict:
+    """One transaction per write, as before group commit existed."""
+
+    shard = core.shard_for_key(key, config.get_module(slug).shards)
+    with core.connect(slug, shard=shard) as connection:
+        connection.execute(core.UPSERT_SQL, core.prepare_record(key, value))
+        row = connection.execute(core.SELECT_INSIGHT_SQL, (key,)).fetchone()
+        connection.commit()
+    return core.insight_from_row(*row)
+
+
+def run(upsert, clients: int, seconds: float) -> float:
+    """Return the sustained writes per second for ``clients`` threads."""
+
+    deadline = time.perf_counter() + seconds
+    counts = [0] * clients
+
+    def client(index: int) -> None:
+        written = 0
+        while time.perf_counter() < deadline:
+            upsert(MODULE, f"c{index}-{written}", "x" * 64)
+            written += 1
+        counts[index] = written
+
+    threads = [threading.Thread(target=client, args=(index,)) for index in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(counts) / (time.perf_counter() - started)
+
+
+def main(argv: list[str] | None = None) -> dict:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8, 64])
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--shards", type=int, default=1, help="Shards of the benchmarked module")
+    parser.add_argument("--json", type=Path, help="Write the results to this file")
+    args = parser.parse_args(argv)
+
+    results: dict = {"settings": {}, "runs": []}
+    with tempfile.TemporaryDirectory() as data_dir:
+        os.environ["AURVO_DATA_DIR"] = data_dir
+        os.environ["AURVO_MODULES"] = json.dumps(
+            [{"slug": MODULE, "title": MODULE, "description": "-", "shards": args.shards}]
+        )
+        config.reset_settings_cache()
+        options = config.get_settings().database
+        results["settings"] = {
+            "shards": args.shards,
+            "synchronous": options.synchronous,
+            "write_batch_window_ms": options.write_batch_window_ms,
+            "write_batch_max": options.write_batch_max,
+        }
+        print(f"{'clients':>8} {'per-call w/s':>14} {'grouped w/s':>14} {'speedup':>8}")
+        for clients in args.clients:
+            per_call = run(per_call_upsert, clients, args.seconds)
+            grouped = run(module_service.upsert_insight, clients, args.seconds)
+            batching.drain_batchers()
+            results["runs"].append(
+                {"clients": clients, "per_call_wps": per_call, "grouped_wps": grouped}
+            )
+            print(f"{clients:>8} {per_call:>14.0f} {grouped:>14.0f} {grouped / per_call:>7.1f}x")
+        core.close_pools()
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Shared helpers for the benchmark suite: environment, timing and statistics."""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Iterator, List, Sequence, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.app import config  # noqa: E402
+from backend.app.db import batching, core, executor  # noqa: E402
+
+
+@contextmanager
+def benchmark_environment(data_dir: Path, modules: Sequence[Dict[str, str]]) -> Iterator[None]:
+    """Point the backend at ``data_dir`` with ``modules`` and clean up afterwards."""
+
+    saved = {name: os.environ.get(name) for name in ("AURVO_DATA_DIR", "AURVO_MODULES")}
+    os.environ["AURVO_DATA_DIR"] = str(data_dir)
+    os.environ["AURVO_MODULES"] = json.dumps({"modules": list(modules)})
+    config.reset_settings_cache()
+    try:
+        yield
+    finally:
+        batching.drain_batchers()
+        executor.shutdown_executors()
+        core.close_pools()
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        config.reset_settings_cache()
+
+
+def percentile(ordered: Sequence[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted sequence."""
+
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def summarise(name: str, latencies: List[float], elapsed: float, **params: object) -> dict:
+    """Build the JSON record stored for one benchmark scenario."""
+
+    ordered = sorted(latencies)
+    count = len(ordered)
+    return {
+        "name": name,
+        "params": params,
+        "count": count,
+        "throughput": count / elapsed if elapsed else 0.0,
+        "mean_ms": (sum(ordered) / count * 1000) if count else 0.0,
+        "p50_ms": percentile(ordered, 0.50) * 1000,
+        "p95_ms": percentile(ordered, 0.95) * 1000,
+        "p99_ms": percentile(ordered, 0.99) * 1000,
+        "max_ms": (ordered[-1] * 1000) if count else 0.0,
+    }
+
+
+def peak_rss_kb() -> int:
+    """Peak resident set size of this process in KiB."""
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def run_threads(
+    operation: Callable[[int, int], object], clients: int, operations: int
+) -> Tuple[List[float], float]:
+    """Run ``operation(client, iteration)`` from ``clients`` threads.
+
+    Returns every per-call latency and the wall-clock time of the whole run.
+    """
+
+    latencies: List[List[float]] = [[] for _ in range(clients)]
+
+    def client(index: int) -> None:
+        samples = latencies[index]
+        for iteration in range(operations):
+            started = time.perf_counter()
+            operation(index, iteration)
+            samples.append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=client, args=(index,)) for index in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return [sample for samples in latencies for sample in samples], elapsed
+
+
+async def run_tasks(
+    operation: Callable[[int, int], Awaitable[object]], clients: int, operations: int
+) -> Tuple[List[float], float]:
+    """Async counterpart of ``run_threads`` using one task per client."""
+
+    latencies: List[float] = []
+
+    async def client(index: int) -> None:
+        for iteration in range(operations):
+            started = time.perf_counter()
+            await operation(index, iteration)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(index) for index in range(clients)))
+    return latencies, time.perf_counter() - started
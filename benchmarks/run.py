@@ -0,0 +1,98 @@
+"""Run the benchmark suite and write the results as JSON.
+
+Usage::
+
+    python -m benchmarks.run --profile default --output baseline.json
+    python -m benchmarks.run --profile default --baseline baseline.json
+
+No baseline is committed: latencies depend on the hardware, so record one
+with ``--output`` on the machine where later runs are compared, using the
+same profile. Datasets are generated once under ``--data-dir`` and reused by
+later runs.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from benchmarks import api, compare, service
+from benchmarks.datasets import build_dataset, module_definitions
+from benchmarks.harness import benchmark_environment, peak_rss_kb
+
+# (modules, insights per module)
+PROFILES: Dict[str, List[Tuple[int, int]]] = {
+    "smoke": [(5, 1_000)],
+    "default": [(5, 1_000), (5, 100_000), (50, 1_000)],
+    "full": [(5, 1_000), (5, 100_000), (5, 1_000_000), (500, 1_000)],
+}
+SUITES = {"service": service.run, "api": api.run}
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="default")
+    parser.add_argument("--suite", choices=sorted(SUITES), nargs="+", default=sorted(SUITES))
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--data-dir", type=Path, help="Directorio donde cachear los datasets")
+    parser.add_argument("--output", type=Path, default=Path("bench_results.json"))
+    parser.add_argument("--baseline", type=Path, help="Resultados de referencia a comparar")
+    parser.add_argument("--threshold", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    data_root = args.data_dir or Path(tempfile.mkdtemp(prefix="aurvo-bench-"))
+    report = {
+        "meta": {
+            "profile": args.profile,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "iterations": args.iterations,
+            "clients": args.clients,
+        },
+        "results": [],
+    }
+
+    for modules, insights in PROFILES[args.profile]:
+        dataset = f"{modules}x{insights}"
+        started = time.perf_counter()
+        data_dir = build_dataset(data_root, modules, insights)
+        print(f"[{dataset}] dataset listo en {time.perf_counter() - started:.1f}s")
+        for suite in args.suite:
+            with benchmark_environment(data_dir, module_definitions(modules)):
+                entries = SUITES[suite](
+                    insights, iterations=args.iterations, clients=args.clients
+                )
+            for entry in entries:
+                entry.update(dataset=dataset, suite=suite)
+                report["results"].append(entry)
+                print(
+                    f"[{dataset}] {suite:<7} {entry['name']:<32} "
+                    f"c={entry['params'].get('clients', 1):<3} "
+                    f"p50={entry['p50_ms']:.2f}ms p95={entry['p95_ms']:.2f}ms "
+                    f"p99={entry['p99_ms']:.2f}ms {entry['throughput']:.0f} op/s"
+                )
+
+    report["peak_rss_kb"] = peak_rss_kb()
+    args.output.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"Resultados en {args.output} (RSS máximo {report['peak_rss_kb']} KiB)")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        regressions = compare.compare(report, baseline, threshold=args.threshold)
+        for line in regressions:
+            print("REGRESIÓN", line)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
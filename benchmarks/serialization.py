@@ -0,0 +1,103 @@
+"""Compare the Pydantic response path with the JSON fast path for module detail.
+
+Usage::
+
+    python -m benchmarks.serialization --insights 1000 10000 100000 --iterations 20
+
+``pydantic`` reproduces what ``GET /modules/{slug}`` did before the fast path:
+build ``ModuleDetail`` from the service dicts, dump it, let FastAPI re-validate
+the dict against ``response_model`` and encode it with ``JSONResponse``.
+``model_dump_json`` skips FastAPI's second validation. ``fast`` is
+``services.modules.render_module_detail``, which encodes SQLite tuples directly.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from benchmarks.datasets import build_dataset, module_definitions
+from benchmarks.harness import benchmark_environment, percentile
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from backend.app.schemas.module import ModuleDetail
+from backend.app.services import modules as module_service
+
+_RESPONSE_ADAPTER = TypeAdapter(ModuleDetail)
+
+
+def pydantic_path(slug: str) -> bytes:
+    detail = ModuleDetail(**module_service.get_module_detail(slug))
+    validated = _RESPONSE_ADAPTER.validate_python(detail.model_dump())
+    return JSONResponse(_RESPONSE_ADAPTER.dump_python(validated, mode="json")).body
+
+
+def model_dump_json_path(slug: str) -> bytes:
+    detail = ModuleDetail(**module_service.get_module_detail(slug))
+    return detail.model_dump_json().encode("utf-8")
+
+
+def fast_path(slug: str) -> bytes:
+    return module_service.render_module_detail(slug)
+
+
+PATHS: Dict[str, Callable[[str], bytes]] = {
+    "pydantic": pydantic_path,
+    "model_dump_json": model_dump_json_path,
+    "fast": fast_path,
+}
+
+
+def measure(render: Callable[[str], bytes], slug: str, iterations: int) -> dict:
+    """Return latency percentiles (ms) and the body size for ``iterations`` renders."""
+
+    render(slug)  # warm the page cache and the connection pool
+    latencies: List[float] = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        body = render(slug)
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    return {
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "bytes": len(body),
+    }
+
+
+def main(argv: list[str] | None = None) -> dict:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--insights", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--data-dir", type=Path, help="Directorio donde cachear los datasets")
+    parser.add_argument("--json", type=Path, help="Write the results to this file")
+    args = parser.parse_args(argv)
+
+    data_root = args.data_dir or Path(tempfile.mkdtemp(prefix="aurvo-bench-"))
+    results: dict = {"runs": []}
+    print(f"{'insights':>9} {'path':>16} {'p50 ms':>9} {'p95 ms':>9} {'speedup':>8}")
+    for insights in args.insights:
+        data_dir = build_dataset(data_root, 1, insights)
+        with benchmark_environment(data_dir, module_definitions(1)):
+            slug = module_definitions(1)[0]["slug"]
+            runs = {name: measure(render, slug, args.iterations) for name, render in PATHS.items()}
+        baseline = runs["pydantic"]["p50_ms"]
+        for name, run in runs.items():
+            speedup = baseline / run["p50_ms"] if run["p50_ms"] else 0.0
+            results["runs"].append({"insights": insights, "path": name, **run, "speedup": speedup})
+            print(
+                f"{insights:>9} {name:>16} {run['p50_ms']:>9.2f} {run['p95_ms']:>9.2f} "
+                f"{speedup:>7.1f}x"
+            )
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    return results
+
+
+if __name__ == "__main__":
+    main()
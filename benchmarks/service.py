@@ -0,0 +1,56 @@
+"""Benchmarks that call the service layer directly."""
+from __future__ import annotations
+
+import random
+from typing import List
+
+from benchmarks.datasets import insight_key
+from benchmarks.harness import run_threads, summarise
+from backend.app.config import list_modules
+from backend.app.services import modules as module_service
+
+# Full (unpaged) detail reads are skipped above this size; they are linear in
+# the table size and would dominate the run time.
+FULL_DETAIL_MAX_INSIGHTS = 100_000
+
+
+def run(insights: int, *, iterations: int, clients: int) -> List[dict]:
+    """Benchmark list/detail/upsert against the currently configured modules."""
+
+    slugs = [module.slug for module in list_modules()]
+    rng = random.Random(0)
+    results = []
+
+    latencies, elapsed = run_threads(
+        lambda client, iteration: module_service.list_module_summaries(), 1, iterations
+    )
+    results.append(summarise("list_module_summaries", latencies, elapsed, clients=1))
+
+    def page(client: int, iteration: int) -> None:
+        cursor = insight_key(rng.randrange(insights)) if insights else None
+        module_service.get_module_detail(rng.choice(slugs), limit=100, cursor=cursor)
+
+    for concurrency in (1, clients):
+        latencies, elapsed = run_threads(page, concurrency, iterations)
+        results.append(
+            summarise("get_module_detail_page", latencies, elapsed, clients=concurrency, limit=100)
+        )
+
+    if insights <= FULL_DETAIL_MAX_INSIGHTS:
+        latencies, elapsed = run_threads(
+            lambda client, iteration: module_service.get_module_detail(slugs[0]),
+            1,
+            max(1, iterations // 20),
+        )
+        results.append(summarise("get_module_detail_full", latencies, elapsed, clients=1))
+
+    def upsert(client: int, iteration: int) -> None:
+        module_service.upsert_insight(
+            rng.choice(slugs), f"bench-write-{client}-{iteration}", "valor de prueba"
+        )
+
+    for concurrency in (1, clients):
+        latencies, elapsed = run_threads(upsert, concurrency, iterations)
+        results.append(summarise("upsert_insight", latencies, elapsed, clients=concurrency))
+
+    return results
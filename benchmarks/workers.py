@@ -0,0 +1,218 @@
+"""Measure API throughput as the number of uvicorn worker processes grows.
+
+Usage::
+
+    python -m benchmarks.workers --workers 1 2 4 8 --clients 64 --seconds 10
+
+Each run starts ``uvicorn backend.app.main:app --workers N`` on a free port
+over the same synthetic dataset and drives it over HTTP with ``--clients``
+concurrent connections, spread across ``--drivers`` load processes so the
+client side does not become the bottleneck. Requests are point reads of
+random insights (``GET /modules/{slug}/insights/{key}``) mixed with upserts
+in the proportion given by ``--write-ratio``; every worker keeps its own
+insight cache, kept coherent through the shared commit counters. Scaling
+needs as many free cores as workers plus drivers.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Sequence, Tuple
+
+import httpx
+
+from benchmarks.datasets import build_dataset, insight_key, module_definitions
+from benchmarks.harness import ROOT, percentile
+
+STARTUP_TIMEOUT_SECONDS = 30.0
+WARMUP_SECONDS = 1.0
+
+
+def _free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def start_server(
+    data_dir: Path, modules: Sequence[dict], workers: int
+) -> Tuple[subprocess.Popen, str]:
+    """Start uvicorn with ``workers`` processes and wait until it answers."""
+
+    port = _free_port()
+    env = {
+        **os.environ,
+        "AURVO_DATA_DIR": str(data_dir),
+        "AURVO_MODULES": json.dumps({"modules": list(modules)}),
+    }
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "backend.app.main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning",
+        ],
+        cwd=ROOT,
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + STARTUP_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1.0).status_code == 200:
+                return process, base_url
+        except httpx.HTTPError:
+            pass
+        if process.poll() is not None:
+            break
+        time.sleep(0.1)
+    stop_server(process)
+    raise RuntimeError(f"uvicorn no respondió en {base_url}")
+
+
+def stop_server(process: subprocess.Popen) -> None:
+    process.terminate()
+    try:
+        process.wait(timeout=STARTUP_TIMEOUT_SECONDS)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+async def _drive(
+    base_url: str,
+    slugs: Sequence[str],
+    insights: int,
+    clients: int,
+    seconds: float,
+    write_ratio: float,
+    seed: int,
+) -> Tuple[List[float], int]:
+    rng = random.Random(seed)
+    latencies: List[float] = []
+    errors = 0
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+
+        async def worker(index: int) -> None:
+            nonlocal errors
+            written = 0
+            warm_until = time.perf_counter() + WARMUP_SECONDS
+            deadline = warm_until + seconds
+            while True:
+                started = time.perf_counter()
+                if started >= deadline:
+                    return
+                slug = rng.choice(slugs)
+                if rng.random() < write_ratio:
+                    response = await client.post(
+                        f"/modules/{slug}/insights",
+                        json={"key": f"workers-{seed}-{index}-{written}", "value": "valor"},
+                    )
+                    written += 1
+                else:
+                    key = insight_key(rng.randrange(insights))
+                    response = await client.get(f"/modules/{slug}/insights/{key}")
+                if response.status_code >= 400:
+                    errors += 1
+                elif started >= warm_until:
+                    latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(*(worker(index) for index in range(clients)))
+    return latencies, errors
+
+
+def _driver_process(arguments: tuple) -> Tuple[List[float], int]:
+    return asyncio.run(_drive(*arguments))
+
+
+def measure(
+    base_url: str,
+    slugs: Sequence[str],
+    insights: int,
+    *,
+    clients: int,
+    drivers: int,
+    seconds: float,
+    write_ratio: float,
+) -> dict:
+    """Load ``base_url`` from ``drivers`` processes and return throughput and latency."""
+
+    shares = [clients // drivers + (index < clients % drivers) for index in range(drivers)]
+    jobs = [
+        (base_url, slugs, insights, share, seconds, write_ratio, index)
+        for index, share in enumerate(shares)
+        if share
+    ]
+    with multiprocessing.get_context("spawn").Pool(len(jobs)) as pool:
+        outcomes = pool.map(_driver_process, jobs)
+    latencies = sorted(sample for samples, _ in outcomes for sample in samples)
+    return {
+        "requests": len(latencies),
+        "errors": sum(errors for _, errors in outcomes),
+        "throughput": len(latencies) / seconds,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+def main(argv: list[str] | None = None) -> dict:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--drivers", type=int, default=max(1, min(4, os.cpu_count() or 1)))
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--modules", type=int, default=5)
+    parser.add_argument("--insights", type=int, default=10_000)
+    parser.add_argument("--write-ratio", type=float, default=0.05)
+    parser.add_argument("--data-dir", type=Path, help="Directorio donde cachear los datasets")
+    parser.add_argument("--json", type=Path, help="Write the results to this file")
+    args = parser.parse_args(argv)
+
+    data_root = args.data_dir or Path(tempfile.mkdtemp(prefix="aurvo-bench-"))
+    data_dir = build_dataset(data_root, args.modules, args.insights)
+    modules = module_definitions(args.modules)
+    slugs = [module["slug"] for module in modules]
+
+    results: dict = {"cpus": os.cpu_count(), "runs": []}
+    print(f"{'workers':>7} {'req/s':>10} {'speedup':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}")
+    baseline = None
+    for workers in args.workers:
+        process, base_url = start_server(data_dir, modules, workers)
+        try:
+            run = measure(
+                base_url,
+                slugs,
+                args.insights,
+                clients=args.clients,
+                drivers=args.drivers,
+                seconds=args.seconds,
+                write_ratio=args.write_ratio,
+            )
+        finally:
+            stop_server(process)
+        baseline = baseline or run["throughput"]
+        speedup = run["throughput"] / baseline if baseline else 0.0
+        results["runs"].append({"workers": workers, **run, "speedup": speedup})
+        print(
+            f"{workers:>7} {run['throughput']:>10.0f} {speedup:>7.2f}x "
+            f"{run['p50_ms']:>8.2f} {run['p95_ms']:>8.2f} {run['errors']:>7}"
+        )
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    return results
+
+
+if __name__ == "__main__":
+    main()
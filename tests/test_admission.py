@@ -0,0 +1,129 @@
+"""Tests for per-module admission control."""
+from __future__ import annotations
+
+import asyncio
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.app import admission, config
+
+
+@pytest.fixture()
+def settings(monkeypatch, tmp_path):
+    monkeypatch.setenv("AURVO_DATA_DIR", str(tmp_path))
+    monkeypatch.delenv("AURVO_MODULES", raising=False)
+    monkeypatch.delenv("AURVO_MODULES_FILE", raising=False)
+    monkeypatch.setenv("AURVO_ADMISSION_WRITE_CONCURRENCY", "1")
+    monkeypatch.setenv("AURVO_ADMISSION_WRITE_QUEUE", "1")
+    monkeypatch.setenv("AURVO_ADMISSION_QUEUE_TIMEOUT_MS", "100")
+    monkeypatch.setenv("AURVO_ADMISSION_RETRY_AFTER_SECONDS", "3")
+    config.reset_settings_cache()
+    yield config.get_settings()
+    config.reset_settings_cache()
+
+
+def test_gate_hands_slots_to_waiters_in_order():
+    """Released slots go to the oldest waiter; a full queue rejects at once."""
+
+    async def scenario():
+        gate = admission.Gate("demo", "read", limit=1, queue=2)
+        order = []
+
+        async def waiter(name):
+            await gate.acquire(None)
+            order.append(name)
+
+        await gate.acquire(None)
+        first = asyncio.create_task(waiter("a"))
+        second = asyncio.create_task(waiter("b"))
+        await asyncio.sleep(0)
+        with pytest.raises(admission.AdmissionRejected) as rejected:
+            await gate.acquire(None)
+        assert rejected.value.reason == "queue_full"
+
+        gate.release()
+        await first
+        gate.release()
+        await second
+        gate.release()
+        return order, gate.active, gate.waiting
+
+    assert asyncio.run(scenario()) == (["a", "b"], 0, 0)
+
+
+def test_gate_wait_times_out():
+    """Waiting longer than the timeout rejects and leaves the queue."""
+
+    async def scenario():
+        gate = admission.Gate("demo", "write", limit=1, queue=4)
+        await gate.acquire(None)
+        with pytest.raises(admission.AdmissionRejected) as rejected:
+            await gate.acquire(0.01)
+        return rejected.value.reason, gate.waiting
+
+    assert asyncio.run(scenario()) == ("timeout", 0)
+
+
+def test_busy_module_is_rejected_without_starving_others(settings):
+    """A saturated module answers 503 + Retry-After; other modules keep serving."""
+
+    release = asyncio.Event()
+
+    async def app(scope, receive, send):
+        if scope["method"] == "POST" and scope["path"].startswith("/modules/aurvoui/"):
+            await release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=admission.AdmissionMiddleware(app))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            busy = asyncio.create_task(client.post("/modules/aurvoui/insights"))
+            queued = asyncio.create_task(client.post("/modules/aurvoui/insights"))
+            await asyncio.sleep(0.01)
+            full = await client.post("/modules/aurvoui/insights")
+            other = await client.post("/modules/santosecure/insights")
+            read = await client.get("/modules/aurvoui/insights/tema")
+            timed_out = await queued
+            release.set()
+            return full, other, read, timed_out, await busy
+
+    full, other, read, timed_out, busy = asyncio.run(scenario())
+
+    assert full.status_code == 503
+    assert full.headers["retry-after"] == "3"
+    assert "aurvoui" in full.json()["detail"]
+    assert other.status_code == 200
+    assert timed_out.status_code == 503
+    assert busy.status_code == 200
+    assert admission.ADMISSION_REJECTIONS.value(
+        module="aurvoui", kind="write", reason="queue_full"
+    ) >= 1
+    assert admission.ADMISSION_REJECTIONS.value(
+        module="aurvoui", kind="write", reason="timeout"
+    ) >= 1
+    assert read.status_code == 200
+
+
+def test_classify_requests(settings):
+    """Module routes are gated per slug and kind; change long-polls are not."""
+
+    def scope(method, path, query=b"", headers=()):
+        return {"method": method, "path": path, "query_string": query, "headers": headers}
+
+    assert admission.classify(scope("GET", "/health/ready")) == ("", "health")
+    assert admission.classify(scope("GET", "/modules/aurvoui")) == ("aurvoui", "read")
+    assert admission.classify(scope("POST", "/modules/aurvoui/insights")) == (
+        "aurvoui",
+        "write",
+    )
+    assert admission.classify(scope("GET", "/modules/desconocido")) is None
+    assert admission.classify(scope("GET", "/modules/")) is None
+    assert admission.classify(scope("GET", "/modules/aurvoui/changes", b"since=1&wait=5")) is None
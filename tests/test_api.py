@@ -0,0 +1,735 @@
+"""End-to-end tests for the HTTP API."""
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.app import config, profiling
+from backend.app.db import core
+from backend.app.main import app
+from backend.app.services import backups as backup_service
+from backend.app.services import modules as module_service
+
+
+@pytest.fixture()
+def client(monkeypatch, tmp_path):
+    """Run the application against a temporary data directory."""
+
+    monkeypatch.setenv("AURVO_DATA_DIR", str(tmp_path))
+    monkeypatch.delenv("AURVO_MODULES", raising=False)
+    monkeypatch.delenv("AURVO_MODULES_FILE", raising=False)
+    config.reset_settings_cache()
+    with TestClient(app) as test_client:
+        yield test_client
+    config.reset_settings_cache()
+
+
+@pytest.fixture()
+def admin(monkeypatch):
+    """Configure an admin token and return the headers that carry it."""
+
+    monkeypatch.setenv("AURVO_ADMIN_TOKEN", "secreto")
+    config.reset_settings_cache()
+    return {"Authorization": "Bearer secreto"}
+
+
+def test_liveness_does_not_touch_databases(client, monkeypatch):
+    """``/health`` answers without querying any module database."""
+
+    def fail(*args, **kwargs):
+        raise AssertionError("liveness must not query the databases")
+
+    monkeypatch.setattr(module_service, "get_module_summary", fail)
+
+    response = client.get("/health")
+
+    assert response.status_code == 200
+    assert response.json() == {"status": "ok", "module_count": len(config.DEFAULT_MODULES)}
+
+
+def test_readiness_reports_record_counts(client):
+    """``/health/ready`` includes the maintained record count of each module."""
+
+    client.post("/modules/aurvoui/insights", json={"key": "tema", "value": "oro"})
+
+    response = client.get("/health/ready")
+
+    assert response.status_code == 200
+    records = {module["slug"]: module["records"] for module in response.json()["modules"]}
+    assert records["aurvoui"] == 3
+    assert records["santosecure"] == 2
+
+
+def test_readiness_fails_when_a_module_is_unavailable(client, monkeypatch):
+    """A failing module turns the readiness probe into a 503."""
+
+    original = module_service.get_module_summary
+
+    def broken(module):
+        if module.slug == "hoc-engine":
+            raise RuntimeError("disco no disponible")
+        return original(module)
+
+    monkeypatch.setattr(module_service, "get_module_summary", broken)
+
+    response = client.get("/health/ready")
+
+    assert response.status_code == 503
+    assert response.json()["status"] == "degraded"
+
+
+def test_bulk_ingest_json_array_in_batches(client, monkeypatch):
+    """A JSON array is upserted in chunks with per-batch counts."""
+
+    monkeypatch.setenv("AURVO_BULK_BATCH_SIZE", "2")
+    config.reset_settings_cache()
+    payload = [{"key": f"k{index}", "value": str(index)} for index in range(5)]
+    payload.append({"key": "estado", "value": "mantenimiento"})
+
+    response = client.post("/modules/hoc-engine/insights/bulk", json=payload)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [batch["received"] for batch in body["batches"]] == [2, 2, 2]
+    assert (body["received"], body["inserted"], body["updated"]) == (6, 5, 1)
+    insights = {
+        insight["key"]: insight["value"]
+        for insight in client.get("/modules/hoc-engine").json()["insights"]
+    }
+    assert insights["estado"] == "mantenimiento"
+    assert insights["k4"] == "4"
+
+
+def test_bulk_ingest_ndjson_stream(client):
+    """NDJSON bodies are parsed line by line."""
+
+    lines = "\n".join(f'{{"key": "n{index}", "value": "v"}}' for index in range(3))
+
+    response = client.post(
+        "/modules/aurvocloud/insights/bulk",
+        content=lines.encode(),
+        headers={"content-type": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 200
+    assert response.json()["inserted"] == 3
+
+
+def test_bulk_ingest_reports_invalid_row(client, monkeypatch):
+    """Invalid rows fail with 422 and report the batches already committed."""
+
+    monkeypatch.setenv("AURVO_BULK_BATCH_SIZE", "1")
+    config.reset_settings_cache()
+    payload = [{"key": "ok", "value": "1"}, {"key": "sin-valor"}]
+
+    response = client.post("/modules/aurvoui/insights/bulk", json=payload)
+
+    assert response.status_code == 422
+    detail = response.json()["detail"]
+    assert detail["row"] == 2
+    assert [batch["received"] for batch in detail["committed"]] == [1]
+
+
+def test_keys_ending_in_value_are_rejected(client):
+    """``<key>/value`` is the value download route, so such keys could not be read."""
+
+    client.post("/modules/aurvoui/insights", json={"key": "informe", "value": "x"})
+    single = client.post("/modules/aurvoui/insights", json={"key": "informe/value", "value": "y"})
+    bulk = client.post(
+        "/modules/aurvoui/insights/bulk",
+        json=[{"key": "otro", "value": "x"}, {"key": "informe/value", "value": "y"}],
+    )
+
+    assert single.status_code == 422
+    assert bulk.status_code == 422
+    assert bulk.json()["detail"]["row"] == 2
+    assert "/value" in bulk.json()["detail"]["message"]
+    assert client.get("/modules/aurvoui/insights/informe/value").content == b"x"
+
+
+def _seed_keys(client, slug: str, keys: list[str]) -> None:
+    payload = [{"key": key, "value": key.upper()} for key in keys]
+    assert client.post(f"/modules/{slug}/insights/bulk", json=payload).status_code == 200
+
+
+def test_module_detail_keyset_pagination(client):
+    """``limit`` and ``cursor`` walk the insights in key order without gaps."""
+
+    _seed_keys(client, "aurvo-vehicles", ["a1", "a2", "b1", "b2", "c1"])
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2, "prefix": "", **({"cursor": cursor} if cursor else {})}
+        page = client.get("/modules/aurvo-vehicles", params=params).json()
+        seen.extend(insight["key"] for insight in page["insights"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == ["a1", "a2", "b1", "b2", "c1", "descripcion", "estado"]
+
+
+def test_module_detail_prefix_and_updated_since_filters(client):
+    """Prefix and timestamp filters narrow the returned insights."""
+
+    _seed_keys(client, "aurvo-vehicles", ["a1", "a2", "b1"])
+
+    by_prefix = client.get("/modules/aurvo-vehicles", params={"prefix": "a"}).json()
+    future = client.get(
+        "/modules/aurvo-vehicles", params={"updated_since": "2999-01-01T00:00:00Z"}
+    ).json()
+
+    assert [insight["key"] for insight in by_prefix["insights"]] == ["a1", "a2"]
+    assert future["insights"] == []
+
+
+def test_module_detail_stream_matches_regular_payload(client, monkeypatch):
+    """The streamed dump is the same document as the buffered response."""
+
+    monkeypatch.setattr(module_service, "STREAM_CHUNK_SIZE", 2)
+    _seed_keys(client, "santosecure", [f"k{index:02d}" for index in range(7)])
+
+    regular = client.get("/modules/santosecure").json()
+    streamed = client.get("/modules/santosecure", params={"stream": "true"})
+
+    assert streamed.headers["content-type"] == "application/json"
+    assert streamed.json() == regular
+
+
+def test_search_merges_hits_across_modules(client):
+    """``/search`` queries every module and orders the merged hits by rank."""
+
+    client.post("/modules/santosecure/insights", json={"key": "cifrado", "value": "clave cuántica"})
+    client.post("/modules/aurvocloud/insights", json={"key": "nodo", "value": "clave de acceso"})
+    client.post("/modules/aurvocloud/insights", json={"key": "otro", "value": "sin coincidencias"})
+
+    response = client.get("/search", params={"q": "clave"})
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert {(hit["module"], hit["key"]) for hit in results} == {
+        ("santosecure", "cifrado"),
+        ("aurvocloud", "nodo"),
+    }
+    assert [hit["rank"] for hit in results] == sorted(hit["rank"] for hit in results)
+
+
+def test_search_index_follows_updates(client):
+    """Upserted values replace the indexed text of the previous value."""
+
+    client.post("/modules/aurvoui/insights", json={"key": "tema", "value": "dorado"})
+    client.post("/modules/aurvoui/insights", json={"key": "tema", "value": "plateado"})
+
+    assert client.get("/search", params={"q": "dorado"}).json()["results"] == []
+    assert [hit["key"] for hit in client.get("/search", params={"q": "platea*"}).json()["results"]] == [
+        "tema"
+    ]
+
+
+def test_search_rejects_invalid_raw_syntax(client):
+    """Raw FTS5 syntax errors are reported as 400 instead of 500."""
+
+    response = client.get("/search", params={"q": 'clave AND "', "raw": "true"})
+
+    assert response.status_code == 400
+
+
+def test_metrics_endpoint_reports_route_templates(client):
+    """Request latency is labelled with the route template, not the raw path."""
+
+    client.get("/modules/aurvoui")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert (
+        'aurvo_http_request_duration_seconds_count{method="GET",route="/modules/{slug}",status="200"}'
+        in body
+    )
+    assert 'aurvo_db_query_duration_seconds_count{module="aurvoui",statement="fetch_insights"}' in body
+
+
+def test_module_detail_conditional_get(client):
+    """Unchanged modules revalidate with 304; writes change the ETag."""
+
+    first = client.get("/modules/aurvoui", params={"limit": 10})
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == "no-cache"
+
+    cached = client.get("/modules/aurvoui", params={"limit": 10})
+    assert cached.headers["etag"] == etag
+    assert cached.content == first.content
+
+    revalidated = client.get(
+        "/modules/aurvoui", params={"limit": 10}, headers={"If-None-Match": f'"x", {etag}'}
+    )
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+
+    other_page = client.get("/modules/aurvoui", params={"limit": 1})
+    assert other_page.headers["etag"] != etag
+
+    client.post("/modules/aurvoui/insights", json={"key": "tema", "value": "oro"})
+
+    changed = client.get(
+        "/modules/aurvoui", params={"limit": 10}, headers={"If-None-Match": etag}
+    )
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert "tema" in {insight["key"] for insight in changed.json()["insights"]}
+
+
+def test_module_list_conditional_get(client):
+    """The module list ETag follows writes to any module."""
+
+    etag = client.get("/modules/").headers["etag"]
+    assert client.get("/modules/", headers={"If-None-Match": etag}).status_code == 304
+
+    client.post("/modules/hoc-engine/insights", json={"key": "nuevo", "value": "1"})
+
+    response = client.get("/modules/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    records = {module["slug"]: module["records"] for module in response.json()}
+    assert records["hoc-engine"] == 3
+
+
+def test_module_list_pages_without_opening_databases(client, monkeypatch, tmp_path):
+    """``counts=false`` pages through the configuration; startup opens nothing."""
+
+    assert not list(tmp_path.glob("*.db"))
+
+    def fail(*args, **kwargs):
+        raise AssertionError("counts=false must not query the databases")
+
+    monkeypatch.setattr(module_service, "get_module_summary", fail)
+    slugs = []
+    url = "/modules/?limit=2&counts=false"
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        assert all(module["records"] is None for module in response.json())
+        slugs.extend(module["slug"] for module in response.json())
+        link = response.headers.get("link")
+        url = link[1 : link.index(">")] if link else None
+
+    assert slugs == sorted(config.DEFAULT_MODULES)
+    assert not list(tmp_path.glob("*.db"))
+
+
+def test_change_feed_returns_deltas(client):
+    """``since`` returns only later changes; stale cursors ask for a reload."""
+
+    head = client.get("/modules/aurvoui/changes").json()
+    assert head["changes"] == [] and head["reset"] is False
+
+    client.post("/modules/aurvoui/insights", json={"key": "tema", "value": "oro"})
+    client.post("/modules/aurvoui/insights", json={"key": "tema", "value": "plata"})
+
+    feed = client.get("/modules/aurvoui/changes", params={"since": head["next_since"]}).json()
+    assert [(change["key"], change["value"]) for change in feed["changes"]] == [
+        ("tema", "oro"),
+        ("tema", "plata"),
+    ]
+    assert feed["next_since"] == feed["changes"][-1]["seq"]
+
+    idle = client.get(
+        "/modules/aurvoui/changes", params={"since": feed["next_since"], "wait": 0.05}
+    ).json()
+    assert idle["changes"] == [] and idle["next_since"] == feed["next_since"]
+
+    future = client.get("/modules/aurvoui/changes", params={"since": 10**9}).json()
+    assert future["reset"] is True
+    assert client.get("/modules/desconocido/changes").status_code == 404
+
+
+@pytest.mark.parametrize("export_format", ["ndjson", "csv"])
+def test_export_round_trips_through_bulk_import(client, export_format):
+    """An export can be imported into another module unchanged."""
+
+    client.post(
+        "/modules/aurvoui/insights/bulk",
+        json=[
+            {"key": "cita", "value": 'dijo "hola", luego\nse fue'},
+            {"key": "ñ", "value": "ü"},
+            {"key": "efímero", "value": "x", "expires_at": "2999-01-01T12:30:00+02:00"},
+        ],
+    )
+
+    exported = client.get("/modules/aurvoui/export", params={"format": export_format})
+    assert exported.status_code == 200
+    assert exported.headers["content-disposition"].endswith(f'aurvoui.{export_format}"')
+
+    content_type = "application/x-ndjson" if export_format == "ndjson" else "text/csv"
+    imported = client.post(
+        "/modules/aurvocloud/insights/bulk",
+        content=exported.content,
+        headers={"content-type": content_type},
+    )
+    assert imported.status_code == 200
+
+    def values(slug: str) -> dict:
+        return {
+            insight["key"]: insight["value"]
+            for insight in client.get(f"/modules/{slug}").json()["insights"]
+        }
+
+    source, target = values("aurvoui"), values("aurvocloud")
+    assert {key: target[key] for key in source} == source
+
+    def expiries(slug: str) -> dict:
+        with core.connect(slug, readonly=True) as connection:
+            return dict(connection.execute(f"SELECT key, expires_at FROM {core.DATABASE_TABLE}"))
+
+    assert expiries("aurvocloud")["efímero"] == "2999-01-01 10:30:00"
+    assert {key: expiries("aurvocloud")[key] for key in source} == expiries("aurvoui")
+
+
+def test_single_insight_and_multi_get(client):
+    """Insights are readable by key, revalidate with 304 and can be fetched in batches."""
+
+    client.post("/modules/aurvocloud/insights", json={"key": "zona/norte", "value": "activa"})
+
+    first = client.get("/modules/aurvocloud/insights/zona/norte")
+    assert first.status_code == 200
+    assert first.json()["value"] == "activa"
+    etag = first.headers["etag"]
+    assert client.get(
+        "/modules/aurvocloud/insights/zona/norte", headers={"If-None-Match": etag}
+    ).status_code == 304
+    assert client.get("/modules/aurvocloud/insights/nada").status_code == 404
+    assert client.get("/modules/nada/insights/zona").status_code == 404
+
+    client.post("/modules/aurvocloud/insights", json={"key": "zona/norte", "value": "inactiva"})
+    client.post("/modules/aurvocloud/insights", json={"key": "a,b", "value": "coma"})
+    changed = client.get("/modules/aurvocloud/insights/zona/norte", headers={"If-None-Match": etag})
+    assert (changed.status_code, changed.json()["value"]) == (200, "inactiva")
+
+    batch = client.get(
+        "/modules/aurvocloud/insights",
+        params=[("keys", "zona/norte"), ("keys", "nada"), ("keys", "a,b"), ("keys", "otra")],
+    ).json()
+    assert [insight["value"] for insight in batch["insights"]] == ["inactiva", "coma"]
+    assert batch["missing"] == ["nada", "otra"]
+    listed = client.get("/modules/aurvocloud/insights", params={"keys": "zona/norte,a,nada"})
+    assert [insight["key"] for insight in listed.json()["insights"]] == ["zona/norte"]
+    assert listed.json()["missing"] == ["a", "nada"]
+    too_many = [f"k{index}" for index in range(module_service.MULTI_GET_LIMIT + 1)]
+    response = client.get("/modules/aurvocloud/insights", params={"keys": too_many})
+    assert response.status_code == 422
+
+    assert 'aurvo_insight_cache_events_total{event="hit"}' in client.get("/metrics").text
+
+
+def test_snapshot_and_restore(client, admin):
+    """Snapshots capture a module and ``restore_snapshot`` brings it back."""
+
+    client.post("/modules/hoc-engine/insights", json={"key": "fase", "value": "antes"})
+
+    created = client.post("/admin/snapshots", params={"module": "hoc-engine"}, headers=admin)
+    assert created.status_code == 201
+    snapshot = created.json()
+    assert snapshot["modules"]["hoc-engine"]["records"] == 3
+    listed = client.get("/admin/snapshots", headers=admin).json()
+    assert [item["name"] for item in listed] == [snapshot["name"]]
+
+    client.post("/modules/hoc-engine/insights", json={"key": "fase", "value": "después"})
+    assert client.get("/modules/hoc-engine/insights/fase").json()["value"] == "después"
+    assert backup_service.restore_snapshot(snapshot["name"]) == ["hoc-engine"]
+    assert client.get("/modules/hoc-engine/insights/fase").json()["value"] == "antes"
+
+    insights = client.get("/modules/hoc-engine").json()["insights"]
+    assert {insight["key"]: insight["value"] for insight in insights}["fase"] == "antes"
+    missing = client.post("/admin/snapshots", params={"module": "nada"}, headers=admin)
+    assert missing.status_code == 404
+
+
+def test_large_values_are_offloaded_and_served_with_ranges(client, monkeypatch, tmp_path):
+    """Values above the threshold become references served by ``/value``."""
+
+    monkeypatch.setenv("AURVO_BLOB_THRESHOLD_BYTES", "1024")
+    config.reset_settings_cache()
+    value = "ñandú " * 400
+    data = value.encode()
+
+    created = client.post("/modules/aurvoui/insights", json={"key": "grande", "value": value})
+    assert created.json()["value"] is None
+    assert created.json()["value_ref"]["size"] == len(data)
+    client.post("/modules/aurvocloud/insights", json={"key": "copia", "value": value})
+    assert len(list((tmp_path / "blobs").glob("*/*.gz"))) == 1
+
+    listed = client.get("/modules/aurvoui", params={"prefix": "grande"}).json()["insights"]
+    assert listed[0]["value"] is None and listed[0]["value_ref"]["size"] == len(data)
+
+    url = "/modules/aurvoui/insights/grande/value"
+    identity = {"Accept-Encoding": "identity"}
+    full = client.get(url, headers=identity)
+    assert full.status_code == 200 and full.content == data
+    partial = client.get(url, headers={**identity, "Range": "bytes=7-2000"})
+    assert partial.status_code == 206
+    assert partial.headers["content-range"] == f"bytes 7-2000/{len(data)}"
+    assert partial.content == data[7:2001]
+    assert client.get(url, headers={**identity, "Range": "bytes=999999-"}).status_code == 416
+    assert (
+        client.get(url, headers={**identity, "If-None-Match": full.headers["etag"]}).status_code
+        == 304
+    )
+
+    encoded = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert encoded.headers["content-encoding"] == "gzip"
+    assert encoded.content == data  # httpx inflates the stored gzip file
+
+    exported = [json.loads(line) for line in client.get("/modules/aurvoui/export").iter_lines()]
+    assert {"key": "grande", "value": value} in [
+        {"key": row["key"], "value": row["value"]} for row in exported
+    ]
+
+
+def test_missing_blob_files_are_reported_as_not_found(client, monkeypatch, tmp_path):
+    """A referenced blob whose file is gone answers 404 instead of failing."""
+
+    monkeypatch.setenv("AURVO_BLOB_THRESHOLD_BYTES", "16")
+    config.reset_settings_cache()
+    client.post("/modules/aurvoui/insights", json={"key": "perdido", "value": "x" * 64})
+    for path in (tmp_path / "blobs").glob("*/*.gz"):
+        path.unlink()
+
+    url = "/modules/aurvoui/insights/perdido/value"
+    for encoding in ("identity", "gzip"):
+        response = client.get(url, headers={"Accept-Encoding": encoding})
+        assert response.status_code == 404
+        assert "perdido" in response.json()["detail"]
+
+
+def test_inline_value_etag_changes_within_the_same_second(client):
+    """Overwrites sharing an ``updated_at`` second still invalidate ``/value``."""
+
+    url = "/modules/aurvoui/insights/rapido/value"
+    insight_url = "/modules/aurvoui/insights/rapido"
+    for _ in range(5):  # retry if the two writes straddle a second boundary
+        client.post("/modules/aurvoui/insights", json={"key": "rapido", "value": "uno"})
+        first = client.get(url)
+        before = client.get(insight_url).json()["updated_at"]
+        client.post("/modules/aurvoui/insights", json={"key": "rapido", "value": "dos"})
+        if client.get(insight_url).json()["updated_at"] == before:
+            break
+    revalidated = client.get(url, headers={"If-None-Match": first.headers["etag"]})
+
+    assert revalidated.status_code == 200
+    assert revalidated.content == b"dos"
+
+
+def test_blob_garbage_collection_endpoint(client, admin, monkeypatch):
+    """Overwritten large values are collected once unreferenced."""
+
+    monkeypatch.setenv("AURVO_BLOB_THRESHOLD_BYTES", "16")
+    config.reset_settings_cache()
+    client.post("/modules/hoc-engine/insights", json={"key": "doc", "value": "a" * 64})
+    client.post("/modules/hoc-engine/insights", json={"key": "doc", "value": "b" * 64})
+
+    response = client.post("/admin/blobs/gc", params={"grace_seconds": 0}, headers=admin)
+
+    assert response.json() == {"removed": 1}
+    value = client.get("/modules/hoc-engine/insights/doc/value")
+    assert value.text == "b" * 64
+
+
+def test_sharded_module_snapshot_and_change_feeds(client, admin, monkeypatch, tmp_path):
+    """Every shard is snapshotted, restored and followed through its own feed."""
+
+    modules = [{"slug": "hot", "title": "Hot", "description": "-", "shards": 3}]
+    monkeypatch.setenv("AURVO_MODULES", json.dumps(modules))
+    config.reset_settings_cache()
+    payload = "\n".join(json.dumps({"key": f"k{index}", "value": "antes"}) for index in range(30))
+    client.post(
+        "/modules/hot/insights/bulk",
+        content=payload,
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+
+    snapshot = client.post("/admin/snapshots", headers=admin).json()
+    assert snapshot["modules"]["hot"]["records"] == 32
+    assert snapshot["modules"]["hot"]["shards"] == 3
+    client.post("/modules/hot/insights", json={"key": "k7", "value": "después"})
+    backup_service.restore_snapshot(snapshot["name"])
+    values = {item["key"]: item["value"] for item in client.get("/modules/hot").json()["insights"]}
+    assert values["k7"] == "antes" and len(values) == 32
+
+    shard = core.shard_for_key("k7", 3)
+    head = client.get("/modules/hot/changes", params={"shard": shard}).json()["next_since"]
+    client.post("/modules/hot/insights", json={"key": "k7", "value": "otra vez"})
+    feed = client.get("/modules/hot/changes", params={"shard": shard, "since": head}).json()
+    assert [change["key"] for change in feed["changes"]] == ["k7"]
+    assert client.get("/modules/hot/changes", params={"shard": 3}).status_code == 422
+
+
+def test_query_by_indexed_field(client, monkeypatch):
+    """``/query`` filters on declared JSON fields and revalidates with ETags."""
+
+    modules = [{"slug": "iot", "title": "IoT", "description": "-", "indexes": ["sensor.temp"]}]
+    monkeypatch.setenv("AURVO_MODULES", json.dumps(modules))
+    config.reset_settings_cache()
+    for index, temp in enumerate([18, 21.5, 25, 30]):
+        value = json.dumps({"sensor": {"temp": temp}})
+        client.post("/modules/iot/insights", json={"key": f"s{index}", "value": value})
+
+    response = client.get(
+        "/modules/iot/query", params={"field": "sensor.temp", "gt": "20", "lte": "25"}
+    )
+    assert [item["key"] for item in response.json()["insights"]] == ["s1", "s2"]
+    assert client.get("/modules/").json()[0]["indexes"] == ["sensor.temp"]
+
+    etag = response.headers["etag"]
+    repeated = client.get(
+        "/modules/iot/query",
+        params={"field": "sensor.temp", "gt": "20", "lte": "25"},
+        headers={"If-None-Match": etag},
+    )
+    assert repeated.status_code == 304
+    assert client.get("/modules/iot/query", params={"field": "otro"}).status_code == 422
+    bad_cursor = client.get("/modules/iot/query", params={"field": "sensor.temp", "cursor": "x"})
+    assert bad_cursor.status_code == 422
+
+
+def test_debug_endpoints_require_the_admin_token(client, monkeypatch):
+    """``/debug`` is off without a token and rejects a wrong one."""
+
+    monkeypatch.delenv("AURVO_ADMIN_TOKEN", raising=False)
+    config.reset_settings_cache()
+    assert client.get("/debug/slow-requests").status_code == 403
+
+    monkeypatch.setenv("AURVO_ADMIN_TOKEN", "secreto")
+    config.reset_settings_cache()
+    denied = client.get("/debug/slow-requests", headers={"Authorization": "Bearer otro"})
+    assert denied.status_code == 401
+    assert denied.headers["www-authenticate"] == "Bearer"
+
+    response = client.get(
+        "/debug/profile",
+        params={"seconds": 0.05, "interval_ms": 1},
+        headers={"Authorization": "Bearer secreto"},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    stack, count = response.text.splitlines()[0].rsplit(" ", 1)
+    assert int(count) >= 1 and ";" in stack
+
+
+def test_admin_endpoints_require_the_admin_token(client, admin):
+    """Snapshots and blob collection are refused without the bearer token."""
+
+    assert client.post("/admin/snapshots").status_code == 401
+    assert client.get("/admin/snapshots").status_code == 401
+    denied = client.post(
+        "/admin/blobs/gc",
+        params={"grace_seconds": 0},
+        headers={"Authorization": "Bearer otro"},
+    )
+    assert denied.status_code == 401
+    assert denied.headers["www-authenticate"] == "Bearer"
+    assert client.get("/admin/snapshots", headers=admin).status_code == 200
+
+
+def test_slow_requests_record_phase_breakdown(client, monkeypatch):
+    """Requests over the threshold are kept with connect, query and serialise times."""
+
+    monkeypatch.setenv("AURVO_ADMIN_TOKEN", "secreto")
+    monkeypatch.setenv("AURVO_SLOW_REQUEST_MS", "0.001")
+    config.reset_settings_cache()
+    profiling.SLOW_REQUESTS.clear()
+    client.post("/modules/aurvoui/insights", json={"key": "tema", "value": "oro"})
+    module_service.clear_insight_cache()
+
+    assert client.get("/modules/aurvoui/insights/tema").status_code == 200
+
+    entries = client.get(
+        "/debug/slow-requests", headers={"Authorization": "Bearer secreto"}
+    ).json()
+    read = next(entry for entry in entries if entry["path"] == "/modules/aurvoui/insights/tema")
+    assert read["route"] == "/modules/{slug}/insights/{key:path}"
+    assert read["status"] == 200
+    assert {"connect", "query", "serialise"} <= set(read["phases"])
+    write = next(entry for entry in entries if entry["method"] == "POST")
+    assert "write" in write["phases"]
+    profiling.SLOW_REQUESTS.clear()
+
+
+def test_rewrites_without_expires_at_keep_the_expiry(client):
+    """Only an explicit ``expires_at: null`` clears an expiry set earlier."""
+
+    url = "/modules/aurvoui/insights"
+    future = "2999-01-01T00:00:00Z"
+    client.post(url, json={"key": "ttl", "value": "a", "expires_at": future})
+
+    kept = client.post(url, json={"key": "ttl", "value": "b"})
+    bulk = client.post(
+        f"{url}/bulk", content="key,value\nttl,c\n", headers={"Content-Type": "text/csv"}
+    )
+    after_bulk = client.get(f"{url}/ttl")
+    cleared = client.post(url, json={"key": "ttl", "value": "d", "expires_at": None})
+    fresh = client.post(url, json={"key": "nuevo", "value": "e"})
+
+    assert kept.json()["expires_at"] == "2999-01-01T00:00:00"
+    assert bulk.status_code == 200
+    assert (after_bulk.json()["value"], after_bulk.json()["expires_at"]) == (
+        "c",
+        "2999-01-01T00:00:00",
+    )
+    assert cleared.json()["expires_at"] is None
+    assert fresh.json()["expires_at"] is None
+
+
+def test_expiring_insights_disappear_after_a_sweep(client, monkeypatch):
+    """``expires_at`` and ``retention_seconds`` schedule rows for the sweeper."""
+
+    from backend.app.services import retention
+
+    modules = [{"slug": "iot", "title": "IoT", "description": "-", "retention_seconds": 3600}]
+    monkeypatch.setenv("AURVO_MODULES", json.dumps(modules))
+    config.reset_settings_cache()
+    past = "2000-01-01T00:00:00Z"
+    created = client.post(
+        "/modules/iot/insights", json={"key": "caduco", "value": "a", "expires_at": past}
+    )
+    retained = client.post("/modules/iot/insights", json={"key": "retenido", "value": "b"})
+    assert created.json()["expires_at"] == "2000-01-01T00:00:00"
+    assert retained.json()["expires_at"] > "2000-01-01T00:00:00"
+    csv_body = f"key,value,expires_at\nlote-1,c,{past}\nlote-2,d,\n"
+    bulk = client.post(
+        "/modules/iot/insights/bulk", content=csv_body, headers={"Content-Type": "text/csv"}
+    )
+    assert bulk.status_code == 200
+    cached = client.get("/modules/iot/insights/caduco")  # now cached
+    assert cached.json()["expires_at"] == "2000-01-01T00:00:00"
+    detail = client.get("/modules/iot", headers={"Accept-Encoding": "identity"}).json()
+    listed = {insight["key"]: insight["expires_at"] for insight in detail["insights"]}
+    assert listed["caduco"] == listed["lote-1"] == "2000-01-01T00:00:00"
+    assert listed["retenido"] == retained.json()["expires_at"]
+    assert listed["lote-2"] > "2000-01-01T00:00:00"
+    assert listed["estado"] is None  # seed records never expire
+
+    assert retention.sweep_open_modules() == 2
+
+    assert client.get("/modules/iot/insights/caduco").status_code == 404
+    remaining = client.get(
+        "/modules/iot/insights", params={"keys": ["lote-1", "lote-2", "retenido"]}
+    )
+    assert remaining.json()["missing"] == ["lote-1"]
+    assert [insight["expires_at"] for insight in remaining.json()["insights"]] == [
+        listed["lote-2"],
+        listed["retenido"],
+    ]
+    with core.connect("iot", readonly=True) as connection:
+        expiries = dict(connection.execute(f"SELECT key, expires_at FROM {core.DATABASE_TABLE}"))
+    soon = core.format_expiry(None, 3000)
+    assert expiries["retenido"] > soon and expiries["lote-2"] > soon
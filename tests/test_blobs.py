@@ -0,0 +1,58 @@
+"""Tests for the content-addressed blob store."""
+from __future__ import annotations
+
+import os
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.app.db import blobs
+
+
+def _random_text(size: int) -> str:
+    return os.urandom(size // 2).hex()
+
+
+def test_offload_deduplicates_and_skips_small_values(tmp_path):
+    """Values below the threshold stay inline; equal values share one file."""
+
+    store = blobs.BlobStore(tmp_path, threshold=100, level=6)
+    value = "ñ" * 60  # 60 characters but 120 bytes
+
+    assert store.offload("x" * 99) is None
+    digest, size = store.offload(value)
+    assert store.offload(value) == (digest, size)
+    assert size == 120
+    assert list(store.digests()) == [digest]
+    assert store.read(digest) == value
+
+
+def test_ranges_of_decompressed_and_compressed_bytes(tmp_path):
+    """Ranges spanning several read chunks match slices of the stored bytes."""
+
+    store = blobs.BlobStore(tmp_path, threshold=1, level=6)
+    value = _random_text(3 * blobs.READ_CHUNK_SIZE + 123)
+    digest, _ = store.offload(value)
+    data = value.encode()
+    compressed = store.path(digest).read_bytes()
+
+    chunk = blobs.READ_CHUNK_SIZE
+    for start, stop in [(0, 10), (chunk - 5, 2 * chunk + 7), (len(data) - 3, len(data))]:
+        assert b"".join(store.iter_range(digest, start, stop)) == data[start:stop]
+    assert b"".join(store.iter_compressed_range(digest, 5, len(compressed))) == compressed[5:]
+
+
+def test_garbage_collection_respects_references_and_grace(tmp_path):
+    """Only unreferenced files older than the grace period are removed."""
+
+    store = blobs.BlobStore(tmp_path, threshold=1, level=1)
+    keep, _ = store.offload("conservar")
+    drop, _ = store.offload("descartar")
+
+    assert store.collect_garbage([keep], grace_seconds=3600) == 0
+    assert store.collect_garbage([keep], grace_seconds=0) == 1
+    assert list(store.digests()) == [keep]
+    assert not store.path(drop).exists()
@@ -0,0 +1,108 @@
+"""Tests for the in-process caches and ETag helpers."""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import pytest
+
+from backend.app import http_cache
+from backend.app.cache import LRUCache
+
+
+def test_lru_cache_evicts_least_recently_used_by_size():
+    """Entries are evicted oldest-first once the byte budget is exceeded."""
+
+    cache: LRUCache[bytes] = LRUCache(10)
+    cache.put("a", b"aaaa")
+    cache.put("b", b"bbbb")
+    assert cache.get("a") == b"aaaa"
+
+    cache.put("c", b"cccc")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == b"aaaa"
+    assert cache.get("c") == b"cccc"
+    assert (cache.size, cache.evictions) == (8, 1)
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_lru_cache_skips_values_larger_than_the_budget():
+    """A value that cannot fit is not stored and does not flush the cache."""
+
+    cache: LRUCache[bytes] = LRUCache(4)
+    cache.put("small", b"ab")
+    cache.put("big", b"abcdef")
+
+    assert cache.get("big") is None
+    assert cache.get("small") == b"ab"
+
+
+def test_lru_cache_expires_entries_after_their_ttl(monkeypatch):
+    """Entries older than ``ttl_seconds`` are dropped on access."""
+
+    now = [100.0]
+    monkeypatch.setattr("backend.app.cache.time.monotonic", lambda: now[0])
+    cache: LRUCache[bytes] = LRUCache(10, ttl_seconds=5)
+    cache.put("a", b"aa")
+    now[0] += 4
+    assert cache.get("a") == b"aa"
+    now[0] += 2
+
+    assert cache.get("a") is None
+    assert (cache.size, cache.expirations) == (0, 1)
+
+
+def test_lru_cache_ignores_loads_that_raced_an_invalidation():
+    """A value loaded before a ``discard`` of its key is not stored."""
+
+    cache: LRUCache[bytes] = LRUCache(10)
+    generation = cache.generation("a")
+    cache.discard("a")
+    cache.put("a", b"stale", generation=generation)
+    assert cache.get("a") is None
+
+    cache.put("a", b"fresh", generation=cache.generation("a"))
+    assert cache.get("a") == b"fresh"
+
+
+def test_etag_matching_follows_if_none_match_rules():
+    """Lists, ``*`` and weak validators are compared weakly."""
+
+    etag = http_cache.make_etag("aurvoui", 7)
+
+    assert etag.startswith('"') and etag.endswith('"')
+    assert etag == http_cache.make_etag("aurvoui", 7)
+    assert etag != http_cache.make_etag("aurvoui", 8)
+    assert http_cache.etag_matches(f'"otro", W/{etag}', etag)
+    assert http_cache.etag_matches("*", etag)
+    assert not http_cache.etag_matches('"otro"', etag)
+    assert not http_cache.etag_matches(None, etag)
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("bytes=0-9", (0, 10)),
+        ("bytes=90-", (90, 100)),
+        ("bytes=-5", (95, 100)),
+        ("bytes=95-500", (95, 100)),
+        ("bytes=0-1,5-6", None),
+        ("items=0-1", None),
+        ("bytes=x-1", None),
+        (None, None),
+    ],
+)
+def test_parse_range(header, expected):
+    """Single byte ranges are clamped; other forms fall back to the full body."""
+
+    assert http_cache.parse_range(header, 100) == expected
+
+
+def test_parse_range_rejects_ranges_past_the_end():
+    with pytest.raises(http_cache.RangeNotSatisfiable):
+        http_cache.parse_range("bytes=100-", 100)
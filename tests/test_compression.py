@@ -0,0 +1,200 @@
+"""Tests for negotiated response compression and the precompressed cache."""
+from __future__ import annotations
+
+import asyncio
+import sys
+import zlib
+from pathlib import Path
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from starlette.datastructures import Headers
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.app import compression, config, metrics
+from backend.app.main import app
+
+
+@pytest.fixture()
+def settings(monkeypatch, tmp_path):
+    monkeypatch.setenv("AURVO_DATA_DIR", str(tmp_path))
+    monkeypatch.delenv("AURVO_MODULES", raising=False)
+    monkeypatch.delenv("AURVO_MODULES_FILE", raising=False)
+    monkeypatch.setenv("AURVO_COMPRESSION_MIN_BYTES", "512")
+    config.reset_settings_cache()
+    yield config.get_settings()
+    config.reset_settings_cache()
+
+
+@pytest.mark.parametrize(
+    ("header", "expected"),
+    [
+        (None, None),
+        ("identity", None),
+        ("gzip, deflate, br", "gzip"),
+        ("deflate", "deflate"),
+        ("gzip;q=0.5, deflate", "deflate"),
+        ("gzip;q=0, *", "deflate"),
+        ("*;q=0", None),
+        ("x-gzip", "gzip"),
+    ],
+)
+def test_negotiate_accept_encoding(header, expected):
+    assert compression.negotiate(header, config.CompressionSettings()) == expected
+
+
+def test_negotiate_is_disabled_by_level_zero():
+    assert compression.negotiate("gzip", config.CompressionSettings(level=0)) is None
+
+
+def test_module_detail_is_compressed_once_per_version(settings):
+    """Repeated reads of one version are answered from the compressed cache."""
+
+    def compressed_bytes():
+        return compression.COMPRESSION_BYTES.value(coding="gzip", stage="original")
+
+    with TestClient(app) as client:
+        for index in range(40):
+            client.post(
+                "/modules/aurvoui/insights", json={"key": f"tema-{index}", "value": "oro " * 10}
+            )
+        plain = client.get("/modules/aurvoui", headers={"Accept-Encoding": "identity"})
+        before = compressed_bytes()
+        first = client.get("/modules/aurvoui", headers={"Accept-Encoding": "gzip"})
+        after_first = compressed_bytes()
+        second = client.get("/modules/aurvoui", headers={"Accept-Encoding": "gzip"})
+        revalidated = client.get(
+            "/modules/aurvoui",
+            headers={"Accept-Encoding": "gzip", "If-None-Match": first.headers["etag"]},
+        )
+        deflated = client.get("/modules/aurvoui", headers={"Accept-Encoding": "deflate"})
+
+    assert "content-encoding" not in plain.headers
+    assert first.headers["content-encoding"] == "gzip"
+    assert first.headers["vary"] == "Accept-Encoding"
+    assert first.headers["etag"] == plain.headers["etag"][:-1] + '-gz"'
+    assert first.content == plain.content
+    assert after_first - before == len(plain.content)
+    assert second.content == plain.content
+    assert compressed_bytes() == after_first
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == first.headers["etag"]
+    assert deflated.headers["content-encoding"] == "deflate"
+    assert deflated.headers["etag"] == plain.headers["etag"][:-1] + '-zz"'
+    assert deflated.content == plain.content
+
+
+def test_small_bodies_are_not_compressed(settings):
+    with TestClient(app) as client:
+        response = client.get("/modules/aurvoui/insights/inexistente")
+
+    assert response.status_code == 404
+    assert "content-encoding" not in response.headers
+
+
+def test_middleware_compresses_streams_chunk_by_chunk(settings):
+    """Each chunk is flushed as it goes and the whole stream decodes back."""
+
+    chunks = [b'{"items": [', b'"' + b"a" * 2000 + b'"', b"]}"]
+
+    async def app(scope, receive, send):
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"application/json"), (b"etag", b'"v1"')],
+            }
+        )
+        for index, chunk in enumerate(chunks):
+            more = index < len(chunks) - 1
+            await send({"type": "http.response.body", "body": chunk, "more_body": more})
+
+    async def scenario():
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        async def receive():
+            return {"type": "http.request", "body": b""}
+
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": "/",
+            "headers": [(b"accept-encoding", b"deflate"), (b"if-none-match", b'"v0-zz"')],
+        }
+        await compression.CompressionMiddleware(app)(scope, receive, send)
+        return sent
+
+    start, *bodies = asyncio.run(scenario())
+    headers = dict(start["headers"])
+
+    assert headers[b"content-encoding"] == b"deflate"
+    assert headers[b"etag"] == b'"v1-zz"'
+    assert b"content-length" not in headers
+    assert all(body["body"] for body in bodies)
+    decoder = zlib.decompressobj()
+    assert decoder.decompress(bodies[0]["body"]) == chunks[0]
+    assert zlib.decompress(b"".join(body["body"] for body in bodies)) == b"".join(chunks)
+
+
+def test_middleware_maps_encoded_validators_to_identity(settings):
+    """A client holding the gzip ETag of a streamed body revalidates with 304."""
+
+    async def app(scope, receive, send):
+        matched = '"v1"' in Headers(scope=scope).get("if-none-match", "")
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 304 if matched else 200,
+                "headers": [(b"content-type", b"text/plain"), (b"etag", b'"v1"')],
+            }
+        )
+        await send({"type": "http.response.body", "body": b"" if matched else b"x" * 4096})
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=compression.CompressionMiddleware(app))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            full = await client.get("/", headers={"Accept-Encoding": "gzip"})
+            revalidated = await client.get(
+                "/", headers={"Accept-Encoding": "gzip", "If-None-Match": full.headers["etag"]}
+            )
+            return full, revalidated
+
+    full, revalidated = asyncio.run(scenario())
+
+    assert full.headers["etag"] == '"v1-gz"'
+    assert full.content == b"x" * 4096
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == '"v1-gz"'
+    assert revalidated.headers["vary"] == "Accept-Encoding"
+
+
+def test_revalidated_encoded_responses_keep_their_route_label(settings):
+    """Rewriting ``If-None-Match`` must not hide the matched route from the metrics."""
+
+    def revalidations():
+        return metrics.HTTP_REQUEST_DURATION.count(
+            method="GET", route="/modules/{slug}", status="304"
+        )
+
+    with TestClient(app) as client:
+        for index in range(40):
+            client.post(
+                "/modules/aurvoui/insights", json={"key": f"tema-{index}", "value": "oro " * 10}
+            )
+        first = client.get("/modules/aurvoui", headers={"Accept-Encoding": "gzip"})
+        before = revalidations()
+        revalidated = client.get(
+            "/modules/aurvoui",
+            headers={"Accept-Encoding": "gzip", "If-None-Match": first.headers["etag"]},
+        )
+
+    assert first.headers["etag"].endswith('-gz"')
+    assert revalidated.status_code == 304
+    assert revalidations() == before + 1
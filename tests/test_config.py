@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 import json
+import os
 import sys
 from pathlib import Path
 
@@ -36,6 +37,31 @@ def test_default_configuration(monkeypatch, tmp_path):
     assert set(settings.modules) == set(config.DEFAULT_MODULES)
 
 
+def test_module_pages_follow_slug_order(monkeypatch, tmp_path):
+    """Pages walk the configured slugs in order without touching the data dir."""
+
+    data_dir = tmp_path / "data"
+    modules = [
+        {"slug": f"tenant-{index:04d}", "title": f"Tenant {index}", "description": "Cliente."}
+        for index in reversed(range(2500))
+    ]
+    monkeypatch.setenv("AURVO_DATA_DIR", str(data_dir))
+    monkeypatch.setenv("AURVO_MODULES", json.dumps(modules))
+    monkeypatch.delenv("AURVO_MODULES_FILE", raising=False)
+
+    seen = []
+    after = None
+    while True:
+        page, after = config.list_modules_page(1000, after)
+        seen.extend(module.slug for module in page)
+        if after is None:
+            break
+
+    assert seen == sorted(module["slug"] for module in modules)
+    assert config.list_modules_page(10, "tenant-2499") == ([], None)
+    assert not data_dir.exists()
+
+
 def test_modules_override_via_env(monkeypatch, tmp_path):
     """Modules can be defined via the JSON payload environment variable."""
 
@@ -96,3 +122,169 @@ def test_invalid_module_payload_raises_runtime_error(monkeypatch, tmp_path):
         config.get_settings()
 
     assert "JSON inválido" in str(excinfo.value)
+
+
+def test_module_shards(monkeypatch, tmp_path):
+    """``shards`` is optional and must be a small positive integer."""
+
+    monkeypatch.setenv("AURVO_DATA_DIR", str(tmp_path))
+    monkeypatch.setenv(
+        "AURVO_MODULES",
+        '[{"slug": "a", "title": "A", "description": "-"},'
+        ' {"slug": "b", "title": "B", "description": "-", "shards": 4}]',
+    )
+
+    modules = config.get_settings().modules
+
+    assert (modules["a"].shards, modules["b"].shards) == (1, 4)
+
+    config.reset_settings_cache()
+    monkeypatch.setenv(
+        "AURVO_MODULES", '[{"slug": "a", "title": "A", "description": "-", "shards": 0}]'
+    )
+    with pytest.raises(RuntimeError, match="shards"):
+        config.get_settings()
+
+
+@pytest.mark.parametrize("retention, error", [(None, None), (86400, None), (0, "positivo")])
+def test_module_retention(monkeypatch, tmp_path, retention, error):
+    """``retention_seconds`` is optional and must be a positive integer."""
+
+    monkeypatch.setenv("AURVO_DATA_DIR", str(tmp_path))
+    module = {"slug": "a", "title": "A", "description": "-", "retention_seconds": retention}
+    monkeypatch.setenv("AURVO_MODULES", json.dumps([module]))
+
+    if error is None:
+        assert config.get_settings().modules["a"].retention_seconds == retention
+    else:
+        with pytest.raises(RuntimeError, match=error):
+            config.get_settings()
+
+
+@pytest.mark.parametrize(
+    "indexes, error",
+    [
+        (["estado", "metricas.latencia_ms", "estado"], None),
+        (["estado; DROP TABLE x"], "inválidos"),
+        (["a..b"], "inválidos"),
+        (["Estado", "estado"], "mayúsculas"),
+        ("estado", "lista"),
+    ],
+)
+def test_module_json_indexes(monkeypatch, tmp_path, indexes, error):
+    """Indexed JSON fields are plain dotted identifiers."""
+
+    monkeypatch.setenv("AURVO_DATA_DIR", str(tmp_path))
+    module = {"slug": "a", "title": "A", "description": "-", "indexes": indexes}
+    monkeypatch.setenv("AURVO_MODULES", json.dumps([module]))
+
+    if error is None:
+        assert config.get_settings().modules["a"].indexes == ("estado", "metricas.latencia_ms")
+    else:
+        with pytest.raises(RuntimeError, match=error):
+            config.get_settings()
+
+
+def test_database_settings_from_env(monkeypatch, tmp_path):
+    """Pool size and PRAGMA tuning can be overridden through the environment."""
+
+    monkeypatch.setenv("AURVO_DATA_DIR", str(tmp_path))
+    monkeypatch.delenv("AURVO_MODULES", raising=False)
+    monkeypatch.delenv("AURVO_MODULES_FILE", raising=False)
+    monkeypatch.setenv("AURVO_DB_POOL_SIZE", "8")
+    monkeypatch.setenv("AURVO_DB_SYNCHRONOUS", "full")
+    monkeypatch.setenv("AURVO_DB_MMAP_SIZE", "0")
+    monkeypatch.setenv("AURVO_RESPONSE_CACHE_BYTES", "0")
+    monkeypatch.setenv("AURVO_BLOB_THRESHOLD_BYTES", "4096")
+    monkeypatch.setenv("AURVO_INSIGHT_CACHE_TTL_SECONDS", "2.5")
+    monkeypatch.setenv("AURVO_COMPRESSION_LEVEL", "0")
+    monkeypatch.setenv("AURVO_COMPRESSION_MIN_BYTES", "2048")
+
+    database = config.get_settings().database
+
+    assert database.pool_size == 8
+    assert database.synchronous == "FULL"
+    assert database.mmap_size == 0
+    assert database.journal_mode == "WAL"
+    assert config.get_settings().cache.response_bytes == 0
+    assert config.get_settings().cache.insight_ttl_seconds == 2.5
+    assert config.get_settings().blobs.threshold_bytes == 4096
+    assert config.get_settings().blobs_path == tmp_path / "blobs"
+    assert config.get_settings().compression == config.CompressionSettings(min_bytes=2048, level=0)
+
+
+def test_invalid_database_settings_raise_runtime_error(monkeypatch, tmp_path):
+    """Unsupported PRAGMA values are rejected before reaching SQLite."""
+
+    monkeypatch.setenv("AURVO_DATA_DIR", str(tmp_path))
+    monkeypatch.delenv("AURVO_MODULES", raising=False)
+    monkeypatch.setenv("AURVO_DB_JOURNAL_MODE", "wal; DROP TABLE x")
+
+    with pytest.raises(RuntimeError) as excinfo:
+        config.get_settings()
+
+    assert "AURVO_DB_JOURNAL_MODE" in str(excinfo.value)
+
+
+def _write_modules(path: Path, slugs: list[str], mtime: int) -> None:
+    payload = {"modules": [{"slug": slug, "title": slug, "description": "-"} for slug in slugs]}
+    path.write_text(json.dumps(payload), encoding="utf-8")
+    os.utime(path, ns=(mtime, mtime))
+
+
+def test_registry_reloads_changed_modules_file(monkeypatch, tmp_path):
+    """Edits to the modules file swap in a new snapshot and notify listeners."""
+
+    modules_file = tmp_path / "modules.json"
+    _write_modules(modules_file, ["alfa", "beta"], mtime=1_000_000_000)
+    monkeypatch.setenv("AURVO_DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.setenv("AURVO_MODULES_FILE", str(modules_file))
+    monkeypatch.delenv("AURVO_MODULES", raising=False)
+
+    notifications = []
+    monkeypatch.setattr(config, "_module_change_listeners", [notifications.append])
+    before = config.get_settings()
+
+    assert not config.get_registry().refresh()
+
+    _write_modules(modules_file, ["beta", "gamma"], mtime=2_000_000_000)
+    changes = config.get_registry().refresh()
+
+    assert [module.slug for module in changes.added] == ["gamma"]
+    assert [module.slug for module in changes.removed] == ["alfa"]
+    assert notifications == [changes]
+    assert list(config.get_settings().modules) == ["beta", "gamma"]
+    assert list(before.modules) == ["alfa", "beta"]
+
+
+def test_registry_keeps_snapshot_when_file_is_invalid(monkeypatch, tmp_path):
+    """A broken modules file is ignored until it is fixed."""
+
+    modules_file = tmp_path / "modules.json"
+    _write_modules(modules_file, ["alfa"], mtime=1_000_000_000)
+    monkeypatch.setenv("AURVO_DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.setenv("AURVO_MODULES_FILE", str(modules_file))
+    monkeypatch.delenv("AURVO_MODULES", raising=False)
+    config.get_settings()
+
+    modules_file.write_text("{", encoding="utf-8")
+
+    assert not config.get_registry().refresh()
+    assert list(config.get_settings().modules) == ["alfa"]
+
+
+def test_registry_keeps_snapshot_when_shards_change(monkeypatch, tmp_path):
+    """Changing a module's shard count needs the offline reshard tool."""
+
+    modules_file = tmp_path / "modules.json"
+    _write_modules(modules_file, ["alfa"], mtime=1_000_000_000)
+    monkeypatch.setenv("AURVO_DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.setenv("AURVO_MODULES_FILE", str(modules_file))
+    monkeypatch.delenv("AURVO_MODULES", raising=False)
+    config.get_settings()
+
+    payload = {"modules": [{"slug": "alfa", "title": "otro", "description": "-", "shards": 2}]}
+    modules_file.write_text(json.dumps(payload), encoding="utf-8")
+
+    assert not config.get_registry().refresh()
+    assert config.get_settings().modules["alfa"].shards == 1
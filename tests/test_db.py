@@ -0,0 +1,384 @@
+"""Tests for the pooled module database layer."""
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.app import config
+from backend.app.db import core
+
+
+@pytest.fixture(autouse=True)
+def isolated_data_dir(monkeypatch, tmp_path):
+    """Point the backend at a temporary data directory with default modules."""
+
+    monkeypatch.setenv("AURVO_DATA_DIR", str(tmp_path))
+    monkeypatch.delenv("AURVO_MODULES", raising=False)
+    monkeypatch.delenv("AURVO_MODULES_FILE", raising=False)
+    core.close_pools()
+    config.reset_settings_cache()
+    yield tmp_path
+    core.close_pools()
+    config.reset_settings_cache()
+
+
+def test_pool_reuses_connections_and_applies_pragmas():
+    """Connections are long-lived and configured with the tuned PRAGMAs."""
+
+    with core.connect("santosecure") as writer:
+        first_writer = writer
+        assert writer.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert writer.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+
+    with core.connect("santosecure") as writer:
+        assert writer is first_writer
+
+    with core.connect("santosecure", readonly=True) as reader:
+        assert reader.execute("PRAGMA query_only").fetchone()[0] == 1
+        with pytest.raises(sqlite3.OperationalError):
+            reader.execute(
+                f"INSERT INTO {core.DATABASE_TABLE} (key, value) VALUES ('a', 'b')"
+            )
+
+
+def test_readers_do_not_wait_for_the_writer():
+    """An open write transaction does not block concurrent readers."""
+
+    with core.connect("hoc-engine") as writer:
+        writer.execute(
+            f"INSERT INTO {core.DATABASE_TABLE} (key, value) VALUES ('pendiente', 'x')"
+        )
+        results = []
+
+        def read() -> None:
+            with core.connect("hoc-engine", readonly=True) as reader:
+                results.append(
+                    reader.execute(
+                        f"SELECT COUNT(*) FROM {core.DATABASE_TABLE} WHERE key = 'pendiente'"
+                    ).fetchone()[0]
+                )
+
+        thread = threading.Thread(target=read)
+        thread.start()
+        thread.join(timeout=2)
+        assert not thread.is_alive()
+        assert results == [0]
+        writer.commit()
+
+
+def test_reader_pool_is_bounded(monkeypatch):
+    """No more than ``AURVO_DB_POOL_SIZE`` readers are open at once."""
+
+    monkeypatch.setenv("AURVO_DB_POOL_SIZE", "1")
+    config.reset_settings_cache()
+
+    acquired = threading.Event()
+    with core.connect("aurvoui", readonly=True):
+
+        def read() -> None:
+            with core.connect("aurvoui", readonly=True):
+                acquired.set()
+
+        thread = threading.Thread(target=read)
+        thread.start()
+        assert not acquired.wait(timeout=0.2)
+    thread.join(timeout=2)
+    assert acquired.is_set()
+
+
+def test_open_databases_are_capped_least_recently_used_first(monkeypatch):
+    """Idle pools beyond ``AURVO_DB_MAX_OPEN`` are closed and reopen on demand."""
+
+    monkeypatch.setenv("AURVO_DB_MAX_OPEN", "2")
+    config.reset_settings_cache()
+    slugs = [module.slug for module in config.list_modules()][:4]
+    paths = {slug: core.get_database_path(config.get_module(slug)) for slug in slugs}
+
+    with core.connect(slugs[0]) as busy:
+        busy.execute(f"INSERT INTO {core.DATABASE_TABLE} (key, value) VALUES ('k', 'v')")
+        busy.commit()
+        for slug in slugs[1:]:
+            with core.connect(slug, readonly=True):
+                pass
+        # The pool in use survives; the idle ones were evicted oldest first.
+        assert list(core._pools) == [paths[slugs[0]], paths[slugs[3]]]
+
+    evicted = core.get_pool(slugs[3])
+    with core.connect(slugs[1], readonly=True):
+        pass
+    with core.connect(slugs[0], readonly=True) as reader:
+        row = reader.execute(f"SELECT value FROM {core.DATABASE_TABLE} WHERE key = 'k'")
+        assert row.fetchone()[0] == "v"
+    assert evicted._closed
+    assert list(core._pools) == [paths[slugs[1]], paths[slugs[0]]]
+
+
+def test_changed_definition_of_an_evicted_module_reaches_cached_insights(
+    monkeypatch, tmp_path
+):
+    """Seeds rewritten on reopen invalidate the cache and bump the commit counter."""
+
+    from backend.app.services import modules as module_service
+
+    modules_file = tmp_path / "modules.json"
+
+    def write_modules(description: str, mtime: int) -> None:
+        payload = {
+            "modules": [
+                {"slug": "a", "title": "A", "description": description},
+                {"slug": "b", "title": "B", "description": "-"},
+            ]
+        }
+        modules_file.write_text(json.dumps(payload), encoding="utf-8")
+        os.utime(modules_file, ns=(mtime, mtime))
+
+    write_modules("old", 1_000_000_000)
+    monkeypatch.setenv("AURVO_MODULES_FILE", str(modules_file))
+    monkeypatch.setenv("AURVO_DB_MAX_OPEN", "1")
+    config.reset_settings_cache()
+    module_service.clear_insight_cache()
+
+    assert module_service.get_insight("a", "descripcion")["value"] == "old"
+    counter = core.read_version_counter("a")
+    with core.connect("b", readonly=True):
+        pass
+    assert not core.is_pool_open("a")
+
+    write_modules("new", 2_000_000_000)
+    assert config.get_registry().refresh().changed
+
+    assert module_service.get_insight("a", "descripcion")["value"] == "new"
+    assert core.read_version_counter("a") > counter
+
+
+def test_record_counter_tracks_inserts_and_deletes():
+    """The maintained counter matches ``COUNT(*)`` without scanning on read."""
+
+    def counts(connection) -> tuple[int, int]:
+        scanned = connection.execute(f"SELECT COUNT(*) FROM {core.DATABASE_TABLE}").fetchone()
+        return core.get_record_count(connection), scanned[0]
+
+    with core.connect("aurvocloud") as connection:
+        initial, _ = counts(connection)
+
+    core.seed_records("aurvocloud", [("a", "1"), ("b", "2")])
+    core.seed_records("aurvocloud", [("a", "3")])
+
+    with core.connect("aurvocloud") as connection:
+        assert counts(connection) == (initial + 2, initial + 2)
+        connection.execute(f"DELETE FROM {core.DATABASE_TABLE} WHERE key = 'b'")
+        connection.commit()
+        assert counts(connection) == (initial + 1, initial + 1)
+
+
+def test_record_counter_backfills_existing_databases(isolated_data_dir):
+    """Databases created before the counter and search index are backfilled once."""
+
+    legacy = sqlite3.connect(isolated_data_dir / "aurvoui.db")
+    legacy.execute(
+        f"CREATE TABLE {core.DATABASE_TABLE} (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+        "key TEXT NOT NULL UNIQUE, value TEXT NOT NULL, "
+        "updated_at TEXT NOT NULL DEFAULT (datetime('now')))"
+    )
+    legacy.executemany(
+        f"INSERT INTO {core.DATABASE_TABLE} (key, value) VALUES (?, ?)",
+        [("xenon", "1"), ("yodo", "2"), ("zinc", "3")],
+    )
+    legacy.commit()
+    legacy.close()
+
+    with core.connect("aurvoui", readonly=True) as connection:
+        assert core.get_schema_version(connection) == core.SCHEMA_VERSION
+        scanned = connection.execute(f"SELECT COUNT(*) FROM {core.DATABASE_TABLE}").fetchone()
+        assert core.get_record_count(connection) == scanned[0] >= 3
+        matches = connection.execute(
+            f"SELECT rowid FROM {core.SEARCH_TABLE} WHERE {core.SEARCH_TABLE} MATCH 'yodo'"
+        ).fetchall()
+        assert len(matches) == 1
+
+
+def test_data_version_changes_on_every_write():
+    """Inserts, updates and deletes each bump the module's data version."""
+
+    with core.connect("aurvoui") as connection:
+        versions = [core.get_data_version(connection)]
+        core.upsert_records(connection, [("cobre", "1")])
+        versions.append(core.get_data_version(connection))
+        core.upsert_records(connection, [("cobre", "2")])
+        versions.append(core.get_data_version(connection))
+        connection.execute(f"DELETE FROM {core.DATABASE_TABLE} WHERE key = 'cobre'")
+        connection.commit()
+        versions.append(core.get_data_version(connection))
+
+    assert len(set(versions)) == 4
+
+
+def test_change_log_records_writes_and_compacts():
+    """Every row change is logged; compaction keeps the newest entries."""
+
+    with core.connect("aurvoui") as connection:
+        core.set_change_retention(connection, 10)
+        _, head = core.get_change_bounds(connection)
+        core.upsert_records(connection, [("cobre", "1")])
+        core.upsert_records(connection, [("cobre", "2")])
+        connection.execute(f"DELETE FROM {core.DATABASE_TABLE} WHERE key = 'cobre'")
+        connection.commit()
+
+        logged = [(key, value) for _, key, value, *_ in core.fetch_changes(connection, head, 10)]
+        assert logged == [("cobre", "1"), ("cobre", "2"), ("cobre", None)]
+
+        core.upsert_records(
+            connection, [(f"k{index}", "v") for index in range(core.CHANGES_COMPACT_EVERY)]
+        )
+        floor, head = core.get_change_bounds(connection)
+        retained = connection.execute(f"SELECT COUNT(*) FROM {core.CHANGES_TABLE}").fetchone()[0]
+
+    assert floor > 0
+    assert retained == head - floor
+    assert retained < core.CHANGES_COMPACT_EVERY
+
+
+def test_online_backup_is_consistent_while_writes_continue(isolated_data_dir):
+    """Writers keep committing during a page-by-page backup of one snapshot."""
+
+    with core.connect("aurvoui") as connection:
+        core.upsert_records(connection, [(f"k{index}", "v" * 200) for index in range(3000)])
+    stop = threading.Event()
+
+    def write() -> None:
+        index = 0
+        while not stop.is_set():
+            with core.connect("aurvoui") as connection:
+                core.upsert_records(connection, [(f"extra{index}", "x")])
+            index += 1
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    target = isolated_data_dir / "copia" / "aurvoui.db"
+    try:
+        with core.connect("aurvoui", readonly=True) as connection:
+            core.backup_database(connection, target, pages=1)
+    finally:
+        stop.set()
+        writer.join()
+
+    copy = sqlite3.connect(target)
+    try:
+        assert copy.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+        scanned = copy.execute(f"SELECT COUNT(*) FROM {core.DATABASE_TABLE}").fetchone()[0]
+        assert core.get_record_count(copy) == scanned >= 3000
+    finally:
+        copy.close()
+
+
+def test_new_databases_are_stamped_with_the_schema_version():
+    """Fresh databases record the latest migration in ``user_version``."""
+
+    with core.connect("santosecure") as connection:
+        assert core.get_schema_version(connection) == core.SCHEMA_VERSION
+
+
+def test_seeding_skips_unchanged_values():
+    """Re-seeding identical values writes nothing and keeps ``updated_at``."""
+
+    assert core.seed_records("hoc-engine", [("fase", "beta")]) == 1
+    with core.connect("hoc-engine") as connection:
+        connection.execute(
+            f"UPDATE {core.DATABASE_TABLE} SET updated_at = '2000-01-01 00:00:00'"
+        )
+        connection.commit()
+
+    assert core.seed_records("hoc-engine", [("fase", "beta")]) == 0
+    assert core.seed_records("hoc-engine", [("fase", "estable")]) == 1
+
+    with core.connect("hoc-engine", readonly=True) as connection:
+        row = connection.execute(
+            f"SELECT value, updated_at FROM {core.DATABASE_TABLE} WHERE key = 'fase'"
+        ).fetchone()
+    assert row["value"] == "estable"
+    assert row["updated_at"] != "2000-01-01 00:00:00"
+
+
+def test_json_indexes_are_generated_columns_with_indexes():
+    """Declared fields become indexed columns; undeclared ones are dropped."""
+
+    with core.connect("aurvocloud") as connection:
+        core.sync_json_indexes(connection, ["estado", "metricas.latencia_ms"])
+        core.upsert_records(
+            connection,
+            [("a", '{"estado": "ok", "metricas": {"latencia_ms": 12}}'), ("b", "texto plano")],
+        )
+        rows = connection.execute(
+            "SELECT key, json__estado, json__metricas__latencia_ms FROM project_insights "
+            "WHERE key IN ('a', 'b') ORDER BY key"
+        ).fetchall()
+        plan = connection.execute(
+            "EXPLAIN QUERY PLAN SELECT key FROM project_insights "
+            "WHERE json__metricas__latencia_ms > 10 ORDER BY json__metricas__latencia_ms, key"
+        ).fetchall()
+
+        core.sync_json_indexes(connection, ["estado"])
+        columns = [row[1] for row in connection.execute("PRAGMA table_xinfo(project_insights)")]
+
+    assert [tuple(row) for row in rows] == [("a", "ok", 12), ("b", None, None)]
+    assert "project_insights_json__metricas__latencia_ms" in plan[0][-1]
+    assert "json__estado" in columns and "json__metricas__latencia_ms" not in columns
+
+
+def test_expired_insights_are_swept_in_batches_and_space_reclaimed(monkeypatch):
+    """The sweeper deletes due rows through the ``expires_at`` index and vacuums."""
+
+    from backend.app.services import retention
+
+    monkeypatch.setenv("AURVO_EXPIRY_SWEEP_BATCH", "7")
+    monkeypatch.setenv("AURVO_VACUUM_STEP_PAGES", "4")
+    config.reset_settings_cache()
+    past = "2000-01-01 00:00:00"
+    with core.connect("aurvoui") as connection:
+        assert core.get_auto_vacuum(connection) == retention.AUTO_VACUUM_INCREMENTAL
+        records = [(f"viejo-{index}", "x" * 2000, past) for index in range(20)]
+        records.append(("eterno", "y", None))
+        records.append(("futuro", "z", "2999-01-01 00:00:00"))
+        core.upsert_records(connection, records)
+        plan = connection.execute(
+            f"EXPLAIN QUERY PLAN SELECT id FROM {core.DATABASE_TABLE} "
+            "WHERE expires_at <= ? ORDER BY expires_at LIMIT 1",
+            (past,),
+        ).fetchall()
+    assert "expires_at" in " ".join(str(row[-1]) for row in plan)
+    notified = []
+    monkeypatch.setattr(core, "_key_listeners", [lambda slug, keys: notified.extend(keys)])
+
+    result = retention.sweep_module("aurvoui")
+
+    assert result["expired"] == 20
+    assert result["freed_pages"] > 0
+    assert sorted(notified) == sorted(f"viejo-{index}" for index in range(20))
+    with core.connect("aurvoui", readonly=True) as connection:
+        keys = {key for (key,) in connection.execute(f"SELECT key FROM {core.DATABASE_TABLE}")}
+        assert core.get_freelist_count(connection) == 0
+    assert {"eterno", "futuro"} <= keys and not any(key.startswith("viejo") for key in keys)
+
+
+def test_format_expiry_prefers_explicit_dates_over_retention():
+    """Explicit dates are stored in UTC; retention counts from now."""
+
+    from datetime import datetime, timedelta, timezone
+
+    aware = datetime(2030, 5, 1, 12, 0, tzinfo=timezone(timedelta(hours=2)))
+    assert core.format_expiry(aware, 60) == "2030-05-01 10:00:00"
+    assert core.format_expiry(None) is None
+    assert core.format_expiry(core.KEEP_EXPIRY) is core.KEEP_EXPIRY
+    derived = datetime.strptime(core.format_expiry(None, 3600), core.EXPIRY_FORMAT)
+    expected = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(hours=1)
+    assert abs((derived - expected).total_seconds()) < 5
@@ -0,0 +1,79 @@
+"""Tests for the streaming ingestion parsers."""
+from __future__ import annotations
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.app.services import ingest
+
+
+async def _chunks(payload: bytes, size: int):
+    for start in range(0, len(payload), size):
+        yield payload[start : start + size]
+
+
+def _collect(parser, payload: bytes, size: int) -> list:
+    async def run() -> list:
+        return [item async for item in parser(_chunks(payload, size))]
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("size", [1, 3, 1024])
+def test_json_array_parser_handles_arbitrary_chunk_boundaries(size):
+    """Objects split across chunks (including multi-byte text) are reassembled."""
+
+    payload = '[ {"key": "ñandú", "value": "a,b]"} ,\n{"key": "b", "value": "{}"} ]'.encode()
+
+    items = _collect(ingest.iter_json_array, payload, size)
+
+    assert items == [{"key": "ñandú", "value": "a,b]"}, {"key": "b", "value": "{}"}]
+
+
+def test_json_array_parser_rejects_truncated_payload():
+    """A stream that ends before the closing bracket is an error."""
+
+    with pytest.raises(ingest.IngestError):
+        _collect(ingest.iter_json_array, b'[{"key": "a", "value": "b"}', 4)
+
+
+def test_ndjson_parser_skips_blank_lines():
+    """Blank lines are ignored and the final line needs no trailing newline."""
+
+    payload = b'{"key": "a", "value": "1"}\n\n{"key": "b", "value": "2"}'
+
+    items = _collect(ingest.iter_ndjson, payload, 5)
+
+    assert [item["key"] for item in items] == ["a", "b"]
+
+
+@pytest.mark.parametrize("size", [1, 4, 1024])
+def test_csv_parser_handles_quoted_newlines_across_chunks(size):
+    """Quoted fields may contain commas, quotes and line breaks."""
+
+    payload = (
+        'key,value,updated_at\r\n'
+        'a,"uno, dos",2024-01-01 00:00:00\r\n'
+        'ñ,"línea 1\nlínea ""2""",2024-01-01 00:00:00\n'
+    ).encode()
+
+    items = _collect(ingest.iter_csv, payload, size)
+
+    assert [(item["key"], item["value"]) for item in items] == [
+        ("a", "uno, dos"),
+        ("ñ", 'línea 1\nlínea "2"'),
+    ]
+
+
+def test_csv_parser_requires_key_and_value_columns():
+    """A header without ``key``/``value`` is rejected."""
+
+    with pytest.raises(ingest.IngestError):
+        _collect(ingest.iter_csv, b"clave,valor\na,b\n", 1024)
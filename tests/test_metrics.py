@@ -0,0 +1,109 @@
+"""Tests for the Prometheus instrumentation layer."""
+from __future__ import annotations
+
+import sys
+import threading
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.app import metrics, profiling
+
+
+def test_histogram_renders_cumulative_buckets():
+    """Buckets are cumulative and end with ``+Inf``, ``_sum`` and ``_count``."""
+
+    histogram = metrics.Histogram("demo_seconds", "Demo.", ("route",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, route="/a")
+    histogram.observe(0.5, route="/a")
+    histogram.observe(5, route="/a")
+
+    lines = histogram.render()
+
+    assert lines[:2] == ["# HELP demo_seconds Demo.", "# TYPE demo_seconds histogram"]
+    assert 'demo_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{route="/a",le="1"} 2' in lines
+    assert 'demo_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+    assert 'demo_seconds_sum{route="/a"} 5.55' in lines
+    assert 'demo_seconds_count{route="/a"} 3' in lines
+
+
+def test_label_values_are_escaped():
+    """Quotes and newlines in label values cannot break the exposition format."""
+
+    counter = metrics.Counter("demo_total", "Demo.", ("module",))
+    counter.inc(module='a"b\nc')
+
+    assert counter.render()[-1] == 'demo_total{module="a\\"b\\nc"} 1'
+
+
+def test_query_timer_records_duration_and_rows():
+    """``track_query`` feeds both the duration and the row histograms."""
+
+    before = metrics.DB_QUERY_DURATION.count(module="demo", statement="select")
+
+    with metrics.track_query("demo", "select") as query:
+        query.rows = 7
+
+    assert metrics.DB_QUERY_DURATION.count(module="demo", statement="select") == before + 1
+    assert metrics.DB_ROWS_RETURNED.count(module="demo", statement="select") >= 1
+
+
+def test_sampling_profiler_collapses_stacks_per_thread():
+    """Busy threads show up as ``thread;...;function count`` lines, root first."""
+
+    stop = threading.Event()
+
+    def spin_for_profile():
+        while not stop.is_set():
+            pass
+
+    worker = threading.Thread(target=spin_for_profile, name="demo-spin_3")
+    worker.start()
+    try:
+        stacks = profiling.sample_stacks(0.05, interval=0.001)
+    finally:
+        stop.set()
+        worker.join()
+
+    lines = profiling.collapse(stacks).splitlines()
+    spinning = [line for line in lines if line.startswith("demo-spin;")]
+    assert spinning
+    stack, count = spinning[0].rsplit(" ", 1)
+    assert "threading.Thread.run;" in stack
+    assert ".<locals>.spin_for_profile" in stack
+    assert int(count) >= 1
+
+
+def test_query_phases_reach_the_request_timings():
+    """Queries timed while a request is being timed add to its ``query`` phase."""
+
+    timings = profiling.RequestTimings()
+    token = profiling._timings.set(timings)
+    try:
+        with metrics.track_query("demo", "select"):
+            pass
+        with metrics.track_query("demo", "select"):
+            pass
+    finally:
+        profiling._timings.reset(token)
+
+    assert timings.snapshot()["query"]["count"] == 2
+
+
+def test_concurrent_phases_count_wall_clock_time():
+    """Overlapping calls of one phase add their union, not their sum."""
+
+    timings = profiling.RequestTimings()
+    timings.add("connect", 2.0, end=10.0)
+    timings.add("connect", 1.0, end=9.5)
+    timings.add("connect", 0.5, end=11.0)
+    timings.add("connect", 1.0, end=20.0)
+    timings.add("query", 1.0, end=10.0)
+
+    phases = timings.snapshot()
+
+    assert phases["connect"] == {"ms": 3500.0, "count": 4}
+    assert phases["query"] == {"ms": 1000.0, "count": 1}
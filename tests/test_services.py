@@ -0,0 +1,422 @@
+"""Tests for the module service layer."""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.app import config
+from backend.app.db import batching, core, executor
+from backend.app.schemas.module import ModuleDetail
+from backend.app.services import changes as change_service
+from backend.app.services import modules as module_service
+
+
+@pytest.fixture(autouse=True)
+def isolated_data_dir(monkeypatch, tmp_path):
+    """Point the backend at a temporary data directory with default modules."""
+
+    monkeypatch.setenv("AURVO_DATA_DIR", str(tmp_path))
+    monkeypatch.delenv("AURVO_MODULES", raising=False)
+    monkeypatch.delenv("AURVO_MODULES_FILE", raising=False)
+    config.reset_settings_cache()
+    yield tmp_path
+    batching.drain_batchers()
+    executor.shutdown_executors()
+    core.close_pools()
+    config.reset_settings_cache()
+
+
+def test_async_upsert_and_detail_round_trip():
+    """The awaitable service functions read back what they write."""
+
+    async def scenario() -> dict:
+        await module_service.upsert_insight_async("aurvocloud", "region", "eu-west")
+        return await module_service.get_module_detail_async("aurvocloud")
+
+    detail = asyncio.run(scenario())
+
+    insights = {insight["key"]: insight["value"] for insight in detail["insights"]}
+    assert insights["region"] == "eu-west"
+
+
+@pytest.mark.parametrize("limit", [None, 2])
+def test_rendered_detail_matches_pydantic_serialisation(limit):
+    """The JSON fast path produces the same document as ``ModuleDetail``."""
+
+    module_service.upsert_insights_batch(
+        "aurvoui",
+        [("cita", 'dijo "hola"\n'), ("ñandú", "ave 🐦"), ("zeta", "\\ruta\\")],
+    )
+
+    detail = module_service.get_module_detail("aurvoui", limit=limit)
+    expected = json.loads(ModuleDetail(**detail).model_dump_json())
+    rendered = json.loads(module_service.render_module_detail("aurvoui", limit=limit))
+
+    assert rendered == expected
+    assert (rendered["next_cursor"] is None) == (limit is None)
+
+
+def test_unknown_module_raises_key_error():
+    """Unknown slugs surface as ``KeyError`` before any work is scheduled."""
+
+    with pytest.raises(KeyError):
+        asyncio.run(module_service.get_module_detail_async("desconocido"))
+
+
+def test_slow_module_does_not_delay_other_modules(monkeypatch):
+    """Saturating one module's workers leaves other modules responsive."""
+
+    monkeypatch.setenv("AURVO_DB_WORKERS_PER_MODULE", "2")
+    config.reset_settings_cache()
+
+    release = threading.Event()
+    original = module_service.get_module_detail
+
+    def slow_for_santosecure(slug: str) -> dict:
+        if slug == "santosecure":
+            release.wait(timeout=5)
+        return original(slug)
+
+    monkeypatch.setattr(module_service, "get_module_detail", slow_for_santosecure)
+
+    async def scenario() -> float:
+        slow_calls = [
+            asyncio.ensure_future(module_service.get_module_detail_async("santosecure"))
+            for _ in range(4)
+        ]
+        await asyncio.sleep(0.05)
+        started = time.perf_counter()
+        await module_service.get_module_detail_async("hoc-engine")
+        elapsed = time.perf_counter() - started
+        release.set()
+        await asyncio.gather(*slow_calls)
+        return elapsed
+
+    assert asyncio.run(scenario()) < 1.0
+
+
+@pytest.mark.parametrize(
+    ("prefix", "expected"),
+    [("ab", "ac"), ("a\U0010ffff", "b"), ("\U0010ffff", None)],
+)
+def test_prefix_upper_bound(prefix, expected):
+    """Prefix filters are translated into an index-friendly key range."""
+
+    assert module_service._prefix_upper_bound(prefix) == expected
+
+
+def test_concurrent_upserts_share_a_transaction(monkeypatch):
+    """Writes arriving within the window are committed as one batch."""
+
+    monkeypatch.setenv("AURVO_WRITE_BATCH_WINDOW_MS", "50")
+    config.reset_settings_cache()
+
+    batch_sizes = []
+    original_write = batching.WriteBatcher._write
+
+    def recording_write(self, batch):
+        batch_sizes.append(len(batch))
+        original_write(self, batch)
+
+    monkeypatch.setattr(batching.WriteBatcher, "_write", recording_write)
+
+    async def scenario() -> list:
+        return await asyncio.gather(
+            *(
+                module_service.upsert_insight_async("aurvoui", f"k{index}", f"v{index}")
+                for index in range(10)
+            )
+        )
+
+    results = asyncio.run(scenario())
+
+    assert [row["value"] for row in results] == [f"v{index}" for index in range(10)]
+    assert all(row["updated_at"] for row in results)
+    assert batch_sizes == [10]
+
+
+def test_async_writes_flush_on_the_shared_executor(monkeypatch):
+    """Flushing writes to many modules uses the bounded pool, not a thread per module."""
+
+    monkeypatch.setenv("AURVO_DB_MAX_WORKERS", "2")
+    config.reset_settings_cache()
+    executor.shutdown_executors()
+    slugs = [module.slug for module in config.list_modules()]
+    writers = set()
+    original_write = batching.WriteBatcher._write
+
+    def recording_write(self, batch):
+        writers.add(threading.current_thread().name)
+        original_write(self, batch)
+
+    monkeypatch.setattr(batching.WriteBatcher, "_write", recording_write)
+
+    async def scenario() -> list:
+        return await asyncio.gather(
+            *(
+                module_service.upsert_insight_async(slug, f"k{index}", slug)
+                for slug in slugs
+                for index in range(5)
+            )
+        )
+
+    results = asyncio.run(scenario())
+
+    assert [row["value"] for row in results] == [slug for slug in slugs for _ in range(5)]
+    assert len(slugs) > 2
+    assert all(name.startswith("aurvo-db") for name in writers)
+    assert len(writers) <= 2
+
+
+def test_sync_upsert_returns_latest_value():
+    """Repeated writes to the same key resolve to the value each caller wrote."""
+
+    first = module_service.upsert_insight("aurvoui", "tema", "oro")
+    second = module_service.upsert_insight("aurvoui", "tema", "plata")
+
+    assert (first["value"], second["value"]) == ("oro", "plata")
+
+
+def test_removed_modules_are_drained(monkeypatch, tmp_path):
+    """Removing a module from the registry closes its pool once its calls have run."""
+
+    module = config.get_module("aurvoui")
+    asyncio.run(module_service.get_module_detail_async("aurvoui"))
+    pool = core.get_pool("aurvoui")
+
+    module_service._retire_module(module)
+
+    assert pool._closed
+    assert core.get_database_path(module) not in core._pools
+    assert "aurvoui" not in executor._lanes
+
+
+def test_modules_share_a_bounded_executor(monkeypatch):
+    """Threads are shared by every module; each module is capped to its lane."""
+
+    monkeypatch.setenv("AURVO_DB_MAX_WORKERS", "3")
+    monkeypatch.setenv("AURVO_DB_WORKERS_PER_MODULE", "2")
+    config.reset_settings_cache()
+    executor.shutdown_executors()
+    running = {}
+    peaks = {}
+    lock = threading.Lock()
+
+    def work(slug: str) -> str:
+        with lock:
+            running[slug] = running.get(slug, 0) + 1
+            peaks[slug] = max(peaks.get(slug, 0), running[slug])
+        time.sleep(0.01)
+        with lock:
+            running[slug] -= 1
+        return threading.current_thread().name
+
+    slugs = [module.slug for module in config.list_modules()]
+
+    async def scenario() -> list:
+        calls = [executor.run_in_module(slug, work, slug) for slug in slugs for _ in range(6)]
+        return await asyncio.gather(*calls)
+
+    threads = set(asyncio.run(scenario()))
+
+    assert len(threads) <= 3
+    assert all(name.startswith("aurvo-db") for name in threads)
+    assert max(peaks.values()) <= 2
+    for slug in slugs:
+        executor.wait_for_module(slug)
+    assert not executor._lanes
+
+
+def test_long_poll_wakes_on_local_write():
+    """A waiting long-poll returns as soon as another thread writes."""
+
+    async def scenario() -> tuple[dict, float]:
+        head = (await change_service.read_changes_async("aurvocloud"))["next_since"]
+        timer = threading.Timer(
+            0.1, module_service.upsert_insight, ("aurvocloud", "sensor", "activo")
+        )
+        started = time.perf_counter()
+        timer.start()
+        feed = await change_service.wait_for_changes("aurvocloud", head, timeout=5)
+        return feed, time.perf_counter() - started
+
+    feed, elapsed = asyncio.run(scenario())
+
+    assert [change["key"] for change in feed["changes"]] == ["sensor"]
+    assert elapsed < change_service.CHANGES_POLL_SECONDS
+
+
+def test_change_stream_emits_server_sent_events():
+    """The SSE stream sends each change as an event identified by its ``seq``."""
+
+    async def scenario() -> list[bytes]:
+        head = (await change_service.read_changes_async("aurvocloud"))["next_since"]
+        await module_service.upsert_insight_async("aurvocloud", "sensor", "activo")
+        stream = change_service.stream_changes("aurvocloud", head)
+        chunks = [await stream.__anext__(), await stream.__anext__()]
+        await stream.aclose()
+        return chunks
+
+    preamble, events = asyncio.run(scenario())
+
+    assert preamble.startswith(b"retry: 1000")
+    assert events.startswith(b"event: change\nid: ")
+    payload = json.loads(events.split(b"data: ", 1)[1])
+    assert (payload["key"], payload["value"], payload["deleted"]) == ("sensor", "activo", False)
+
+
+def _use_sharded_module(monkeypatch, shards: int) -> None:
+    modules = [{"slug": "hot", "title": "Hot", "description": "Módulo con mucho tráfico"}]
+    if shards > 1:
+        modules[0]["shards"] = shards
+    monkeypatch.setenv("AURVO_MODULES", json.dumps(modules))
+    core.close_pools()
+    config.reset_settings_cache()
+
+
+def test_sharded_module_routes_keys_and_merges_listings(monkeypatch, isolated_data_dir):
+    """Keys land in their hash shard and listings come back in key order."""
+
+    _use_sharded_module(monkeypatch, 4)
+    keys = [f"k{index:03d}" for index in range(60)]
+    for key in keys[:30]:
+        module_service.upsert_insight("hot", key, key.upper())
+    module_service.upsert_insights_batch("hot", [(key, key.upper()) for key in keys[30:]])
+
+    assert sorted(path.name for path in isolated_data_dir.glob("hot*.db")) == [
+        "hot.1.db", "hot.2.db", "hot.3.db", "hot.db"
+    ]
+    for shard in range(4):
+        with core.connect("hot", readonly=True, shard=shard) as connection:
+            stored = [row[0] for row in connection.execute("SELECT key FROM project_insights")]
+        assert all(core.shard_for_key(key, 4) == shard for key in stored)
+
+    summary = module_service.get_module_summary(config.get_module("hot"))
+    assert (summary["records"], summary["shards"]) == (62, 4)  # plus two seed records
+    page = module_service.get_module_detail("hot", limit=25, prefix="k")
+    assert [insight["key"] for insight in page["insights"]] == keys[:25]
+    rest = module_service.get_module_detail("hot", cursor=page["next_cursor"], prefix="k")
+    assert [insight["key"] for insight in rest["insights"]] == keys[25:]
+    assert module_service.get_insight("hot", "k042")["value"] == "K042"
+
+
+def test_reshard_round_trip(monkeypatch, isolated_data_dir):
+    """Resharding keeps every row and refuses mismatched configurations."""
+
+    from backend.app.services import sharding
+
+    _use_sharded_module(monkeypatch, 1)
+    records = [(f"k{index}", str(index)) for index in range(500)]
+    module_service.upsert_insights_batch("hot", records)
+    before = module_service.fetch_insight_rows("hot")
+    core.close_pools()
+
+    assert sharding.reshard_module("hot", 3)["records"] == 502
+    with pytest.raises(RuntimeError, match="reshard"):
+        module_service.get_insight("hot", "k1")
+
+    _use_sharded_module(monkeypatch, 3)
+    assert module_service.fetch_insight_rows("hot") == before
+    feed = change_service.read_changes("hot", 0, shard=1)
+    assert feed["reset"] and not feed["changes"]
+    core.close_pools()
+
+    result = sharding.reshard_module("hot", 1)
+    assert (result["from"], result["to"], result["records"]) == (3, 1, 502)
+    _use_sharded_module(monkeypatch, 1)
+    assert module_service.fetch_insight_rows("hot") == before
+    assert [path.name for path in isolated_data_dir.glob("hot*.db")] == ["hot.db"]
+
+
+def test_query_insights_by_indexed_json_field(monkeypatch):
+    """Equality and range filters page through every shard in field order."""
+
+    modules = [
+        {"slug": "hot", "title": "Hot", "description": "-", "shards": 3, "indexes": ["nivel"]}
+    ]
+    monkeypatch.setenv("AURVO_MODULES", json.dumps(modules))
+    config.reset_settings_cache()
+    records = [(f"k{index:02d}", json.dumps({"nivel": index % 5})) for index in range(40)]
+    records += [("texto", "sin json"), ("cadena", '{"nivel": "alto"}')]
+    module_service.upsert_insights_batch("hot", records)
+
+    equal = module_service.query_insights("hot", "nivel", {"eq": 3})
+    assert [insight["key"] for insight in equal["insights"]] == [
+        f"k{index:02d}" for index in range(3, 40, 5)
+    ]
+
+    seen, cursor = [], None
+    while True:
+        page = module_service.query_insights(
+            "hot", "nivel", {"gte": 3}, limit=4, cursor=cursor
+        )
+        seen += [(json.loads(item["value"])["nivel"], item["key"]) for item in page["insights"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == sorted(seen, key=lambda item: (isinstance(item[0], str), item))
+    assert len(seen) == 17 and seen[-1] == ("alto", "cadena")  # text sorts after numbers
+
+    with pytest.raises(module_service.FieldQueryError):
+        module_service.query_insights("hot", "otro", {})
+    with pytest.raises(module_service.FieldQueryError):
+        module_service.query_insights("hot", "nivel", {}, cursor="no-es-un-cursor")
+
+
+def test_point_reads_go_through_the_insight_cache(monkeypatch):
+    """Reads are cached, writes invalidate them and multi-gets span every shard."""
+
+    _use_sharded_module(monkeypatch, 3)
+    module_service.upsert_insights_batch("hot", [(f"k{index}", str(index)) for index in range(20)])
+    cache = module_service.get_insight_cache()
+
+    assert module_service.get_insight("hot", "k7")["value"] == "7"
+    hits = cache.hits
+    assert module_service.get_insight("hot", "k7")["value"] == "7"
+    assert cache.hits == hits + 1
+
+    module_service.upsert_insight("hot", "k7", "siete")
+    assert module_service.get_insight("hot", "k7")["value"] == "siete"
+    module_service.upsert_insights_batch("hot", [("k7", "seven")])
+    assert module_service.get_insight("hot", "k7")["value"] == "seven"
+
+    result = module_service.get_insights("hot", ["k3", "nope", "k19", "k3", "k7"])
+    assert [insight["key"] for insight in result["insights"]] == ["k3", "k19", "k7"]
+    assert [insight["value"] for insight in result["insights"]] == ["3", "19", "seven"]
+    assert result["missing"] == ["nope"]
+    with pytest.raises(KeyError):
+        module_service.get_insight("hot", "nope")
+
+
+def test_insight_cache_follows_writes_from_other_processes(isolated_data_dir):
+    """A write by another worker process invalidates the cached insight here."""
+
+    module_service.upsert_insight("aurvoui", "tema", "uno")
+    assert asyncio.run(module_service.get_insight_async("aurvoui", "tema"))["value"] == "uno"
+    counter = core.read_version_counter("aurvoui")
+    module_service.upsert_insight("aurvoui", "otro", "local")
+    assert core.read_version_counter("aurvoui") == counter + 1
+    assert not core.foreign_writes_pending("aurvoui")  # local writes invalidate directly
+
+    script = (
+        "from backend.app.services import modules\n"
+        "modules.upsert_insight('aurvoui', 'tema', 'dos')\n"
+    )
+    env = {**os.environ, "AURVO_DATA_DIR": str(isolated_data_dir)}
+    subprocess.run([sys.executable, "-c", script], cwd=ROOT, env=env, check=True, timeout=60)
+
+    assert core.foreign_writes_pending("aurvoui")
+    assert asyncio.run(module_service.get_insight_async("aurvoui", "tema"))["value"] == "dos"
+    assert not core.foreign_writes_pending("aurvoui")